@@ -0,0 +1,635 @@
+// 서울 관광 지도 컴포넌트 (utils.show_streaming_map, utils.show_google_map)
+//
+// utils.build_map_component_bundle이 이 파일을 해시 파일명으로 복사하므로
+// 브라우저는 내용이 바뀔 때만 다시 받는다. 재실행마다 바뀌는 것은 args뿐이다.
+// Streamlit 컴포넌트 프로토콜(postMessage)을 직접 사용한다.
+// 처음에는 보이는 영역의 마커만 받고, 지도를 움직이면 아직 받지 않은
+// 타일을 컴포넌트 값으로 요청한다. Python이 재실행에서 응답을 보내면
+// 이미 받은 마커는 건너뛰고 새 마커만 지도에 추가한다.
+// 지도는 한 번만 만들고, 이후에는 Python이 보내는 변경 연산(args.sync)만
+// 살아 있는 지도에 적용한다. 연산 순번이 어긋나면(iframe 재로드, 놓친 렌더링)
+// 재동기화를 요청해 reset부터 다시 받는다.
+// 클러스터링은 서버에서 미리 해 두므로, 작은 줌에서는 그 줌의 클러스터
+// 중심/개수와 혼자 남은 마커만 받아 현재 줌의 것만 보여 준다.
+// args.stream이 false면(작은 마커 목록) 모든 마커를 처음에 받고 요청하지 않는다.
+//
+// 마커와 클러스터는 (카테고리 필터, 레벨)마다 하나의 google.maps.Data
+// 레이어에 담는다. 레벨은 클러스터 레벨 번호 또는 개별 마커 레벨 'M'이고,
+// 카테고리 레이어의 클러스터는 서버가 그 카테고리만으로 다시 묶은 것이다.
+// 지도에는 현재 (필터, 레벨)의 레이어 하나만 붙어 있으므로 카테고리를
+// 바꾸거나 줌 레벨이 바뀌어도 레이어 두 개의 setMap만 호출한다.
+//
+// 위치를 추적하는 지도(location 연산을 받은 지도)는 Python이 가진 마지막
+// 위치가 오래되었을 때와 "내 위치" 버튼을 눌렀을 때만 브라우저에 위치를
+// 묻고, 받은 위치는 컴포넌트 값의 location으로 보낸다. 지도는 그동안
+// 마지막 위치로 먼저 그려져 있다.
+(function () {
+    'use strict';
+
+    // Streamlit 통신
+    function sendMessage(type, data) {
+        var message = { isStreamlitMessage: true, type: type };
+        for (var name in data) message[name] = data[name];
+        window.parent.postMessage(message, '*');
+    }
+
+    // 보내는 값에는 마지막으로 받은 위치를 항상 붙인다 (값이 덮어써져도 위치를 잃지 않도록)
+    function setComponentValue(value) {
+        if (state.fix) value.location = state.fix;
+        state.lastValue = value;
+        sendMessage('streamlit:setComponentValue', { value: value, dataType: 'json' });
+    }
+
+    function setFrameHeight(height) {
+        sendMessage('streamlit:setFrameHeight', { height: height });
+    }
+
+    var state = {
+        args: null,
+        map: null,
+        infoWindow: null,
+        currentMarker: null,
+        mapsRequested: false,
+        version: null,
+        layers: {},           // "필터|레벨" -> { data: google.maps.Data, loadedTiles: {} }
+        activeLayer: null,    // 지도에 붙어 있는 레이어 키
+        level: null,          // 현재 타일 레벨
+        sentRequests: {},     // 이 iframe이 보낸 요청 ID
+        requestCount: 0,
+        seq: 0,               // 마지막으로 적용한 변경 연산 순번
+        resyncSeq: null,      // 재동기화를 요청한 순번
+        pending: [],          // 지도 로드 전에 받은 변경 연산 묶음
+        requestPrefix: Math.random().toString(36).slice(2),
+        extraMarkers: [],
+        extraKey: null,
+        controlsKey: null,
+        legend: [],
+        category: 'all',
+        categoryBounds: {},
+        lastValue: null,      // 마지막으로 보낸 컴포넌트 값
+        location: null,       // Python이 가진 마지막 위치 상태 { timestamp, max_age } (추적하지 않으면 null)
+        fix: null,            // 이 iframe이 받은 마지막 위치
+        locating: false,
+        locateTimer: null,
+        locationMarker: null
+    };
+
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, function (c) {
+            return { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c];
+        });
+    }
+
+    // 마커 아이콘: 외부 이미지 대신 색상별 SVG 핀을 만들어 재사용
+    var ICON_COLORS = {
+        red: '#EA4335', blue: '#4285F4', green: '#34A853', purple: '#9C27B0',
+        orange: '#FB8C00', pink: '#E91E63', yellow: '#FBC02D', gray: '#757575'
+    };
+    var iconCache = {};
+
+    function svgUrl(svg) {
+        return 'data:image/svg+xml;charset=UTF-8,' + encodeURIComponent(svg);
+    }
+
+    function iconUrl(color) {
+        if (!iconCache[color]) {
+            iconCache[color] = svgUrl(
+                '<svg xmlns="http://www.w3.org/2000/svg" width="32" height="32" viewBox="0 0 32 32">' +
+                '<path d="M16 1C9.9 1 5 5.9 5 12c0 8.3 11 19 11 19s11-10.7 11-19C27 5.9 22.1 1 16 1z" ' +
+                'fill="' + (ICON_COLORS[color] || color) + '" stroke="#FFFFFF" stroke-width="1.5"/>' +
+                '<circle cx="16" cy="12" r="4" fill="#FFFFFF"/></svg>'
+            );
+        }
+        return iconCache[color];
+    }
+
+    // 클러스터 아이콘: 개수를 그려 넣은 원 (카테고리 레이어는 카테고리 색)
+    var clusterIconCache = {};
+
+    function clusterIcon(count, color) {
+        var key = count + ':' + color;
+        if (!clusterIconCache[key]) {
+            var size = Math.round(28 + 8 * Math.log10(count));
+            var half = size / 2;
+            clusterIconCache[key] = {
+                url: svgUrl(
+                    '<svg xmlns="http://www.w3.org/2000/svg" width="' + size + '" height="' + size + '">' +
+                    '<circle cx="' + half + '" cy="' + half + '" r="' + (half - 1) + '" fill="' + color + '" ' +
+                    'fill-opacity="0.85" stroke="#FFFFFF" stroke-width="2"/>' +
+                    '<text x="50%" y="50%" dy=".35em" text-anchor="middle" font-family="Arial, sans-serif" ' +
+                    'font-size="12" font-weight="bold" fill="#FFFFFF">' + count + '</text></svg>'
+                ),
+                anchor: new google.maps.Point(half, half)
+            };
+        }
+        return clusterIconCache[key];
+    }
+
+    // 카테고리 클러스터 색 (범례의 카테고리 색)
+    function clusterColor(category) {
+        var entry = state.legend.filter(function (item) { return item.name === category; })[0];
+        return entry ? (ICON_COLORS[entry.color] || entry.color) : '#1976D2';
+    }
+
+    // 타일 계산 (utils.tiles_in_bounds와 같은 식)
+    function tileLevel(zoom) {
+        var tiling = state.args.tiling;
+        return Math.min(Math.max(Math.round(zoom), tiling.min_level), tiling.max_level);
+    }
+
+    function tileSize(level) {
+        var tiling = state.args.tiling;
+        return tiling.tile_deg * Math.pow(2, tiling.base_zoom - level);
+    }
+
+    // 클러스터 레벨이면 레벨 번호, 개별 마커를 보여 줄 레벨이면 'M'
+    function levelKey(level) {
+        if (!state.args.stream || level > state.args.tiling.cluster_max_zoom) return 'M';
+        return String(level);
+    }
+
+    function layerKey(category, level) {
+        return category + '|' + level;
+    }
+
+    // (필터, 레벨) 레이어 (처음 쓸 때 만들고 지도에는 붙이지 않음)
+    function getLayer(key) {
+        if (!state.layers[key]) {
+            var data = new google.maps.Data();
+            data.setStyle(function (feature) {
+                return {
+                    icon: feature.getProperty('icon'),
+                    title: feature.getProperty('title'),
+                    zIndex: feature.getProperty('cluster') ? 1000 : 1
+                };
+            });
+            data.addListener('click', onFeatureClick);
+            state.layers[key] = { data: data, loadedTiles: {} };
+        }
+        return state.layers[key];
+    }
+
+    // 현재 필터/레벨의 레이어만 지도에 붙임 (마커 수와 무관하게 레이어 두 개만 바꿈)
+    function showActiveLayer() {
+        var key = layerKey(state.category, levelKey(state.level));
+        if (key === state.activeLayer) return;
+        if (state.activeLayer && state.layers[state.activeLayer]) {
+            state.layers[state.activeLayer].data.setMap(null);
+        }
+        getLayer(key).data.setMap(state.map);
+        state.activeLayer = key;
+    }
+
+    function visibleTiles(layer) {
+        var bounds = state.map.getBounds();
+        if (!bounds) return [];
+        var level = tileLevel(state.map.getZoom());
+        var size = tileSize(level);
+        var south = bounds.getSouthWest().lat(), west = bounds.getSouthWest().lng();
+        var north = bounds.getNorthEast().lat(), east = bounds.getNorthEast().lng();
+        var x0 = Math.floor(west / size) - 1, x1 = Math.floor(east / size) + 1;
+        var y0 = Math.floor(south / size) - 1, y1 = Math.floor(north / size) + 1;
+        var centerX = (west + east) / 2 / size, centerY = (south + north) / 2 / size;
+        var tiles = [];
+        for (var y = y0; y <= y1; y++) {
+            for (var x = x0; x <= x1; x++) {
+                var id = level + ':' + x + ':' + y;
+                if (!layer.loadedTiles[id]) {
+                    tiles.push({ id: id, distance: Math.pow(x + 0.5 - centerX, 2) + Math.pow(y + 0.5 - centerY, 2) });
+                }
+            }
+        }
+        tiles.sort(function (a, b) { return a.distance - b.distance; });
+        return tiles.slice(0, state.args.tiling.max_tiles).map(function (tile) { return tile.id; });
+    }
+
+    // 현재 필터 레이어에서 보이는 영역 중 아직 받지 않은 타일 요청
+    function requestVisibleTiles() {
+        if (!state.args.stream || state.version === null || !state.activeLayer) return;
+        var tiles = visibleTiles(getLayer(state.activeLayer));
+        if (!tiles.length) return;
+        state.requestCount += 1;
+        var request = state.requestPrefix + ':' + state.requestCount;
+        state.sentRequests[request] = true;
+        var bounds = state.map.getBounds();
+        setComponentValue({
+            type: 'viewport',
+            request: request,
+            version: state.version,
+            filter: state.category,
+            tiles: tiles,
+            zoom: state.map.getZoom(),
+            bounds: [bounds.getSouthWest().lat(), bounds.getSouthWest().lng(),
+                     bounds.getNorthEast().lat(), bounds.getNorthEast().lng()]
+        });
+    }
+
+    function markerFeature(data, i) {
+        return new google.maps.Data.Feature({
+            id: data.id[i],
+            geometry: new google.maps.Data.Point({ lat: data.lat[i], lng: data.lng[i] }),
+            properties: {
+                title: data.title[i],
+                category: data.categories[data.category[i]],
+                info: data.info[i],
+                icon: iconUrl(data.colors[data.color[i]])
+            }
+        });
+    }
+
+    function addFeature(layer, feature) {
+        if (!layer.data.getFeatureById(feature.getId())) layer.data.add(feature);
+    }
+
+    // 열 단위 마커/클러스터 데이터를 해당 (필터, 레벨) 레이어에 추가 (이미 있는 id는 건너뜀)
+    function addMarkers(data) {
+        var rows = {};
+        data.id.forEach(function (id, i) { rows[id] = i; });
+
+        (data.layers || []).forEach(function (entry) {
+            var key = String(entry[0]);
+            entry[1].forEach(function (id) {
+                var i = rows[id];
+                // 작은 목록(stream=false)은 전체 레이어와 자기 카테고리 레이어에 함께 넣음
+                var filters = data.filter ? [data.filter] : ['all', data.categories[data.category[i]]];
+                filters.forEach(function (filter) {
+                    addFeature(getLayer(layerKey(filter, key)), markerFeature(data, i));
+                });
+            });
+        });
+
+        var clusters = data.clusters;
+        if (clusters) {
+            var color = data.filter === 'all' ? '#1976D2' : clusterColor(data.filter);
+            for (var i = 0; i < clusters.id.length; i++) {
+                addFeature(getLayer(layerKey(data.filter, String(clusters.level[i]))), new google.maps.Data.Feature({
+                    id: clusters.id[i],
+                    geometry: new google.maps.Data.Point({ lat: clusters.lat[i], lng: clusters.lng[i] }),
+                    properties: {
+                        cluster: true,
+                        level: clusters.level[i],
+                        bbox: clusters.bbox[i],
+                        title: clusters.count[i] + '곳',
+                        icon: clusterIcon(clusters.count[i], color)
+                    }
+                }));
+            }
+        }
+
+        if (data.filter) {
+            (data.tiles || []).forEach(function (tile) {
+                var level = Number(tile.split(':')[0]);
+                getLayer(layerKey(data.filter, levelKey(level))).loadedTiles[tile] = true;
+            });
+        }
+    }
+
+    function removeMarkers(ids) {
+        for (var key in state.layers) {
+            var data = state.layers[key].data;
+            ids.forEach(function (id) {
+                var feature = data.getFeatureById(id);
+                if (feature) data.remove(feature);
+            });
+        }
+    }
+
+    function clearMarkers() {
+        for (var key in state.layers) state.layers[key].data.setMap(null);
+        state.layers = {};
+        state.activeLayer = null;
+        if (state.infoWindow) state.infoWindow.close();
+    }
+
+    function infoContent(title, category, info) {
+        return '<div class="info-window">' +
+            '<h3>' + escapeHtml(title) + '</h3>' +
+            '<p><strong>분류:</strong> ' + escapeHtml(category) + '</p>' +
+            '<div>' + info + '</div>' +
+            '</div>';
+    }
+
+    // 레이어 클릭: 클러스터는 경계로 확대, 마커는 정보창 표시 (레이어마다 리스너 하나)
+    function onFeatureClick(event) {
+        var feature = event.feature;
+        if (feature.getProperty('cluster')) {
+            var bbox = feature.getProperty('bbox');
+            if (bbox[0] === bbox[2] && bbox[1] === bbox[3]) {
+                state.map.setCenter({ lat: bbox[0], lng: bbox[1] });
+                state.map.setZoom(feature.getProperty('level') + 2);
+                return;
+            }
+            state.map.fitBounds(new google.maps.LatLngBounds(
+                { lat: bbox[0], lng: bbox[1] },
+                { lat: bbox[2], lng: bbox[3] }
+            ));
+            return;
+        }
+        if (state.currentMarker) state.currentMarker.setAnimation(null);
+        state.infoWindow.setContent(infoContent(feature.getProperty('title'), feature.getProperty('category'), feature.getProperty('info')));
+        state.infoWindow.setPosition(feature.getGeometry().get());
+        state.infoWindow.setOptions({ pixelOffset: new google.maps.Size(0, -30) });
+        state.infoWindow.open(state.map);
+    }
+
+    function attachInfoWindow(marker, title, category, info) {
+        marker.addListener('click', function () {
+            state.infoWindow.setContent(infoContent(title, category, info));
+            state.infoWindow.setOptions({ pixelOffset: null });
+            state.infoWindow.open(state.map, marker);
+
+            // 마커 바운스 애니메이션
+            if (state.currentMarker) state.currentMarker.setAnimation(null);
+            marker.setAnimation(google.maps.Animation.BOUNCE);
+            state.currentMarker = marker;
+            setTimeout(function () { marker.setAnimation(null); }, 1500);
+        });
+    }
+
+    // 현재 위치 등 타일과 무관하게 항상 표시하는 마커
+    function renderExtraMarkers(data) {
+        var key = JSON.stringify(data);
+        if (key === state.extraKey) return;
+        state.extraKey = key;
+        state.extraMarkers.forEach(function (marker) { marker.setMap(null); });
+        state.extraMarkers = [];
+        for (var i = 0; i < data.lat.length; i++) {
+            var category = data.categories[data.category[i]];
+            var marker = new google.maps.Marker({
+                position: { lat: data.lat[i], lng: data.lng[i] },
+                map: state.map,
+                title: data.title[i],
+                icon: iconUrl(data.colors[data.color[i]])
+            });
+            attachInfoWindow(marker, data.title[i], category, data.info[i]);
+            state.extraMarkers.push(marker);
+        }
+    }
+
+    // 카테고리 필터 버튼과 범례
+    function renderControls(categories) {
+        var key = JSON.stringify(categories);
+        if (key === state.controlsKey) return;
+        state.controlsKey = key;
+        state.legend = categories.legend;
+
+        var buttons = document.getElementById('filter-buttons');
+        buttons.innerHTML = '';
+        state.categoryBounds = {};
+        categories.filters.forEach(function (entry) {
+            var button = document.createElement('button');
+            button.className = 'filter-button';
+            button.id = 'filter-' + entry.name;
+            button.textContent = entry.name;
+            button.setAttribute('data-category', entry.name);
+            buttons.appendChild(button);
+            buttons.appendChild(document.createTextNode(' '));
+            if (entry.count > 1) state.categoryBounds[entry.name] = entry.bbox;
+        });
+
+        document.getElementById('legend-items').innerHTML = categories.legend.map(function (entry) {
+            return '<div class="legend-item"><img src="' + iconUrl(entry.color) + '" alt="' + escapeHtml(entry.name) + '"> ' +
+                escapeHtml(entry.name) + ' (' + entry.count + ')</div>';
+        }).join('');
+
+        if (state.category !== 'all' && !document.getElementById('filter-' + state.category)) {
+            filterMarkers('all');
+        }
+    }
+
+    function filterMarkers(category) {
+        state.category = category;
+        showActiveLayer();
+
+        // 선택한 카테고리 영역으로 이동 (영역이 그대로면 바로 새 레이어의 타일 요청)
+        var bounds = state.categoryBounds[category];
+        if (bounds) {
+            state.map.fitBounds(new google.maps.LatLngBounds(
+                { lat: bounds[0], lng: bounds[1] },
+                { lat: bounds[2], lng: bounds[3] }
+            ));
+        }
+        requestVisibleTiles();
+
+        document.querySelectorAll('.filter-button').forEach(function (button) {
+            button.classList.toggle('active', button.getAttribute('data-category') === category);
+        });
+    }
+
+    document.getElementById('category-filter').addEventListener('click', function (event) {
+        var category = event.target.getAttribute && event.target.getAttribute('data-category');
+        if (category) filterMarkers(category);
+    });
+
+    // 브라우저에 현재 위치를 물음 (force면 캐시된 위치를 쓰지 않고 지도를 그 위치로 이동)
+    function locate(force) {
+        if (!navigator.geolocation) {
+            if (force) alert('이 브라우저에서는 위치 정보 기능을 지원하지 않습니다.');
+            return;
+        }
+        if (state.locating) return;
+        state.locating = true;
+        var maxAge = !force && state.location ? state.location.max_age * 1000 : 0;
+        navigator.geolocation.getCurrentPosition(
+            function (position) {
+                state.locating = false;
+                var pos = { lat: position.coords.latitude, lng: position.coords.longitude };
+                if (force) {
+                    state.map.setCenter(pos);
+                    state.map.setZoom(15);
+                }
+                if (state.location) {
+                    reportLocation({
+                        lat: pos.lat,
+                        lng: pos.lng,
+                        accuracy: position.coords.accuracy,
+                        timestamp: position.timestamp / 1000
+                    });
+                } else {
+                    showLocationMarker(pos);
+                }
+            },
+            function () {
+                state.locating = false;
+                if (force) alert('위치 정보를 가져오는데 실패했습니다.');
+            },
+            { maximumAge: maxAge, timeout: 10000 }
+        );
+    }
+
+    // 받은 위치를 Python으로 보냄 (답을 기다리는 요청이 있으면 그 값에 실어 다시 보냄)
+    function reportLocation(fix) {
+        state.fix = fix;
+        var value = {};
+        for (var name in state.lastValue) value[name] = state.lastValue[name];
+        if (!state.lastValue) value.type = 'location';
+        setComponentValue(value);
+    }
+
+    // 위치를 추적하지 않는 지도는 받은 위치를 직접 표시
+    function showLocationMarker(pos) {
+        if (!state.locationMarker) {
+            state.locationMarker = new google.maps.Marker({
+                map: state.map,
+                title: '내 위치',
+                icon: {
+                    path: google.maps.SymbolPath.CIRCLE,
+                    fillColor: '#4285F4',
+                    fillOpacity: 1,
+                    strokeColor: '#FFFFFF',
+                    strokeWeight: 2,
+                    scale: 8
+                }
+            });
+        }
+        state.locationMarker.setPosition(pos);
+    }
+
+    // 마지막 위치가 오래되는 시점에 다시 묻도록 예약 (없거나 이미 오래되었으면 바로)
+    function scheduleLocate() {
+        clearTimeout(state.locateTimer);
+        if (!state.location) return;
+        var age = state.location.timestamp === null ? Infinity : Date.now() / 1000 - state.location.timestamp;
+        state.locateTimer = setTimeout(function () { locate(false); },
+                                       Math.max(0, state.location.max_age - age) * 1000);
+    }
+
+    function addLocationButton() {
+        var locationButton = document.createElement('button');
+        locationButton.textContent = '📍 내 위치';
+        locationButton.classList.add('custom-control');
+        locationButton.addEventListener('click', function () {
+            locate(true);
+        });
+        state.map.controls[google.maps.ControlPosition.TOP_RIGHT].push(locationButton);
+    }
+
+    function initMap() {
+        var args = state.args;
+        state.map = new google.maps.Map(document.getElementById('map'), {
+            center: { lat: args.center[0], lng: args.center[1] },
+            zoom: args.zoom,
+            fullscreenControl: true,
+            mapTypeControl: true,
+            streetViewControl: true,
+            zoomControl: true,
+            mapTypeId: 'roadmap'
+        });
+        state.infoWindow = new google.maps.InfoWindow();
+        addLocationButton();
+        state.map.controls[google.maps.ControlPosition.RIGHT_BOTTOM].push(document.getElementById('legend'));
+
+        state.map.addListener('click', function () {
+            state.infoWindow.close();
+            if (state.currentMarker) state.currentMarker.setAnimation(null);
+        });
+        // 이동/확대가 끝날 때마다 레벨에 맞는 레이어로 바꾸고 새로 보이는 타일 요청
+        state.map.addListener('idle', function () {
+            state.level = tileLevel(state.map.getZoom());
+            showActiveLayer();
+            requestVisibleTiles();
+        });
+    }
+
+    // 재동기화 요청 (같은 순번에 대해 한 번만)
+    function requestResync(seq) {
+        if (state.resyncSeq === seq) return;
+        state.resyncSeq = seq;
+        state.requestCount += 1;
+        setComponentValue({
+            type: 'resync',
+            request: state.requestPrefix + ':' + state.requestCount,
+            seq: state.seq
+        });
+    }
+
+    // 변경 연산 하나를 살아 있는 지도에 적용
+    function applyOp(op) {
+        switch (op.op) {
+            case 'reset':
+                // 마커 집합(카탈로그/언어)이 바뀌면 받은 마커를 모두 지우고 다시 받음
+                clearMarkers();
+                state.version = op.value;
+                state.sentRequests = {};
+                showActiveLayer();
+                break;
+            case 'controls':
+                renderControls(op.value);
+                break;
+            case 'extra':
+                renderExtraMarkers(op.value);
+                break;
+            case 'view':
+                state.map.panTo({ lat: op.value.center[0], lng: op.value.center[1] });
+                state.map.setZoom(op.value.zoom);
+                break;
+            case 'filter':
+                if (op.value) filterMarkers(op.value);
+                break;
+            case 'location':
+                state.location = op.value;
+                scheduleLocate();
+                break;
+            case 'markers':
+                // 타일 응답은 이 iframe이 보낸 요청일 때만 적용
+                if (op.request) {
+                    if (!state.sentRequests[op.request]) break;
+                    delete state.sentRequests[op.request];
+                }
+                addMarkers(op.value);
+                break;
+            case 'remove':
+                removeMarkers(op.value);
+                break;
+        }
+    }
+
+    // Python이 보낸 변경 연산 묶음 적용 (순번이 이어질 때만, 어긋나면 재동기화 요청)
+    function applySync(sync) {
+        if (sync.seq === state.seq) return;
+        var reset = sync.ops.length && sync.ops[0].op === 'reset';
+        if (!reset && !(sync.ops.length && sync.base === state.seq)) {
+            requestResync(sync.seq);
+            return;
+        }
+        sync.ops.forEach(applyOp);
+        state.seq = sync.seq;
+        if (reset && state.map.getBounds()) requestVisibleTiles();
+    }
+
+    function flushPending() {
+        var pending = state.pending;
+        state.pending = [];
+        pending.forEach(applySync);
+    }
+
+    function loadMapsApi(args) {
+        if (state.mapsRequested) return;
+        state.mapsRequested = true;
+        window.seoulMapReady = function () {
+            initMap();
+            state.level = tileLevel(state.map.getZoom());
+            flushPending();
+        };
+        var script = document.createElement('script');
+        script.src = 'https://maps.googleapis.com/maps/api/js?key=' + encodeURIComponent(args.api_key) +
+            '&callback=seoulMapReady&language=' + encodeURIComponent(args.language);
+        script.async = true;
+        document.head.appendChild(script);
+    }
+
+    window.addEventListener('message', function (event) {
+        if (!event.data || event.data.type !== 'streamlit:render') return;
+        state.args = event.data.args;
+        setFrameHeight(state.args.height);
+        // 지도 API를 받는 동안 온 변경 연산은 순서대로 모아 두었다가 적용
+        state.pending.push(state.args.sync);
+        if (!state.map) {
+            loadMapsApi(state.args);
+            return;
+        }
+        flushPending();
+    });
+
+    sendMessage('streamlit:componentReady', { apiVersion: 1 });
+})();
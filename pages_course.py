@@ -3,6 +3,7 @@ import random
 import time
 import utils
 
+@utils.profile_page("course")
 def show():
     """관광 코스 추천 페이지 표시"""
     utils.page_header("서울 관광 코스 짜주기")
@@ -89,39 +90,40 @@ def show():
                             # 데이터가 없을 경우 기본 코스 사용
                             all_markers = []
                 else:
-                    all_markers = st.session_state.all_markers
+                    all_markers = st.session_state.all_markers.with_language(st.session_state.language)
                 
                 # 기본 코스에서 추천
                 recommended_course = utils.RECOMMENDATION_COURSES.get(course_type, [])
                 
-                # 충분한 데이터가 있으면 실제 마커 데이터 사용
-                if all_markers and len(all_markers) > 10:
-                    # 카테고리별 장소 필터링
-                    filtered_markers = []
-                    if "역사/문화" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "역사" in m.get('category', '').lower() or "문화" in m.get('category', '').lower() or "미술관" in m.get('category', '').lower()])
-                    if "쇼핑" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "쇼핑" in m.get('category', '').lower() or "기념품" in m.get('category', '').lower()])
-                    if "맛집" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "음식" in m.get('category', '').lower() or "맛집" in m.get('category', '').lower()])
-                    if "자연" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "자연" in m.get('category', '').lower() or "공원" in m.get('category', '').lower()])
+                with utils.profile_phase("markers"):
+                    # 충분한 데이터가 있으면 실제 마커 데이터 사용
+                    if all_markers and len(all_markers) > 10:
+                        # 카테고리별 장소 필터링
+                        filtered_markers = []
+                        if "역사/문화" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "역사" in m.get('category', '').lower() or "문화" in m.get('category', '').lower() or "미술관" in m.get('category', '').lower()])
+                        if "쇼핑" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "쇼핑" in m.get('category', '').lower() or "기념품" in m.get('category', '').lower()])
+                        if "맛집" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "음식" in m.get('category', '').lower() or "맛집" in m.get('category', '').lower()])
+                        if "자연" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "자연" in m.get('category', '').lower() or "공원" in m.get('category', '').lower()])
                     
-                    # 중복 제거
-                    seen = set()
-                    filtered_markers = [m for m in filtered_markers if not (m['title'] in seen or seen.add(m['title']))]
+                        # 중복 제거
+                        seen = set()
+                        filtered_markers = [m for m in filtered_markers if not (m['title'] in seen or seen.add(m['title']))]
                     
-                    # 장소가 충분하면 사용, 그렇지 않으면 기본 코스에 추가
-                    if filtered_markers and len(filtered_markers) >= delta * 3:
-                        random.shuffle(filtered_markers)
-                        recommended_course = []
-                        for i in range(min(delta * 3, len(filtered_markers))):
-                            recommended_course.append(filtered_markers[i]['title'])
-                    elif filtered_markers:
-                        # 기본 코스에 필터링된 장소 추가
-                        for m in filtered_markers[:5]:
-                            if m['title'] not in recommended_course:
-                                recommended_course.append(m['title'])
+                        # 장소가 충분하면 사용, 그렇지 않으면 기본 코스에 추가
+                        if filtered_markers and len(filtered_markers) >= delta * 3:
+                            random.shuffle(filtered_markers)
+                            recommended_course = []
+                            for i in range(min(delta * 3, len(filtered_markers))):
+                                recommended_course.append(filtered_markers[i]['title'])
+                        elif filtered_markers:
+                            # 기본 코스에 필터링된 장소 추가
+                            for m in filtered_markers[:5]:
+                                if m['title'] not in recommended_course:
+                                    recommended_course.append(m['title'])
                 
                 st.success("코스 생성 완료!")
                 
@@ -198,7 +200,8 @@ def show():
                         markers=course_markers,
                         zoom=12,
                         height=500,
-                        language=st.session_state.language
+                        language=st.session_state.language,
+                        key="course_map"
                     )
                 else:
                     # 실제 좌표 데이터가 없는 경우
@@ -30,6 +30,7 @@ def display_visits(visits):
                         st.session_state.rating_place = visit['place_name']
                         st.session_state.rating_index = i
 
+@utils.profile_page("history")
 def show():
     """관광 이력 페이지 표시"""
     utils.page_header("나의 관광 이력")
@@ -59,13 +60,12 @@ def show():
     with col3:
         st.write("")  # 빈 공간
     
-    # 방문 통계
-    if username in st.session_state.user_visits and st.session_state.user_visits[username]:
-        visits = st.session_state.user_visits[username]
-        
-        total_visits = len(visits)
-        unique_places = len(set([v['place_name'] for v in visits]))
-        total_xp = sum([v.get('xp_gained', 0) for v in visits])
+    # 방문 통계 (저장소에서 이 사용자 것만 집계)
+    stats = utils.get_user_stats(username)
+    if stats["visits"]:
+        total_visits = stats["visits"]
+        unique_places = stats["places"]
+        total_xp = stats["visit_xp"]
         
         st.markdown("---")
         
@@ -84,6 +84,13 @@ def show():
         st.markdown("---")
         st.subheader("📝 방문 기록")
         
+        # 페이지 선택 (방문 기록은 한 페이지씩 읽음)
+        page_count = (total_visits - 1) // utils.HISTORY_PAGE_SIZE + 1
+        page = 0
+        if page_count > 1:
+            page = st.number_input(f"페이지 (총 {page_count}쪽)", min_value=1, max_value=page_count, value=1, step=1) - 1
+        visits = utils.get_user_visits(username, page)
+        
         # 정렬 옵션
         tab1, tab2, tab3 = st.tabs(["전체", "최근순", "경험치순"])
         
@@ -91,12 +98,10 @@ def show():
             display_visits(visits)
         
         with tab2:
-            recent_visits = sorted(visits, key=lambda x: x['timestamp'], reverse=True)
-            display_visits(recent_visits)
+            display_visits(utils.get_user_visits(username, page, "recent"))
         
         with tab3:
-            xp_visits = sorted(visits, key=lambda x: x.get('xp_gained', 0), reverse=True)
-            display_visits(xp_visits)
+            display_visits(utils.get_user_visits(username, page, "xp"))
         
         # 방문한 장소를 지도에 표시
         st.markdown("---")
@@ -110,18 +115,19 @@ def show():
             if api_key:
                 st.session_state.google_maps_api_key = api_key
         
-        # 방문 장소 마커 생성
-        visit_markers = []
-        for visit in visits:
-            marker = {
-                'lat': visit["latitude"],
-                'lng': visit["longitude"],
-                'title': visit["place_name"],
-                'color': 'purple',  # 방문한 장소는 보라색으로 표시
-                'info': f"방문일: {visit['date']}<br>획득 XP: +{visit.get('xp_gained', 0)}",
-                'category': '방문한 장소'
-            }
-            visit_markers.append(marker)
+        # 방문 장소 마커 생성 (페이지와 관계없이 모든 방문, 좌표 등 필요한 필드만 읽음)
+        with utils.profile_phase("markers"):
+            visit_markers = []
+            for visit in utils.get_user_visit_points(username):
+                marker = {
+                    'lat': visit["latitude"],
+                    'lng': visit["longitude"],
+                    'title': visit["place_name"],
+                    'color': 'purple',  # 방문한 장소는 보라색으로 표시
+                    'info': f"방문일: {visit['date']}<br>획득 XP: +{visit.get('xp_gained', 0)}",
+                    'category': '방문한 장소'
+                }
+                visit_markers.append(marker)
         
         if visit_markers:
             # 지도 중심 좌표 계산 (마커들의 평균)
@@ -136,7 +142,8 @@ def show():
                 markers=visit_markers,
                 zoom=12,
                 height=500,
-                language=st.session_state.language
+                language=st.session_state.language,
+                key="history_map"
             )
         else:
             st.info("지도에 표시할 방문 기록이 없습니다.")
@@ -183,6 +190,7 @@ def show():
             if username not in st.session_state.user_xp:
                 st.session_state.user_xp[username] = 0
             st.session_state.user_xp[username] += total_xp
+            utils.save_session_data(username)
             
             st.success(f"예시 데이터가 생성되었습니다! +{total_xp} XP 획득!")
             st.rerun()
@@ -1,6 +1,7 @@
 import streamlit as st
 import utils
 
+@utils.profile_page("login")
 def show():
     """로그인 페이지 표시"""
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -1,8 +1,8 @@
 import streamlit as st
 import time
-from geopy.distance import geodesic
 import utils
 
+@utils.profile_page("map")
 def show():
     """지도 페이지 표시"""
     utils.page_header("서울 관광 장소 지도")
@@ -39,6 +39,9 @@ def show():
             "🇨🇳 中文": "중국어"
         }
         st.session_state.language = language_map[selected_language]
+        # 로드된 마커는 모든 언어를 담고 있으므로 언어 전환 시 파일을 다시 읽지 않는다
+        if st.session_state.get('all_markers'):
+            st.session_state.all_markers = st.session_state.all_markers.with_language(st.session_state.language)
     
     # 사용자 위치 가져오기
     user_location = utils.get_location_position()
@@ -76,30 +79,31 @@ def show():
         map_col, info_col = st.columns([2, 1])
         
         with map_col:
-            # 마커 데이터 준비
-            markers = []
-            
-            # 사용자 현재 위치 마커
-            markers.append({
+            # 사용자 현재 위치 마커 (타일과 관계없이 항상 표시)
+            user_marker = {
                 'lat': user_location[0],
                 'lng': user_location[1],
                 'title': '내 위치',
                 'color': 'blue',
                 'info': '현재 위치',
                 'category': '현재 위치'
-            })
+            }
             
-            # 로드된 데이터 마커 추가
+            # 로드된 데이터 마커
+            catalog = None
             if hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
-                markers.extend(st.session_state.all_markers)
+                catalog = st.session_state.all_markers
                 st.success(f"지도에 {len(st.session_state.all_markers)}개의 장소를 표시했습니다.")
             
-            # Google Maps 표시
-            utils.show_google_map(
+            # Google Maps 표시 (보이는 영역의 마커만 먼저 보내고, 지도를 움직이면 타일 단위로 추가 전송,
+            # 재실행 시에는 지도를 다시 만들지 않고 바뀐 부분만 전송,
+            # 검색 결과에서 "지도에서 보기"로 선택한 장소가 있으면 그 위치로 한 번 이동)
+            utils.show_streaming_map(
                 api_key=api_key,
                 center_lat=user_location[0],
                 center_lng=user_location[1],
-                markers=markers,
+                markers=catalog,
+                extra_markers=[user_marker],
                 zoom=12,
                 height=600,
                 language=st.session_state.language
@@ -111,17 +115,17 @@ def show():
             # 검색 기능
             search_term = st.text_input("장소 검색")
             if search_term and hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
-                search_results = [m for m in st.session_state.all_markers 
-                                 if search_term.lower() in m['title'].lower()]
+                # 이름/주소 검색 인덱스 사용 (모든 언어, 초성 검색 지원)
+                result_count, search_results = utils.search_places(st.session_state.all_markers, search_term, limit=5)
                 
                 if search_results:
-                    st.markdown(f"### 🔍 검색 결과 ({len(search_results)}개)")
-                    for i, marker in enumerate(search_results[:5]):  # 상위 5개만
+                    st.markdown(f"### 🔍 검색 결과 ({result_count}개)")
+                    for i, marker in enumerate(search_results):  # 상위 5개만
                         with st.container():
                             st.markdown(f"**{marker['title']}**")
                             st.caption(f"분류: {marker.get('category', '기타')}")
                             
-                            col1, col2 = st.columns([1,1])
+                            col1, col2, col3 = st.columns([1,1,1])
                             with col1:
                                 if st.button(f"길찾기", key=f"nav_{i}"):
                                     st.session_state.navigation_active = True
@@ -133,6 +137,15 @@ def show():
                                     st.rerun()
                             
                             with col2:
+                                if st.button("지도에서 보기", key=f"focus_{i}"):
+                                    st.session_state.clicked_location = {
+                                        "name": marker['title'],
+                                        "lat": marker['lat'],
+                                        "lng": marker['lng']
+                                    }
+                                    st.rerun()
+                            
+                            with col3:
                                 if st.button(f"방문기록", key=f"visit_{i}"):
                                     success, xp = utils.add_visit(
                                         st.session_state.username,
@@ -149,18 +162,39 @@ def show():
                 else:
                     st.info(f"'{search_term}'에 대한 검색 결과가 없습니다.")
             
+            # 주변 장소 (현재 위치 기준, 공간 인덱스 사용)
+            if hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
+                st.subheader("📍 주변 장소")
+                nearby_places = utils.find_nearby_places(
+                    st.session_state.all_markers,
+                    user_location[0],
+                    user_location[1]
+                )
+                
+                if nearby_places:
+                    for i, (marker, distance) in enumerate(nearby_places):
+                        col1, col2 = st.columns([3, 1])
+                        with col1:
+                            st.markdown(f"**{marker['title']}**")
+                            st.caption(f"분류: {marker.get('category', '기타')} · {distance:.0f}m")
+                        with col2:
+                            if st.button("길찾기", key=f"nearby_nav_{i}"):
+                                st.session_state.navigation_active = True
+                                st.session_state.navigation_destination = {
+                                    "name": marker['title'],
+                                    "lat": marker['lat'],
+                                    "lng": marker['lng']
+                                }
+                                st.rerun()
+                else:
+                    st.info(f"반경 {utils.NEARBY_RADIUS_M}m 안에 등록된 장소가 없습니다.")
+            
             # 카테고리별 통계
             if hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
                 st.subheader("카테고리별 장소")
-                categories = {}
-                for m in st.session_state.all_markers:
-                    cat = m.get('category', '기타')
-                    if cat not in categories:
-                        categories[cat] = 0
-                    categories[cat] += 1
-                
-                for cat, count in categories.items():
-                    st.markdown(f"- **{cat}**: {count}개")
+                # 카탈로그 로드 시 캐시된 집계 사용
+                for cat, stats in st.session_state.all_markers.category_stats().items():
+                    st.markdown(f"- **{cat}**: {stats['count']}개")
     else:
         # 내비게이션 모드 UI
         destination = st.session_state.navigation_destination
@@ -177,7 +211,7 @@ def show():
             user_lat, user_lng = user_location
             
             # 직선 거리 계산
-            distance = geodesic((user_lat, user_lng), (dest_lat, dest_lng)).meters
+            distance = utils.distance_m(user_lat, user_lng, dest_lat, dest_lng)
             
             if not st.session_state.transport_mode:
                 st.markdown("### 이동 수단 선택")
@@ -281,7 +315,10 @@ def show():
                         markers=markers,
                         zoom=14,
                         height=600,
-                        language=st.session_state.language
+                        language=st.session_state.language,
+                        key="navigation_map",
+                        track_location=True,
+                        view_request=(destination["name"], dest_lat, dest_lng)  # 목적지가 바뀔 때만 지도 이동
                     )
                 
                 with info_col:
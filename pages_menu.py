@@ -1,6 +1,7 @@
 import streamlit as st
 import utils
 
+@utils.profile_page("menu")
 def show():
     """메인 메뉴 페이지 표시"""
     utils.page_header("서울 관광앱")
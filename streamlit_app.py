@@ -6,7 +6,7 @@ import time
 import random
 from datetime import datetime
 from pathlib import Path
-from geopy.distance import geodesic
+import utils
 
 # 페이지 설정
 st.set_page_config(
@@ -43,8 +43,8 @@ FILE_CATEGORIES = {
     "종로구 관광지": ["종로구", "관광데이터"]
 }
 
-# 세션 데이터 저장 파일
-SESSION_DATA_FILE = "data/session_data.json"
+# 세션 데이터 저장 파일 (utils.SESSION_STORE_BACKEND 저장소 사용)
+SESSION_DATA_FILE = utils.SESSION_DATA_FILE
 
 # 경험치 설정
 XP_PER_LEVEL = 200
@@ -160,33 +160,12 @@ def change_page(page):
         st.session_state.transport_mode = None
 
 def authenticate_user(username, password):
-    """사용자 인증 함수"""
-    if "users" not in st.session_state:
-        return False
-    
-    return username in st.session_state.users and st.session_state.users[username] == password
+    """사용자 인증 함수 (utils.authenticate_user 사용)"""
+    return utils.authenticate_user(username, password)
 
 def register_user(username, password):
-    """사용자 등록 함수"""
-    if "users" not in st.session_state:
-        st.session_state.users = {"admin": "admin"}
-    
-    if username in st.session_state.users:
-        return False
-    
-    st.session_state.users[username] = password
-    
-    # 신규 사용자 데이터 초기화
-    if "user_xp" not in st.session_state:
-        st.session_state.user_xp = {}
-    st.session_state.user_xp[username] = 0
-    
-    if "user_visits" not in st.session_state:
-        st.session_state.user_visits = {}
-    st.session_state.user_visits[username] = []
-    
-    save_session_data()
-    return True
+    """사용자 등록 함수 (utils.register_user 사용)"""
+    return utils.register_user(username, password)
 
 def logout_user():
     """로그아웃 함수"""
@@ -204,9 +183,9 @@ def init_session_state():
     if "current_page" not in st.session_state:
         st.session_state.current_page = "login"
         
-    # 사용자 데이터
+    # 사용자 데이터 (로그인한 사용자 것만, load_session_data가 채움)
     if "users" not in st.session_state:
-        st.session_state.users = {"admin": "admin"}  # 기본 관리자 계정
+        st.session_state.users = {}
     if "user_xp" not in st.session_state:
         st.session_state.user_xp = {}
     if "user_visits" not in st.session_state:
@@ -232,42 +211,19 @@ def init_session_state():
         except:
             st.session_state.google_maps_api_key = ""
     
+    # 지난 실행에서 그리지 않은 지도의 동기화 상태 정리
+    utils.forget_unrendered_maps()
+    
     # 저장된 세션 데이터 로드
     load_session_data()
 
 def load_session_data():
-    """저장된 세션 데이터 로드"""
-    try:
-        if os.path.exists(SESSION_DATA_FILE):
-            with open(SESSION_DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # 데이터 복원
-                st.session_state.users = data.get("users", {"admin": "admin"})
-                st.session_state.user_visits = data.get("user_visits", {})
-                st.session_state.user_xp = data.get("user_xp", {})
-                return True
-    except Exception as e:
-        print(f"세션 데이터 로드 오류: {e}")
-    return False
+    """저장된 세션 데이터 로드 (utils.load_session_data 사용)"""
+    return utils.load_session_data()
 
-def save_session_data():
-    """세션 데이터 저장"""
-    try:
-        # 데이터 폴더 생성
-        os.makedirs(os.path.dirname(SESSION_DATA_FILE), exist_ok=True)
-        
-        data = {
-            "users": st.session_state.users,
-            "user_visits": st.session_state.user_visits,
-            "user_xp": st.session_state.user_xp
-        }
-        
-        with open(SESSION_DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        print(f"세션 데이터 저장 오류: {e}")
-        return False
+def save_session_data(username=None):
+    """세션 데이터 저장 (utils.save_session_data 사용)"""
+    return utils.save_session_data(username)
 
 def calculate_level(xp):
     """레벨 계산 함수"""
@@ -285,534 +241,25 @@ def calculate_xp_percentage(xp):
     return int((xp_in_current_level / xp_needed_for_next) * 100)
 
 def add_visit(username, place_name, lat, lng):
-    """방문 기록 추가"""
-    if username not in st.session_state.user_visits:
-        st.session_state.user_visits[username] = []
-    
-    # XP 획득
-    if username not in st.session_state.user_xp:
-        st.session_state.user_xp[username] = 0
-    
-    xp_gained = PLACE_XP.get(place_name, 10)  # 기본 10XP, 장소별로 다른 XP
-    st.session_state.user_xp[username] += xp_gained
-    
-    # 방문 데이터 생성
-    visit_data = {
-        "place_name": place_name,
-        "latitude": lat,
-        "longitude": lng,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "date": datetime.now().strftime("%Y-%m-%d"),
-        "xp_gained": xp_gained,
-        "rating": None
-    }
-    
-    # 중복 방문 검사 (같은 날, 같은 장소)
-    is_duplicate = False
-    for visit in st.session_state.user_visits[username]:
-        if (visit["place_name"] == place_name and 
-            visit["date"] == visit_data["date"]):
-            is_duplicate = True
-            break
-    
-    if not is_duplicate:
-        st.session_state.user_visits[username].append(visit_data)
-        save_session_data()  # 방문 기록 저장
-        return True, xp_gained
-    return False, 0
+    """방문 기록 추가 (utils.add_visit 사용)"""
+    return utils.add_visit(username, place_name, lat, lng)
 
 def get_location_position():
-    """사용자의 현재 위치를 반환"""
-    try:
-        from streamlit_js_eval import get_geolocation
-        
-        location = get_geolocation()
-        if location and "coords" in location:
-            return [location["coords"]["latitude"], location["coords"]["longitude"]]
-    except Exception as e:
-        st.warning(f"위치 정보를 가져올 수 없습니다: {e}")
-        
-    return DEFAULT_LOCATION  # 기본 위치 (서울시청)
+    """사용자의 마지막 위치를 반환 (utils.get_location_position 사용, 브라우저 응답을 기다리지 않음)"""
+    return utils.get_location_position()
 
-def load_excel_files(language="한국어"):
-    """데이터 폴더에서 모든 Excel 파일 로드"""
-    data_folder = Path("data")
-    all_markers = []
-    
-    if not data_folder.exists():
-        st.warning("데이터 폴더가 존재하지 않습니다.")
-        return []
-        
-    # 모든 Excel 파일 찾기
-    excel_files = list(data_folder.glob("*.xlsx"))
-    
-    if not excel_files:
-        st.warning("데이터 폴더에 Excel 파일이 없습니다.")
-        return []
-    
-    for file_path in excel_files:
-        try:
-            # 파일 카테고리 결정
-            file_category = "기타"
-            file_name = file_path.name.lower()
-            
-            for category, keywords in FILE_CATEGORIES.items():
-                if any(keyword.lower() in file_name for keyword in keywords):
-                    file_category = category
-                    break
-            
-            # 파일 로드
-            df = pd.read_excel(file_path, engine='openpyxl')
-            
-            # 데이터 전처리 및 마커 변환
-            markers = process_dataframe(df, file_category, language)
-            all_markers.extend(markers)
-            
-            st.success(f"{file_path.name}: {len(markers)}개 마커 로드")
-        
-        except Exception as e:
-            st.error(f"{file_path.name} 처리 오류: {str(e)}")
-    
-    return all_markers
+def load_excel_files(language="한국어", parallel=None):
+    """데이터 폴더에서 모든 Excel 파일 로드 (변경되지 않은 파일은 카탈로그 캐시 사용)"""
+    return utils.load_excel_files(language, parallel=parallel)
 
 def process_dataframe(df, category, language="한국어"):
-    """데이터프레임을 Google Maps 마커 형식으로 변환"""
-    markers = []
-    
-    # 필수 열 확인: X좌표, Y좌표
-    if 'X좌표' not in df.columns or 'Y좌표' not in df.columns:
-        # 중국어 데이터의 경우 열 이름이 다를 수 있음
-        if 'X坐标' in df.columns and 'Y坐标' in df.columns:
-            df['X좌표'] = df['X坐标']
-            df['Y좌표'] = df['Y坐标']
-        else:
-            st.warning(f"'{category}' 데이터에 좌표 열이 없습니다.")
-            return []
-    
-    # 언어별 열 이름 결정
-    name_col = '명칭(한국어)'
-    if language == "영어" and '명칭(영어)' in df.columns:
-        name_col = '명칭(영어)'
-    elif language == "중국어" and '명칭(중국어)' in df.columns:
-        name_col = '명칭(중국어)'
-    
-    # 중국어 종로구 데이터 특별 처리
-    if category == "종로구 관광지" and language == "중국어":
-        if '名称' in df.columns:
-            name_col = '名称'
-    
-    # 주소 열 결정
-    address_col = None
-    address_candidates = ['주소(한국어)', '주소', '소재지', '도로명주소', '지번주소']
-    if language == "영어":
-        address_candidates = ['주소(영어)'] + address_candidates
-    elif language == "중국어":
-        address_candidates = ['주소(중국어)', '地址'] + address_candidates
-    
-    for col in address_candidates:
-        if col in df.columns:
-            address_col = col
-            break
-    
-    # 유효한 좌표 데이터만 사용
-    df = df.dropna(subset=['X좌표', 'Y좌표'])
-    valid_coords = (df['X좌표'] >= 124) & (df['X좌표'] <= 132) & (df['Y좌표'] >= 33) & (df['Y좌표'] <= 43)
-    df = df[valid_coords]
-    
-    # 마커 색상 결정
-    color = CATEGORY_COLORS.get(category, "gray")
-    
-    # 각 행을 마커로 변환
-    for _, row in df.iterrows():
-        try:
-            # 기본 정보
-            name = row[name_col] if name_col in row and pd.notna(row[name_col]) else "이름 없음"
-            lat = float(row['Y좌표'])
-            lng = float(row['X좌표'])
-            
-            # 주소 정보
-            address = ""
-            if address_col and address_col in row and pd.notna(row[address_col]):
-                address = row[address_col]
-            
-            # 추가 정보 (있는 경우)
-            info = ""
-            if address:
-                info += f"주소: {address}<br>"
-            
-            # 전화번호 (있는 경우)
-            for tel_col in ['전화번호', 'TELNO', '연락처']:
-                if tel_col in row and pd.notna(row[tel_col]):
-                    info += f"전화: {row[tel_col]}<br>"
-                    break
-            
-            # 마커 생성
-            marker = {
-                'lat': lat,
-                'lng': lng,
-                'title': name,
-                'color': color,
-                'category': category,
-                'info': info
-            }
-            markers.append(marker)
-            
-        except Exception as e:
-            print(f"마커 생성 오류: {e}")
-            continue
-    
-    return markers
+    """데이터프레임을 Google Maps 마커 형식으로 변환 (열 단위 벡터 연산)"""
+    return utils.process_dataframe(df, category, language)
 
-def create_google_maps_html(api_key, center_lat, center_lng, markers=None, zoom=13, language="ko"):
-    """Google Maps HTML 생성"""
-    if markers is None:
-        markers = []
-    
-    # 카테고리별 마커 그룹화
-    categories = {}
-    for marker in markers:
-        category = marker.get('category', '기타')
-        if category not in categories:
-            categories[category] = []
-        categories[category].append(marker)
-    
-    # 범례 HTML
-    legend_items = []
-    for category, color in CATEGORY_COLORS.items():
-        # 해당 카테고리의 마커가 있는 경우만 표시
-        if any(m.get('category') == category for m in markers):
-            count = sum(1 for m in markers if m.get('category') == category)
-            legend_items.append(f'<div class="legend-item"><img src="http://maps.google.com/mapfiles/ms/icons/{color}-dot.png" alt="{category}"> {category} ({count})</div>')
-    
-    legend_html = "".join(legend_items)
-    
-    # 마커 JavaScript 코드 생성
-    markers_js = ""
-    for i, marker in enumerate(markers):
-        color = marker.get('color', 'red')
-        title = marker.get('title', '').replace("'", "\\'").replace('"', '\\"')
-        info = marker.get('info', '').replace("'", "\\'").replace('"', '\\"')
-        category = marker.get('category', '').replace("'", "\\'").replace('"', '\\"')
-        
-        # 마커 아이콘 URL
-        icon_url = f"http://maps.google.com/mapfiles/ms/icons/{color}-dot.png"
-        
-        # 정보창 HTML 내용
-        info_content = f"""
-            <div style="padding: 10px; max-width: 300px;">
-                <h3 style="margin-top: 0; color: #1976D2;">{title}</h3>
-                <p><strong>분류:</strong> {category}</p>
-                <div>{info}</div>
-            </div>
-        """
-        
-        # 마커 생성 코드
-        markers_js += f"""
-            var marker{i} = new google.maps.Marker({{
-                position: {{ lat: {marker['lat']}, lng: {marker['lng']} }},
-                map: map,
-                title: '{title}',
-                icon: '{icon_url}',
-                animation: google.maps.Animation.DROP
-            }});
-            
-            markers.push(marker{i});
-            markerCategories.push('{category}');
-            
-            var infowindow{i} = new google.maps.InfoWindow({{
-                content: '{info_content}'
-            }});
-            
-            marker{i}.addListener('click', function() {{
-                closeAllInfoWindows();
-                infowindow{i}.open(map, marker{i});
-                
-                // 마커 바운스 애니메이션
-                if (currentMarker) currentMarker.setAnimation(null);
-                marker{i}.setAnimation(google.maps.Animation.BOUNCE);
-                currentMarker = marker{i};
-                
-                // 애니메이션 종료
-                setTimeout(function() {{
-                    marker{i}.setAnimation(null);
-                }}, 1500);
-                
-                // 부모 창에 마커 클릭 이벤트 전달
-                window.parent.postMessage({{
-                    'type': 'marker_click',
-                    'id': {i},
-                    'title': '{title}',
-                    'lat': {marker['lat']},
-                    'lng': {marker['lng']},
-                    'category': '{category}'
-                }}, '*');
-            }});
-            
-            infoWindows.push(infowindow{i});
-        """
-    
-    # 필터링 함수
-    filter_js = """
-        function filterMarkers(category) {
-            for (var i = 0; i < markers.length; i++) {
-                if (category === 'all' || markerCategories[i] === category) {
-                    markers[i].setVisible(true);
-                } else {
-                    markers[i].setVisible(false);
-                }
-            }
-            
-            // 필터 버튼 활성화 상태 업데이트
-            document.querySelectorAll('.filter-button').forEach(function(btn) {
-                btn.classList.remove('active');
-            });
-            document.getElementById('filter-' + category).classList.add('active');
-        }
-    """
-    
-    # 마커 클러스터링 코드
-    clustering_js = """
-        // 마커 클러스터링
-        var markerCluster = new MarkerClusterer(map, markers, {
-            imagePath: 'https://developers.google.com/maps/documentation/javascript/examples/markerclusterer/m',
-            maxZoom: 15,
-            gridSize: 50
-        });
-    """
-    
-    # 전체 HTML 코드 생성
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>서울 관광 지도</title>
-        <meta charset="utf-8">
-        <style>
-            #map {{
-                height: 100%;
-                width: 100%;
-                margin: 0;
-                padding: 0;
-            }}
-            html, body {{
-                height: 100%;
-                margin: 0;
-                padding: 0;
-                font-family: 'Noto Sans KR', Arial, sans-serif;
-            }}
-            .map-controls {{
-                position: absolute;
-                top: 10px;
-                left: 10px;
-                z-index: 5;
-                background-color: white;
-                padding: 10px;
-                border-radius: 5px;
-                box-shadow: 0 2px 6px rgba(0,0,0,.3);
-                max-width: 90%;
-                overflow-x: auto;
-                white-space: nowrap;
-            }}
-            .filter-button {{
-                margin: 5px;
-                padding: 5px 10px;
-                background-color: #f8f9fa;
-                border: 1px solid #dadce0;
-                border-radius: 4px;
-                cursor: pointer;
-            }}
-            .filter-button:hover {{
-                background-color: #e8eaed;
-            }}
-            .filter-button.active {{
-                background-color: #1976D2;
-                color: white;
-            }}
-            #legend {{
-                font-family: 'Noto Sans KR', Arial, sans-serif;
-                background-color: white;
-                border: 1px solid #ccc;
-                border-radius: 5px;
-                bottom: 25px;
-                box-shadow: 0 2px 6px rgba(0,0,0,.3);
-                font-size: 12px;
-                padding: 10px;
-                position: absolute;
-                right: 10px;
-                z-index: 5;
-            }}
-            .legend-item {{
-                margin-bottom: 5px;
-                display: flex;
-                align-items: center;
-            }}
-            .legend-item img {{
-                width: 20px;
-                height: 20px;
-                margin-right: 5px;
-            }}
-            .custom-control {{
-                background-color: #fff;
-                border: 0;
-                border-radius: 2px;
-                box-shadow: 0 1px 4px -1px rgba(0, 0, 0, 0.3);
-                margin: 10px;
-                padding: 0 0.5em;
-                font: 400 18px Roboto, Arial, sans-serif;
-                overflow: hidden;
-                height: 40px;
-                cursor: pointer;
-            }}
-        </style>
-        <script src="https://developers.google.com/maps/documentation/javascript/examples/markerclusterer/markerclusterer.js"></script>
-    </head>
-    <body>
-        <div id="map"></div>
-        
-        <!-- 카테고리 필터 -->
-        <div class="map-controls" id="category-filter">
-            <div style="margin-bottom: 8px; font-weight: bold;">카테고리 필터</div>
-            <button id="filter-all" class="filter-button active" onclick="filterMarkers('all')">전체 보기</button>
-            {' '.join([f'<button id="filter-{cat}" class="filter-button" onclick="filterMarkers(\'{cat}\')">{cat}</button>' for cat in categories.keys()])}
-        </div>
-        
-        <!-- 지도 범례 -->
-        <div id="legend">
-            <div style="font-weight: bold; margin-bottom: 8px;">지도 범례</div>
-            {legend_html}
-        </div>
-        
-        <script>
-            // 지도 변수
-            var map;
-            var markers = [];
-            var markerCategories = [];
-            var infoWindows = [];
-            var currentMarker = null;
-            
-            // 모든 정보창 닫기
-            function closeAllInfoWindows() {
-                for (var i = 0; i < infoWindows.length; i++) {
-                    infoWindows[i].close();
-                }
-            }
-            
-            function initMap() {
-                // 지도 생성
-                map = new google.maps.Map(document.getElementById('map'), {
-                    center: { lat: ${center_lat}, lng: ${center_lng} },
-                    zoom: ${zoom},
-                    fullscreenControl: true,
-                    mapTypeControl: true,
-                    streetViewControl: true,
-                    zoomControl: true,
-                    mapTypeId: 'roadmap'
-                });
-                
-                // 현재 위치 버튼 추가
-                const locationButton = document.createElement("button");
-                locationButton.textContent = "📍 내 위치";
-                locationButton.classList.add("custom-control");
-                locationButton.addEventListener("click", () => {
-                    if (navigator.geolocation) {
-                        navigator.geolocation.getCurrentPosition(
-                            (position) => {
-                                const pos = {
-                                    lat: position.coords.latitude,
-                                    lng: position.coords.longitude,
-                                };
-                                
-                                // 부모 창에 현재 위치 전달
-                                window.parent.postMessage({
-                                    'type': 'current_location',
-                                    'lat': pos.lat,
-                                    'lng': pos.lng
-                                }, '*');
-                                
-                                map.setCenter(pos);
-                                map.setZoom(15);
-                                
-                                // 현재 위치 마커 추가
-                                new google.maps.Marker({
-                                    position: pos,
-                                    map: map,
-                                    title: '내 위치',
-                                    icon: {
-                                        path: google.maps.SymbolPath.CIRCLE,
-                                        fillColor: '#4285F4',
-                                        fillOpacity: 1,
-                                        strokeColor: '#FFFFFF',
-                                        strokeWeight: 2,
-                                        scale: 8
-                                    }
-                                });
-                            },
-                            () => {
-                                alert("위치 정보를 가져오는데 실패했습니다.");
-                            }
-                        );
-                    } else {
-                        alert("이 브라우저에서는 위치 정보 기능을 지원하지 않습니다.");
-                    }
-                });
-                
-                map.controls[google.maps.ControlPosition.TOP_RIGHT].push(locationButton);
-                
-                // 범례를 지도에 추가
-                map.controls[google.maps.ControlPosition.RIGHT_BOTTOM].push(
-                    document.getElementById('legend')
-                );
-                
-                // 마커 추가
-                ${markers_js}
-                
-                // 마커 클러스터링
-                ${clustering_js}
-                
-                // 필터링 함수
-                ${filter_js}
-                
-                // 지도 클릭 이벤트
-                map.addListener('click', function(event) {
-                    // 열린 정보창 닫기
-                    closeAllInfoWindows();
-                    
-                    // 바운스 애니메이션 중지
-                    if (currentMarker) currentMarker.setAnimation(null);
-                    
-                    // 클릭 이벤트 데이터 전달
-                    window.parent.postMessage({
-                        'type': 'map_click',
-                        'lat': event.latLng.lat(),
-                        'lng': event.latLng.lng()
-                    }, '*');
-                });
-            }
-        </script>
-        <script src="https://maps.googleapis.com/maps/api/js?key=${api_key}&callback=initMap&language=${language}" async defer></script>
-    </body>
-    </html>
-    """
-    
-    return html
-
-def show_google_map(api_key, center_lat, center_lng, markers=None, zoom=13, height=600, language="한국어"):
-    """Google Maps 컴포넌트 표시"""
-    # 언어 코드 변환
-    lang_code = LANGUAGE_CODES.get(language, "ko")
-    
-    # HTML 생성
-    map_html = create_google_maps_html(
-        api_key=api_key,
-        center_lat=center_lat,
-        center_lng=center_lng,
-        markers=markers,
-        zoom=zoom,
-        language=lang_code
-    )
-    
-    # HTML 컴포넌트로 표시
-    st.components.v1.html(map_html, height=height, scrolling=False)
+def show_google_map(api_key, center_lat, center_lng, markers=None, zoom=13, height=600, language="한국어", key="google_map", track_location=False, view_request=None):
+    """Google Maps 컴포넌트 표시 (utils.show_google_map 사용)"""
+    utils.show_google_map(api_key, center_lat, center_lng, markers=markers, zoom=zoom, height=height, language=language, key=key,
+                          track_location=track_location, view_request=view_request)
 
 def display_visits(visits):
     """방문 기록 표시 함수"""
@@ -845,6 +292,7 @@ def display_visits(visits):
 # 페이지 함수
 #################################################
 
+@utils.profile_page("login")
 def show_login_page():
     """로그인 페이지 표시"""
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -895,6 +343,7 @@ def show_login_page():
                 else:
                     st.warning("⚠️ 이미 존재하는 아이디입니다.")
 
+@utils.profile_page("menu")
 def show_menu_page():
     """메인 메뉴 페이지 표시"""
     page_header("서울 관광앱")
@@ -954,6 +403,7 @@ def show_menu_page():
         logout_user()
         st.rerun()
 
+@utils.profile_page("map")
 def show_map_page():
     """지도 페이지 표시"""
     page_header("서울 관광 장소 지도")
@@ -990,6 +440,9 @@ def show_map_page():
             "🇨🇳 中文": "중국어"
         }
         st.session_state.language = language_map[selected_language]
+        # 로드된 마커는 모든 언어를 담고 있으므로 언어 전환 시 파일을 다시 읽지 않는다
+        if st.session_state.get('all_markers'):
+            st.session_state.all_markers = st.session_state.all_markers.with_language(st.session_state.language)
     
     # 사용자 위치 가져오기
     user_location = get_location_position()
@@ -1027,30 +480,31 @@ def show_map_page():
         map_col, info_col = st.columns([2, 1])
         
         with map_col:
-            # 마커 데이터 준비
-            markers = []
-            
-            # 사용자 현재 위치 마커
-            markers.append({
+            # 사용자 현재 위치 마커 (타일과 관계없이 항상 표시)
+            user_marker = {
                 'lat': user_location[0],
                 'lng': user_location[1],
                 'title': '내 위치',
                 'color': 'blue',
                 'info': '현재 위치',
                 'category': '현재 위치'
-            })
+            }
             
-            # 로드된 데이터 마커 추가
+            # 로드된 데이터 마커
+            catalog = None
             if hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
-                markers.extend(st.session_state.all_markers)
+                catalog = st.session_state.all_markers
                 st.success(f"지도에 {len(st.session_state.all_markers)}개의 장소를 표시했습니다.")
             
-            # Google Maps 표시
-            show_google_map(
+            # Google Maps 표시 (보이는 영역의 마커만 먼저 보내고, 지도를 움직이면 타일 단위로 추가 전송,
+            # 재실행 시에는 지도를 다시 만들지 않고 바뀐 부분만 전송,
+            # 검색 결과에서 "지도에서 보기"로 선택한 장소가 있으면 그 위치로 한 번 이동)
+            utils.show_streaming_map(
                 api_key=api_key,
                 center_lat=user_location[0],
                 center_lng=user_location[1],
-                markers=markers,
+                markers=catalog,
+                extra_markers=[user_marker],
                 zoom=12,
                 height=600,
                 language=st.session_state.language
@@ -1062,17 +516,17 @@ def show_map_page():
             # 검색 기능
             search_term = st.text_input("장소 검색")
             if search_term and hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
-                search_results = [m for m in st.session_state.all_markers 
-                                 if search_term.lower() in m['title'].lower()]
+                # 이름/주소 검색 인덱스 사용 (모든 언어, 초성 검색 지원)
+                result_count, search_results = utils.search_places(st.session_state.all_markers, search_term, limit=5)
                 
                 if search_results:
-                    st.markdown(f"### 🔍 검색 결과 ({len(search_results)}개)")
-                    for i, marker in enumerate(search_results[:5]):  # 상위 5개만
+                    st.markdown(f"### 🔍 검색 결과 ({result_count}개)")
+                    for i, marker in enumerate(search_results):  # 상위 5개만
                         with st.container():
                             st.markdown(f"**{marker['title']}**")
                             st.caption(f"분류: {marker.get('category', '기타')}")
                             
-                            col1, col2 = st.columns([1,1])
+                            col1, col2, col3 = st.columns([1,1,1])
                             with col1:
                                 if st.button(f"길찾기", key=f"nav_{i}"):
                                     st.session_state.navigation_active = True
@@ -1084,6 +538,15 @@ def show_map_page():
                                     st.rerun()
                             
                             with col2:
+                                if st.button("지도에서 보기", key=f"focus_{i}"):
+                                    st.session_state.clicked_location = {
+                                        "name": marker['title'],
+                                        "lat": marker['lat'],
+                                        "lng": marker['lng']
+                                    }
+                                    st.rerun()
+                            
+                            with col3:
                                 if st.button(f"방문기록", key=f"visit_{i}"):
                                     success, xp = add_visit(
                                         st.session_state.username,
@@ -1100,18 +563,39 @@ def show_map_page():
                 else:
                     st.info(f"'{search_term}'에 대한 검색 결과가 없습니다.")
             
+            # 주변 장소 (현재 위치 기준, 공간 인덱스 사용)
+            if hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
+                st.subheader("📍 주변 장소")
+                nearby_places = utils.find_nearby_places(
+                    st.session_state.all_markers,
+                    user_location[0],
+                    user_location[1]
+                )
+                
+                if nearby_places:
+                    for i, (marker, distance) in enumerate(nearby_places):
+                        col1, col2 = st.columns([3, 1])
+                        with col1:
+                            st.markdown(f"**{marker['title']}**")
+                            st.caption(f"분류: {marker.get('category', '기타')} · {distance:.0f}m")
+                        with col2:
+                            if st.button("길찾기", key=f"nearby_nav_{i}"):
+                                st.session_state.navigation_active = True
+                                st.session_state.navigation_destination = {
+                                    "name": marker['title'],
+                                    "lat": marker['lat'],
+                                    "lng": marker['lng']
+                                }
+                                st.rerun()
+                else:
+                    st.info(f"반경 {utils.NEARBY_RADIUS_M}m 안에 등록된 장소가 없습니다.")
+            
             # 카테고리별 통계
             if hasattr(st.session_state, 'all_markers') and st.session_state.all_markers:
                 st.subheader("카테고리별 장소")
-                categories = {}
-                for m in st.session_state.all_markers:
-                    cat = m.get('category', '기타')
-                    if cat not in categories:
-                        categories[cat] = 0
-                    categories[cat] += 1
-                
-                for cat, count in categories.items():
-                    st.markdown(f"- **{cat}**: {count}개")
+                # 카탈로그 로드 시 캐시된 집계 사용
+                for cat, stats in st.session_state.all_markers.category_stats().items():
+                    st.markdown(f"- **{cat}**: {stats['count']}개")
     else:
         # 내비게이션 모드 UI
         destination = st.session_state.navigation_destination
@@ -1128,7 +612,7 @@ def show_map_page():
             user_lat, user_lng = user_location
             
             # 직선 거리 계산
-            distance = geodesic((user_lat, user_lng), (dest_lat, dest_lng)).meters
+            distance = utils.distance_m(user_lat, user_lng, dest_lat, dest_lng)
             
             if not st.session_state.transport_mode:
                 st.markdown("### 이동 수단 선택")
@@ -1232,7 +716,10 @@ def show_map_page():
                         markers=markers,
                         zoom=14,
                         height=600,
-                        language=st.session_state.language
+                        language=st.session_state.language,
+                        key="navigation_map",
+                        track_location=True,
+                        view_request=(destination["name"], dest_lat, dest_lng)  # 목적지가 바뀔 때만 지도 이동
                     )
                 
                 with info_col:
@@ -1285,6 +772,7 @@ def show_map_page():
                         st.session_state.transport_mode = None
                         st.rerun()
 
+@utils.profile_page("course")
 def show_course_page():
     """관광 코스 추천 페이지 표시"""
     page_header("서울 관광 코스 짜주기")
@@ -1371,39 +859,40 @@ def show_course_page():
                             # 데이터가 없을 경우 기본 코스 사용
                             all_markers = []
                 else:
-                    all_markers = st.session_state.all_markers
+                    all_markers = st.session_state.all_markers.with_language(st.session_state.language)
                 
                 # 기본 코스에서 추천
                 recommended_course = RECOMMENDATION_COURSES.get(course_type, [])
                 
-                # 충분한 데이터가 있으면 실제 마커 데이터 사용
-                if all_markers and len(all_markers) > 10:
-                    # 카테고리별 장소 필터링
-                    filtered_markers = []
-                    if "역사/문화" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "역사" in m.get('category', '').lower() or "문화" in m.get('category', '').lower() or "미술관" in m.get('category', '').lower()])
-                    if "쇼핑" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "쇼핑" in m.get('category', '').lower() or "기념품" in m.get('category', '').lower()])
-                    if "맛집" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "음식" in m.get('category', '').lower() or "맛집" in m.get('category', '').lower()])
-                    if "자연" in selected_styles:
-                        filtered_markers.extend([m for m in all_markers if "자연" in m.get('category', '').lower() or "공원" in m.get('category', '').lower()])
+                with utils.profile_phase("markers"):
+                    # 충분한 데이터가 있으면 실제 마커 데이터 사용
+                    if all_markers and len(all_markers) > 10:
+                        # 카테고리별 장소 필터링
+                        filtered_markers = []
+                        if "역사/문화" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "역사" in m.get('category', '').lower() or "문화" in m.get('category', '').lower() or "미술관" in m.get('category', '').lower()])
+                        if "쇼핑" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "쇼핑" in m.get('category', '').lower() or "기념품" in m.get('category', '').lower()])
+                        if "맛집" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "음식" in m.get('category', '').lower() or "맛집" in m.get('category', '').lower()])
+                        if "자연" in selected_styles:
+                            filtered_markers.extend([m for m in all_markers if "자연" in m.get('category', '').lower() or "공원" in m.get('category', '').lower()])
                     
-                    # 중복 제거
-                    seen = set()
-                    filtered_markers = [m for m in filtered_markers if not (m['title'] in seen or seen.add(m['title']))]
+                        # 중복 제거
+                        seen = set()
+                        filtered_markers = [m for m in filtered_markers if not (m['title'] in seen or seen.add(m['title']))]
                     
-                    # 장소가 충분하면 사용, 그렇지 않으면 기본 코스에 추가
-                    if filtered_markers and len(filtered_markers) >= delta * 3:
-                        random.shuffle(filtered_markers)
-                        recommended_course = []
-                        for i in range(min(delta * 3, len(filtered_markers))):
-                            recommended_course.append(filtered_markers[i]['title'])
-                    elif filtered_markers:
-                        # 기본 코스에 필터링된 장소 추가
-                        for m in filtered_markers[:5]:
-                            if m['title'] not in recommended_course:
-                                recommended_course.append(m['title'])
+                        # 장소가 충분하면 사용, 그렇지 않으면 기본 코스에 추가
+                        if filtered_markers and len(filtered_markers) >= delta * 3:
+                            random.shuffle(filtered_markers)
+                            recommended_course = []
+                            for i in range(min(delta * 3, len(filtered_markers))):
+                                recommended_course.append(filtered_markers[i]['title'])
+                        elif filtered_markers:
+                            # 기본 코스에 필터링된 장소 추가
+                            for m in filtered_markers[:5]:
+                                if m['title'] not in recommended_course:
+                                    recommended_course.append(m['title'])
                 
                 st.success("코스 생성 완료!")
                 
@@ -1480,7 +969,8 @@ def show_course_page():
                         markers=course_markers,
                         zoom=12,
                         height=500,
-                        language=st.session_state.language
+                        language=st.session_state.language,
+                        key="course_map"
                     )
                 else:
                     # 실제 좌표 데이터가 없는 경우
@@ -1500,6 +990,7 @@ def show_course_page():
                     
                     st.success("코스가 저장되었습니다!")
 
+@utils.profile_page("history")
 def show_history_page():
     """관광 이력 페이지 표시"""
     page_header("나의 관광 이력")
@@ -1529,13 +1020,12 @@ def show_history_page():
     with col3:
         st.write("")  # 빈 공간
     
-    # 방문 통계
-    if username in st.session_state.user_visits and st.session_state.user_visits[username]:
-        visits = st.session_state.user_visits[username]
-        
-        total_visits = len(visits)
-        unique_places = len(set([v['place_name'] for v in visits]))
-        total_xp = sum([v.get('xp_gained', 0) for v in visits])
+    # 방문 통계 (저장소에서 이 사용자 것만 집계)
+    stats = utils.get_user_stats(username)
+    if stats["visits"]:
+        total_visits = stats["visits"]
+        unique_places = stats["places"]
+        total_xp = stats["visit_xp"]
         
         st.markdown("---")
         
@@ -1554,6 +1044,13 @@ def show_history_page():
         st.markdown("---")
         st.subheader("📝 방문 기록")
         
+        # 페이지 선택 (방문 기록은 한 페이지씩 읽음)
+        page_count = (total_visits - 1) // utils.HISTORY_PAGE_SIZE + 1
+        page = 0
+        if page_count > 1:
+            page = st.number_input(f"페이지 (총 {page_count}쪽)", min_value=1, max_value=page_count, value=1, step=1) - 1
+        visits = utils.get_user_visits(username, page)
+        
         # 정렬 옵션
         tab1, tab2, tab3 = st.tabs(["전체", "최근순", "경험치순"])
         
@@ -1561,12 +1058,10 @@ def show_history_page():
             display_visits(visits)
         
         with tab2:
-            recent_visits = sorted(visits, key=lambda x: x['timestamp'], reverse=True)
-            display_visits(recent_visits)
+            display_visits(utils.get_user_visits(username, page, "recent"))
         
         with tab3:
-            xp_visits = sorted(visits, key=lambda x: x.get('xp_gained', 0), reverse=True)
-            display_visits(xp_visits)
+            display_visits(utils.get_user_visits(username, page, "xp"))
         
         # 방문한 장소를 지도에 표시
         st.markdown("---")
@@ -1580,18 +1075,19 @@ def show_history_page():
             if api_key:
                 st.session_state.google_maps_api_key = api_key
         
-        # 방문 장소 마커 생성
-        visit_markers = []
-        for visit in visits:
-            marker = {
-                'lat': visit["latitude"],
-                'lng': visit["longitude"],
-                'title': visit["place_name"],
-                'color': 'purple',  # 방문한 장소는 보라색으로 표시
-                'info': f"방문일: {visit['date']}<br>획득 XP: +{visit.get('xp_gained', 0)}",
-                'category': '방문한 장소'
-            }
-            visit_markers.append(marker)
+        # 방문 장소 마커 생성 (페이지와 관계없이 모든 방문, 좌표 등 필요한 필드만 읽음)
+        with utils.profile_phase("markers"):
+            visit_markers = []
+            for visit in utils.get_user_visit_points(username):
+                marker = {
+                    'lat': visit["latitude"],
+                    'lng': visit["longitude"],
+                    'title': visit["place_name"],
+                    'color': 'purple',  # 방문한 장소는 보라색으로 표시
+                    'info': f"방문일: {visit['date']}<br>획득 XP: +{visit.get('xp_gained', 0)}",
+                    'category': '방문한 장소'
+                }
+                visit_markers.append(marker)
         
         if visit_markers:
             # 지도 중심 좌표 계산 (마커들의 평균)
@@ -1606,7 +1102,8 @@ def show_history_page():
                 markers=visit_markers,
                 zoom=12,
                 height=500,
-                language=st.session_state.language
+                language=st.session_state.language,
+                key="history_map"
             )
         else:
             st.info("지도에 표시할 방문 기록이 없습니다.")
@@ -1653,6 +1150,7 @@ def show_history_page():
             if username not in st.session_state.user_xp:
                 st.session_state.user_xp[username] = 0
             st.session_state.user_xp[username] += total_xp
+            save_session_data(username)
             
             st.success(f"예시 데이터가 생성되었습니다! +{total_xp} XP 획득!")
             st.rerun()
@@ -1691,6 +1189,9 @@ def main():
         show_history_page()
     else:
         show_menu_page()  # 기본값
+    
+    # 관리자에게만 페이지 단계별 렌더링 시간 표시
+    utils.show_profile_panel()
 
 if __name__ == "__main__":
     main()
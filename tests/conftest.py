@@ -0,0 +1,32 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# 저장소 최상위의 utils.py를 가져올 수 있도록
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class FakeSessionState(dict):
+    """st.session_state 대용 (속성/키 접근 모두 지원)"""
+    
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+    
+    def __setattr__(self, name, value):
+        self[name] = value
+    
+    def __delattr__(self, name):
+        del self[name]
+
+@pytest.fixture
+def session_state(monkeypatch):
+    """utils.st.session_state를 실행마다 유지되는 dict로 바꿈 (Streamlit 런타임 없이)"""
+    import utils
+    
+    state = FakeSessionState()
+    monkeypatch.setattr(utils, "st", types.SimpleNamespace(session_state=state))
+    return state
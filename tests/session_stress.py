@@ -0,0 +1,91 @@
+"""세션 저장소 동시 쓰기 스트레스 테스트 도구 (tests/test_session_store.py에서 사용)"""
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import utils
+
+# 모든 작업자가 똑같이 추가하려는 방문 기록 수 (한 번씩만 인정되어야 함)
+CONTENDED_VISITS = 5
+
+def make_store(backend, folder):
+    """folder 안의 파일을 쓰는 backend 저장소 (저널은 압축이 자주 일어나도록 작게)"""
+    folder = Path(folder)
+    if backend == "json":
+        return utils.JsonSessionStore(folder / "session_data.json")
+    if backend == "journal":
+        return utils.JournalSessionStore(folder / "session_data.json", folder / "session_data.journal",
+                                         compact_bytes=4096, fsync_interval=0.01)
+    if backend == "sqlite":
+        return utils.SqliteSessionStore(folder / "session_data.db", legacy_json=None)
+    raise ValueError(f"알 수 없는 세션 저장소 백엔드: {backend}")
+
+def stress_writer(backend, folder, writer, visits):
+    """쓰기 작업자 하나: 저장소를 읽어 둔 뒤(앱 프로세스처럼) 모든 작업자가 같은 사용자
+    등록과 같은 방문 기록 추가를 한꺼번에 시도하고, 이어서 자기 사용자 등록, 방문 기록 추가,
+    몇 번에 한 번 자기 데이터 전체를 병합 저장 (save_session_data와 같은 경로),
+    공용 사용자에 방문 하나
+
+    반환값: (같은 사용자 등록에 성공했는지, 같은 방문 기록 추가에 성공한 수)
+    """
+    store = make_store(backend, folder)
+    store.load()
+    contended_user = store.add_user("contended", f"pw{writer}")
+    contended_visits = sum(
+        store.add_visit("contended", {"place_name": f"경쟁 장소 {i}", "latitude": 37.5, "longitude": 127.0,
+                                      "timestamp": "2024-01-01 00:00:00", "date": "2024-01-01", "xp_gained": 10, "rating": None})
+        for i in range(CONTENDED_VISITS)
+    )
+    username = f"writer{writer}"
+    users = {username: "pw"}
+    user_visits = {username: []}
+    store.add_user(username, "pw")
+    for i in range(visits):
+        visit = {"place_name": f"장소 {i}", "latitude": 37.5, "longitude": 127.0,
+                 "timestamp": f"2024-01-01 00:00:{i % 60:02d}", "date": "2024-01-01", "xp_gained": 10, "rating": None}
+        user_visits[username].append(visit)
+        store.add_visit(username, visit)
+        if i % 5 == 4:
+            store.apply_events(utils._session_events(users, user_visits, [username]))
+    store.add_visit("shared", {"place_name": f"작업자 {writer}", "latitude": 37.5, "longitude": 127.0,
+                               "timestamp": "2024-01-01 00:00:00", "date": "2024-01-01", "xp_gained": 10, "rating": None})
+    if hasattr(store, "close"):
+        store.close()
+    return contended_user, contended_visits
+
+def run_stress(backend=None, writers=50, visits=20, processes=True):
+    """동시 쓰기 스트레스 테스트: writers개 작업자(프로세스 또는 스레드)가 한 저장소에 동시에 쓴 뒤
+    방문 기록/경험치가 하나도 빠지지 않았는지, 모두가 시도한 같은 사용자 등록과
+    같은 방문 기록 추가가 한 번씩만 성공했는지 확인
+
+    반환값: {"backend", "writers", "visits", "seconds", "lost_visits", "wrong_xp",
+             "duplicate_grants", "wrong_password"}
+    duplicate_grants: 같은 등록/방문 추가가 성공했다고 답한 횟수 - 실제로 인정되어야 할 횟수
+    """
+    backend = backend or utils.SESSION_STORE_BACKEND
+    with tempfile.TemporaryDirectory() as folder:
+        store = make_store(backend, folder)
+        store.add_user("shared", "pw")
+        if hasattr(store, "close"):
+            store.close()
+        
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        started = time.perf_counter()
+        with executor(max_workers=writers) as pool:
+            results = [future.result() for future in
+                       [pool.submit(stress_writer, backend, folder, n, visits) for n in range(writers)]]
+        seconds = time.perf_counter() - started
+        
+        users, user_visits, user_xp = make_store(backend, folder).load()
+    
+    expected = {f"writer{n}": visits for n in range(writers)}
+    expected["shared"] = writers
+    expected["contended"] = CONTENDED_VISITS
+    lost = sum(max(0, count - len(user_visits.get(username, []))) for username, count in expected.items())
+    wrong_xp = [username for username, count in expected.items() if user_xp.get(username) != count * 10]
+    winners = [n for n, (won, _) in enumerate(results) if won]
+    duplicate_grants = (len(winners) - 1) + (sum(granted for _, granted in results) - expected["contended"])
+    return {"backend": backend, "writers": writers, "visits": visits, "seconds": seconds,
+            "lost_visits": lost, "wrong_xp": wrong_xp, "duplicate_grants": duplicate_grants,
+            "wrong_password": users.get("contended") != (f"pw{winners[0]}" if winners else None)}
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import utils
+
+CATEGORY_COUNT = 4
+
+def make_markers(n, seed=0):
+    """서울 범위의 합성 마커 좌표와 카테고리 코드 (절반은 한 곳에 몰림)"""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(37.42, 37.70, n)
+    lng = rng.uniform(126.76, 127.18, n)
+    dense = rng.random(n) < 0.5
+    lat[dense] = rng.normal(37.5665, 0.002, dense.sum())
+    lng[dense] = rng.normal(126.9780, 0.002, dense.sum())
+    return lat, lng, rng.integers(0, CATEGORY_COUNT, n)
+
+@pytest.mark.parametrize("by_category", [False, True])
+@pytest.mark.parametrize("n", [0, 1, 5, 100, 20000])
+def test_cluster_counts_sum_to_marker_count_at_every_zoom(n, by_category):
+    lat, lng, codes = make_markers(n)
+    pyramid = utils.ClusterPyramid(lat, lng, codes, CATEGORY_COUNT, by_category=by_category)
+    expected_by_category = np.bincount(codes, minlength=CATEGORY_COUNT)
+    
+    assert sorted(pyramid.levels) == list(range(utils.CLUSTER_MIN_ZOOM, utils.CLUSTER_MAX_ZOOM + 1))
+    previous = None
+    for zoom in sorted(pyramid.levels, reverse=True):
+        level = pyramid.levels[zoom]
+        assert level["count"].sum() == n
+        assert (level["count"] > 0).all()
+        assert level["category_counts"].sum(axis=1).tolist() == level["count"].tolist()
+        assert level["category_counts"].sum(axis=0).tolist() == expected_by_category.tolist()
+        # 한 단계 작은 줌은 클러스터를 합치기만 한다
+        if previous is not None:
+            assert len(level["count"]) <= previous
+        previous = len(level["count"])
+        
+        if by_category:
+            # 카테고리별 레이어: 클러스터마다 한 카테고리의 마커만 들어 있음
+            own = level["category_counts"][np.arange(len(level["count"])), level["category"]]
+            assert own.tolist() == level["count"].tolist()
+        # 대표 마커와 경계 상자는 클러스터에 속한 마커 기준
+        if n:
+            assert (level["south"] <= level["lat"] + 1e-9).all() and (level["lat"] <= level["north"] + 1e-9).all()
+            assert (level["west"] <= level["lng"] + 1e-9).all() and (level["lng"] <= level["east"] + 1e-9).all()
+            first = level["first"]
+            assert ((lat[first] >= level["south"]) & (lat[first] <= level["north"])).all()
+
+def test_clusters_within_bbox_cover_all_markers_at_each_zoom():
+    lat, lng, codes = make_markers(20000)
+    pyramid = utils.ClusterPyramid(lat, lng, codes, CATEGORY_COUNT)
+    for zoom in pyramid.levels:
+        clusters = pyramid.within_bbox(zoom, -90, -180, 90, 180)
+        assert pyramid.level(zoom)["count"][clusters].sum() == len(lat)
@@ -0,0 +1,90 @@
+import utils
+
+COURSE = [
+    {"lat": 37.5796, "lng": 126.9770, "title": "경복궁", "color": "red", "category": "코스"},
+    {"lat": 37.5511, "lng": 126.9882, "title": "남산서울타워", "color": "red", "category": "코스"},
+]
+
+def render_course_map(session_state, markers=COURSE):
+    """show_google_map과 같은 순서로 코스 지도 인자를 만들고 sync를 저장"""
+    args, session_state["course_map__sync"] = utils.static_map_args(
+        "API_KEY", 37.56, 126.98, markers, sync=utils.map_sync_state("course_map"),
+        event=session_state.get("course_map")
+    )
+    return args["sync"]
+
+def ops(batch):
+    return [op["op"] for op in batch["ops"]]
+
+def test_stale_sync_without_fresh_mount_sends_no_reset():
+    # 원래 문제: 예전 sync를 그대로 쓰면 새 iframe(seq 0)에 reset 없는 배치를 보냄
+    _, stale = utils.static_map_args("API_KEY", 37.56, 126.98, COURSE)
+    args, _ = utils.static_map_args("API_KEY", 37.56, 126.98, COURSE, sync=stale)
+    assert args["sync"]["base"] == stale["seq"] != 0
+    assert "reset" not in ops(args["sync"])
+
+def test_map_remounted_after_a_run_without_it_starts_with_reset(session_state):
+    # 1회차: 코스 생성 버튼을 눌러 지도를 그림
+    utils.forget_unrendered_maps()
+    first = render_course_map(session_state)
+    assert ops(first)[0] == "reset"
+    
+    # 2회차: 다른 위젯 조작, 코스 지도는 그리지 않음 (iframe 사라짐)
+    utils.forget_unrendered_maps()
+    
+    # 3회차: 다시 코스 생성 -> 새 iframe이 reset부터 받아야 함
+    utils.forget_unrendered_maps()
+    assert "course_map__sync" not in session_state
+    again = render_course_map(session_state)
+    assert ops(again)[0] == "reset"
+    assert again["base"] == 0
+
+def test_map_rendered_on_consecutive_runs_keeps_sending_diffs(session_state):
+    utils.forget_unrendered_maps()
+    first = render_course_map(session_state)
+    
+    utils.forget_unrendered_maps()
+    second = render_course_map(session_state, COURSE[:1])
+    assert second["base"] == first["seq"]
+    assert "reset" not in ops(second)
+    assert "remove" in ops(second)
+
+def render_seoul_map(session_state, monkeypatch, user_location):
+    """pages_map처럼 사용자 위치를 중심으로 전체 지도를 그리고 보낸 동기화 인자를 반환"""
+    sent = {}
+    monkeypatch.setattr(utils, "get_seoul_map_component", lambda: lambda **kwargs: sent.update(kwargs))
+    utils.forget_unrendered_maps()
+    utils.show_streaming_map("API_KEY", user_location[0], user_location[1], markers=COURSE, zoom=12)
+    return sent["sync"]
+
+def test_new_location_fix_does_not_pan_the_streaming_map(session_state, monkeypatch):
+    first = render_seoul_map(session_state, monkeypatch, (37.5665, 126.9780))
+    assert "view" in ops(first)
+    
+    moved = render_seoul_map(session_state, monkeypatch, (37.5700, 126.9820))
+    assert "view" not in ops(moved)
+
+def test_focus_pans_the_streaming_map_once_and_is_cleared(session_state, monkeypatch):
+    render_seoul_map(session_state, monkeypatch, (37.5665, 126.9780))
+    
+    session_state.clicked_location = {"name": "경복궁", "lat": 37.5796, "lng": 126.9770}
+    focused = render_seoul_map(session_state, monkeypatch, (37.5665, 126.9780))
+    view = [op for op in focused["ops"] if op["op"] == "view"]
+    assert view == [{"op": "view", "value": {"center": [37.5796, 126.9770], "zoom": utils.MAP_FOCUS_ZOOM}}]
+    assert session_state.clicked_location is None
+    
+    # 다음 재실행은 사용자 위치가 바뀌어도 고른 장소에 머무름
+    after = render_seoul_map(session_state, monkeypatch, (37.5700, 126.9820))
+    assert "view" not in ops(after)
+    
+    # 같은 장소를 다시 고르면 다시 이동
+    session_state.clicked_location = {"name": "경복궁", "lat": 37.5796, "lng": 126.9770}
+    again = render_seoul_map(session_state, monkeypatch, (37.5700, 126.9820))
+    assert "view" in ops(again)
+
+def test_static_map_view_request_ignores_center_changes():
+    _, sync = utils.static_map_args("API_KEY", 37.56, 126.98, COURSE, view_request="경복궁")
+    args, sync = utils.static_map_args("API_KEY", 37.57, 126.99, COURSE, sync=sync, view_request="경복궁")
+    assert "view" not in ops(args["sync"])
+    args, _ = utils.static_map_args("API_KEY", 37.57, 126.99, COURSE, sync=sync, view_request="남산서울타워")
+    assert "view" in ops(args["sync"])
@@ -0,0 +1,148 @@
+import re
+
+import numpy as np
+import pytest
+
+import utils
+
+SYLLABLES = list("가나다구서경복궁남산울동대문광장시한옥마을숲공원미술관박물")
+HANGUL_BASE = 0xAC00
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+
+def make_store(places=2000, seed=0):
+    """두 언어 이름/주소를 가진 합성 마커 저장소 (이름 없음/빈 주소 포함)"""
+    rng = np.random.default_rng(seed)
+    titles = ["".join(rng.choice(SYLLABLES, rng.integers(1, 7))) for _ in range(places)]
+    english = [" ".join("".join(rng.choice(list("abcdefgh"), rng.integers(2, 6))) for _ in range(rng.integers(1, 3))).title()
+               for _ in range(places)]
+    addresses = [f"서울특별시 {title[:2]}로 {i % 50}" if i % 7 else "" for i, title in enumerate(titles)]
+    for i in range(0, places, 97):
+        titles[i] = utils._NO_TITLE
+    return utils.MarkerStore(
+        np.zeros(places), np.zeros(places),
+        {"한국어": titles, "영어": english}, {"한국어": [""] * places, "영어": [""] * places},
+        np.zeros(places, dtype=np.int16), ("기타",), np.zeros(places, dtype=np.int16), ("gray",),
+        addresses={"한국어": addresses, "영어": english}
+    )
+
+def normalize(text):
+    return "".join(text.lower().split())
+
+def initial(char):
+    """한글 음절의 초성 (음절이 아니면 None)"""
+    code = ord(char) - HANGUL_BASE
+    return CHOSEONG[code // 588] if 0 <= code < 11172 else None
+
+def last_char_matches(typed, char):
+    """입력 중인 마지막 글자 typed가 char와 일치하는지 (자모 접두어 허용)"""
+    if typed == char:
+        return True
+    if typed in CHOSEONG:
+        return initial(char) == typed
+    typed_code, code = ord(typed) - HANGUL_BASE, ord(char) - HANGUL_BASE
+    if initial(typed) is None or initial(char) is None or typed_code % 28:
+        return False
+    return typed_code // 28 == code // 28
+
+def typed_positions(text, query):
+    """query가 text에서 일치하는 시작 위치 목록"""
+    head, tail = query[:-1], query[-1]
+    return [i for i in range(len(text) - len(query) + 1)
+            if text.startswith(head, i) and last_char_matches(tail, text[i + len(head)])]
+
+def brute_force_search(store, query):
+    """모든 마커의 이름/주소를 직접 훑어 PlaceSearchIndex.search와 같은 순위로 정렬"""
+    query = normalize(query)
+    tiers = ([], [], [])
+    lengths = []
+    for doc in range(len(store)):
+        titles = {normalize(titles[doc]) for titles in store.titles_by_language.values()}
+        titles.discard("")
+        titles.discard(normalize(utils._NO_TITLE))
+        addresses = {normalize(addresses[doc]) for addresses in store.addresses_by_language.values()}
+        addresses.discard("")
+        lengths.append(min((len(title) for title in titles), default=1 << 30))
+        
+        if all(char in CHOSEONG for char in query):
+            fields = [utils.to_choseong(title) for title in titles]
+            if any(field.startswith(query) for field in fields):
+                tiers[0].append(doc)
+            elif any(query in field for field in fields):
+                tiers[1].append(doc)
+        elif any(0 in typed_positions(title, query) for title in titles):
+            tiers[0].append(doc)
+        elif any(typed_positions(title, query) for title in titles):
+            tiers[1].append(doc)
+        elif any(typed_positions(address, query) for address in addresses):
+            tiers[2].append(doc)
+    return [doc for tier in tiers for doc in sorted(tier, key=lambda doc: (lengths[doc], doc))]
+
+def make_queries(store, count=60, seed=1):
+    """검색어 종류별 합성 검색어 (이름 일부, 입력 중, 초성, 주소, 영어, 없는 말)"""
+    rng = np.random.default_rng(seed)
+    titles = [title for title in store.titles_by_language["한국어"] if title != utils._NO_TITLE]
+    picks = [titles[i] for i in rng.integers(0, len(titles), count)]
+    
+    def part(title):
+        start = int(rng.integers(0, len(title)))
+        return title[start:start + int(rng.integers(1, 4))]
+    
+    def typing(title):
+        # 다음 글자를 초성만, 또는 받침 없이 입력한 상태
+        cut = int(rng.integers(0, len(title)))
+        code = ord(title[cut]) - HANGUL_BASE
+        last = initial(title[cut]) if rng.random() < 0.5 else chr(HANGUL_BASE + code - code % 28)
+        return title[:cut] + last
+    
+    addresses = [address for address in store.addresses_by_language["한국어"] if address]
+    english = store.titles_by_language["영어"]
+    return {
+        "substring": [part(title) for title in picks],
+        "typing": [typing(title) for title in picks],
+        "choseong": [utils.to_choseong(part(title)) for title in picks],
+        "address": [addresses[i][6:] for i in rng.integers(0, len(addresses), count)],
+        "english": [english[i][:int(rng.integers(1, 5))].upper() for i in rng.integers(0, len(english), count)],
+        "miss": ["".join(rng.choice(list("퀘퓌휑"), 2)) for _ in range(count)],
+    }
+
+STORE = make_store()
+QUERIES = make_queries(STORE)
+INDEX = utils.PlaceSearchIndex(STORE)
+
+@pytest.mark.parametrize("kind", sorted(QUERIES))
+def test_place_search_matches_brute_force(kind):
+    for query in QUERIES[kind]:
+        expected = brute_force_search(STORE, query)
+        assert INDEX.search(query).tolist() == expected, query
+        assert INDEX.search(query, limit=5).tolist() == expected[:5], query
+        assert INDEX.count(query) == len(expected)
+
+def test_typing_matches_syllables_with_a_final_consonant():
+    store = utils.MarkerStore(
+        np.zeros(3), np.zeros(3), {"한국어": ["경복궁", "경복구", "경보"]}, {"한국어": [""] * 3},
+        np.zeros(3, dtype=np.int16), ("기타",), np.zeros(3, dtype=np.int16), ("gray",)
+    )
+    index = utils.PlaceSearchIndex(store)
+    # 받침 없이 입력한 마지막 글자(구)와 초성(ㄱ)은 받침이 붙은 음절(궁)까지 일치
+    assert index.search("경복구").tolist() == [0, 1]
+    assert index.search("경복ㄱ").tolist() == [0, 1]
+    assert index.search("ㄱㅂㄱ").tolist() == [0, 1]
+    # 같은 순위는 짧은 이름이 먼저
+    assert index.search("경보").tolist() == [2, 0, 1]
+
+def test_ngram_candidates_match_brute_force():
+    rng = np.random.default_rng(2)
+    texts = ["".join(rng.choice(SYLLABLES, rng.integers(1, 6))) for _ in range(3000)]
+    doc_ids = np.sort(rng.integers(0, 1000, len(texts)))
+    index = utils.NgramIndex(texts, doc_ids)
+    
+    def brute_force(pattern):
+        return sorted({int(doc) for text, doc in zip(texts, doc_ids) if re.search(pattern, text)})
+    
+    for char in SYLLABLES:
+        code = ord(char)
+        start = code - (code - HANGUL_BASE) % 28
+        assert index.candidates([(code, code)]).tolist() == brute_force(re.escape(char))
+        assert index.candidates([(start, start + 27)]).tolist() == brute_force(f"[{chr(start)}-{chr(start + 27)}]")
+        following = SYLLABLES[int(rng.integers(0, len(SYLLABLES)))]
+        assert index.candidates([(code, code), (ord(following), ord(following))]).tolist() == brute_force(char + following)
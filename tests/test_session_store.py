@@ -0,0 +1,54 @@
+import pytest
+
+import utils
+from session_stress import make_store, run_stress
+
+BACKENDS = sorted(utils.SESSION_STORE_BACKENDS)
+
+def make_visit(place_name, xp_gained=10):
+    return {"place_name": place_name, "latitude": 37.5, "longitude": 127.0,
+            "timestamp": "2024-01-01 00:00:00", "date": "2024-01-01", "xp_gained": xp_gained, "rating": None}
+
+def close(store):
+    if hasattr(store, "close"):
+        store.close()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_50_concurrent_writer_processes_lose_no_visit(backend):
+    result = run_stress(backend, writers=50, visits=20, processes=True)
+    
+    assert result["lost_visits"] == 0
+    assert result["wrong_xp"] == []
+    assert result["duplicate_grants"] == 0
+    assert not result["wrong_password"]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_50_concurrent_writer_threads_lose_no_visit(backend):
+    # Streamlit 세션처럼 한 프로세스 안의 스레드들이 각자 저장소 인스턴스로 쓰는 경우
+    result = run_stress(backend, writers=50, visits=20, processes=False)
+    
+    assert result["lost_visits"] == 0
+    assert result["wrong_xp"] == []
+    assert result["duplicate_grants"] == 0
+    assert not result["wrong_password"]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_duplicates_are_rejected_across_store_instances(backend, tmp_path):
+    # 두 인스턴스가 모두 쓰기 전에 상태를 읽어 둔 경우 (다른 프로세스와 같음)
+    first = make_store(backend, tmp_path)
+    second = make_store(backend, tmp_path)
+    first.load()
+    second.load()
+    
+    assert first.add_user("kim", "pw1")
+    assert not second.add_user("kim", "pw2")
+    assert first.add_visit("kim", make_visit("경복궁"))
+    assert not second.add_visit("kim", make_visit("경복궁"))
+    assert second.add_visit("kim", make_visit("명동"))
+    close(first)
+    close(second)
+    
+    users, user_visits, user_xp = make_store(backend, tmp_path).load()
+    assert users["kim"] == "pw1"
+    assert [visit["place_name"] for visit in user_visits["kim"]] == ["경복궁", "명동"]
+    assert user_xp["kim"] == 20
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import utils
+
+def make_points(n, seed=0):
+    """서울 범위의 합성 좌표 (절반은 한 곳에 몰리고 일부는 같은 좌표)"""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(37.42, 37.70, n)
+    lng = rng.uniform(126.76, 127.18, n)
+    dense = rng.random(n) < 0.5
+    lat[dense] = rng.normal(37.5665, 0.005, dense.sum())
+    lng[dense] = rng.normal(126.9780, 0.005, dense.sum())
+    if n >= 10:
+        lat[:n // 10], lng[:n // 10] = lat[n // 10], lng[n // 10]
+    return lat, lng
+
+def make_queries(count=40, seed=1):
+    """점 근처와 바깥(인천, 부산)을 섞은 질의 좌표"""
+    rng = np.random.default_rng(seed)
+    lat = np.r_[rng.uniform(37.40, 37.72, count), 37.4563, 35.1796]
+    lng = np.r_[rng.uniform(126.74, 127.20, count), 126.7052, 129.0756]
+    return list(zip(lat, lng))
+
+@pytest.fixture(scope="module", params=[1, 5, 100, 20000])
+def points(request):
+    lat, lng = make_points(request.param)
+    return lat, lng, utils.SpatialGridIndex(lat, lng)
+
+def test_nearest_matches_brute_force(points):
+    lat, lng, index = points
+    for query_lat, query_lng in make_queries():
+        expected = np.sort(utils.haversine_distances(query_lat, query_lng, lat, lng))
+        for k in (1, 10, len(lat) + 3):
+            indices, distances = index.nearest(query_lat, query_lng, k)
+            assert len(indices) == min(k, len(lat))
+            assert len(set(indices.tolist())) == len(indices)
+            # 같은 거리(같은 좌표)의 점은 어느 것이 먼저 와도 되므로 거리로 비교
+            np.testing.assert_allclose(distances, expected[:len(indices)], rtol=1e-12)
+            np.testing.assert_allclose(utils.haversine_distances(query_lat, query_lng, lat[indices], lng[indices]), distances, rtol=1e-12)
+
+def test_within_radius_matches_brute_force(points):
+    lat, lng, index = points
+    for query_lat, query_lng in make_queries():
+        all_distances = utils.haversine_distances(query_lat, query_lng, lat, lng)
+        for radius in (0.0, 50.0, utils.NEARBY_RADIUS_M, 20000.0):
+            indices, distances = index.within_radius(query_lat, query_lng, radius)
+            assert sorted(indices.tolist()) == np.flatnonzero(all_distances <= radius).tolist()
+            assert np.all(np.diff(distances) >= 0)
+            np.testing.assert_allclose(distances, all_distances[indices], rtol=1e-12)
+
+def test_within_bbox_matches_brute_force(points):
+    lat, lng, index = points
+    rng = np.random.default_rng(2)
+    boxes = [(37.55, 126.96, 37.58, 127.00), (37.0, 126.0, 38.0, 128.0), (35.0, 129.0, 35.2, 129.2),
+             (lat.min(), lng.min(), lat.max(), lng.max())]
+    for _ in range(40):
+        south, north = np.sort(rng.uniform(37.40, 37.72, 2))
+        west, east = np.sort(rng.uniform(126.74, 127.20, 2))
+        boxes.append((south, west, north, east))
+    for south, west, north, east in boxes:
+        expected = np.flatnonzero((lat >= south) & (lat < north) & (lng >= west) & (lng < east))
+        assert index.within_bbox(south, west, north, east).tolist() == expected.tolist()
+
+def test_empty_index_returns_nothing():
+    index = utils.SpatialGridIndex([], [])
+    assert len(index.nearest(37.5665, 126.9780, 5)[0]) == 0
+    assert len(index.within_radius(37.5665, 126.9780, 1000)[0]) == 0
+    assert len(index.within_bbox(37.0, 126.0, 38.0, 128.0)) == 0
@@ -0,0 +1,303 @@
+"""서울 관광앱 성능 측정 도구
+
+utils의 카탈로그/인덱스/지도 함수를 실제 데이터나 합성 데이터로 측정한다.
+앱 실행에는 쓰이지 않으며, 저장소 루트에서 다음처럼 실행한다.
+
+    python tools/bench.py memory-report --sessions 1 50 500
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils
+
+# 거리 정확도 보고서의 표본 범위 (process_dataframe의 좌표 필터와 동일)
+DISTANCE_REPORT_BBOX = {"lat": (33.0, 43.0), "lng": (124.0, 132.0)}
+
+# 카탈로그 메모리 관련 함수
+def _resident_memory_bytes():
+    """현재 프로세스의 상주 메모리(RSS) 바이트 수 (Linux 외 환경에서는 None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def catalog_memory_report(session_counts=(1, 50, 500), language="한국어"):
+    """동시 세션 수에 따른 카탈로그 메모리 사용량 보고서
+
+    세션마다 마커 dict 목록을 따로 보관하던 기존 방식과 공유 카탈로그
+    참조만 보관하는 방식을 시뮬레이션하여 비교한다. heap_bytes는 세션
+    데이터가 새로 할당한 Python 힙, rss_bytes는 세션 생성 직후 프로세스의
+    상주 메모리다 (공유 방식을 먼저 측정하여 해제된 메모리의 영향을 줄임).
+    반환값: {"mode", "sessions", "heap_bytes", "rss_bytes"} 행 목록
+    """
+    catalog = utils.load_excel_files(language)
+    
+    def build_sessions(mode, count):
+        sessions = []
+        for _ in range(count):
+            if mode == "per_session_copy":
+                # 기존 방식: 세션마다 마커 dict 목록을 새로 보관
+                markers = [dict(marker) for marker in catalog]
+            else:
+                markers = utils.load_excel_files(language)
+            sessions.append({"all_markers": markers, "language": language})
+        return sessions
+    
+    rows = []
+    for mode in ("shared_catalog", "per_session_copy"):
+        for count in session_counts:
+            gc.collect()
+            sessions = build_sessions(mode, count)
+            rss_bytes = _resident_memory_bytes()
+            del sessions
+            
+            gc.collect()
+            tracemalloc.start()
+            sessions = build_sessions(mode, count)
+            heap_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del sessions
+            
+            rows.append({"mode": mode, "sessions": count, "heap_bytes": heap_bytes, "rss_bytes": rss_bytes})
+    return rows
+
+# 거리 계산 및 공간 인덱스 관련 함수
+def distance_accuracy_report(pairs=10000, seed=0, bbox=DISTANCE_REPORT_BBOX):
+    """bbox 안의 무작위 지점 쌍에 대해 geodesic 대비 오차와 속도 비교
+
+    전 범위 쌍과 10km 이내 근거리 쌍을 따로 측정한다.
+    반환값: 표본 종류 -> 방식 -> {max_abs_m, mean_abs_m, max_rel, seconds}
+    """
+    rng = np.random.default_rng(seed)
+    lat1 = rng.uniform(*bbox["lat"], pairs)
+    lng1 = rng.uniform(*bbox["lng"], pairs)
+    samples = {
+        "bbox": (rng.uniform(*bbox["lat"], pairs), rng.uniform(*bbox["lng"], pairs)),
+        "within_10km": (
+            np.clip(lat1 + rng.uniform(-0.09, 0.09, pairs), *bbox["lat"]),
+            np.clip(lng1 + rng.uniform(-0.11, 0.11, pairs), *bbox["lng"]),
+        ),
+    }
+    
+    report = {}
+    for name, (lat2, lng2) in samples.items():
+        start = time.perf_counter()
+        reference = np.array([geodesic(a, b).meters for a, b in zip(zip(lat1, lng1), zip(lat2, lng2))])
+        rows = {"geodesic": {"seconds": time.perf_counter() - start}}
+        for method, ellipsoidal in (("haversine", False), ("lambert", True)):
+            start = time.perf_counter()
+            distances = utils.haversine_distances(lat1, lng1, lat2, lng2, ellipsoidal=ellipsoidal)
+            seconds = time.perf_counter() - start
+            errors = np.abs(distances - reference)
+            rows[method] = {
+                "max_abs_m": float(errors.max()),
+                "mean_abs_m": float(errors.mean()),
+                "max_rel": float((errors / np.maximum(reference, 1.0)).max()),
+                "seconds": seconds,
+            }
+        report[name] = rows
+    return report
+
+def spatial_index_benchmark(points=1_000_000, queries=1000, k=10, radius_m=utils.NEARBY_RADIUS_M, seed=0):
+    """서울 범위의 합성 좌표로 격자 인덱스 생성/질의 시간 측정
+
+    반환값: 생성 시간(초)과 nearest/within_radius 질의 시간(ms) 통계를 담은 dict
+    """
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(37.42, 37.70, points)
+    lng = rng.uniform(126.76, 127.18, points)
+    
+    start = time.perf_counter()
+    index = utils.SpatialGridIndex(lat, lng)
+    build_seconds = time.perf_counter() - start
+    
+    query_lat = rng.uniform(37.42, 37.70, queries)
+    query_lng = rng.uniform(126.76, 127.18, queries)
+    result = {"points": points, "index": repr(index), "build_seconds": build_seconds}
+    for name, query in (("nearest", lambda a, b: index.nearest(a, b, k)),
+                        ("within_radius", lambda a, b: index.within_radius(a, b, radius_m))):
+        timings = np.empty(queries)
+        for i in range(queries):
+            start = time.perf_counter()
+            query(query_lat[i], query_lng[i])
+            timings[i] = time.perf_counter() - start
+        result[name] = {"p50_ms": float(np.percentile(timings, 50) * 1000),
+                        "p99_ms": float(np.percentile(timings, 99) * 1000)}
+    return result
+
+# 장소 검색 관련 함수
+def search_index_benchmark(places=100_000, queries=500, seed=0):
+    """합성 장소 목록으로 검색 인덱스 생성/질의 시간 측정
+
+    반환값: 생성 시간(초), 인덱스 크기와 질의 종류별 시간(ms) 통계를 담은 dict
+    """
+    rng = np.random.default_rng(seed)
+    syllables = np.array(list("가나다라마바사아자차카타파하경복궁남산서울동대문광장시장한옥마을숲공원미술관박물관타워"))
+    districts = ["종로구", "중구", "용산구", "성동구", "마포구", "강남구", "서초구", "송파구"]
+    titles = ["".join(rng.choice(syllables, rng.integers(2, 7))) for _ in range(places)]
+    english = ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), rng.integers(4, 12))) for _ in range(places)]
+    addresses = [f"서울특별시 {districts[i % len(districts)]} {title[:2]}로 {i % 300}" for i, title in enumerate(titles)]
+    store = utils.MarkerStore(
+        rng.uniform(37.42, 37.70, places), rng.uniform(126.76, 127.18, places),
+        {"한국어": titles, "영어": english}, {"한국어": [""] * places, "영어": [""] * places},
+        np.zeros(places, dtype=np.int16), ("기타",), np.zeros(places, dtype=np.int16), ("gray",),
+        addresses={"한국어": addresses, "영어": addresses}
+    )
+    
+    start = time.perf_counter()
+    index = utils.PlaceSearchIndex(store)
+    build_seconds = time.perf_counter() - start
+    
+    samples = rng.integers(0, places, queries)
+    query_sets = {
+        "substring": [titles[i][1:4] for i in samples],
+        "typing": [titles[i][:2] + utils._CHOSEONG[(ord(titles[i][2 % len(titles[i])]) - utils._HANGUL_BASE) // 588] for i in samples],
+        "choseong": [utils.to_choseong(titles[i][:3]) for i in samples],
+        "english": [english[i][:3] for i in samples],
+    }
+    result = {"places": places, "index": repr(index), "build_seconds": build_seconds}
+    for name, query_list in query_sets.items():
+        timings = np.empty(len(query_list))
+        for i, query in enumerate(query_list):
+            start = time.perf_counter()
+            index.search(query, limit=5)
+            timings[i] = time.perf_counter() - start
+        result[name] = {"p50_ms": float(np.percentile(timings, 50) * 1000),
+                        "p99_ms": float(np.percentile(timings, 99) * 1000)}
+    return result
+
+# 지도 컴포넌트 관련 함수
+def map_payload_benchmark(sizes=(1000, 10000, 100000), seed=0):
+    """합성 마커 수별 지도 컴포넌트 첫 렌더링 인자 크기와 생성 시간 측정 (마커를 모두 보내는 방식)
+
+    반환값: [{markers, payload_bytes, bytes_per_marker, build_ms}, ...]
+    """
+    rng = np.random.default_rng(seed)
+    categories = [category for category in utils.CATEGORY_COLORS if category != "기타"]
+    rows = []
+    for size in sizes:
+        codes = np.arange(size) % len(categories)
+        store = utils.MarkerStore(
+            rng.uniform(37.42, 37.70, size), rng.uniform(126.76, 127.18, size),
+            {"한국어": [f"장소 {i}" for i in range(size)]},
+            {"한국어": [f"주소: 서울특별시 종로구 창경궁로 {i}<br>전화: 02-000-{i % 10000:04d}<br>" for i in range(size)]},
+            codes, categories, codes, [utils.CATEGORY_COLORS[category] for category in categories]
+        )
+        start = time.perf_counter()
+        args, _ = utils.static_map_args("API_KEY", utils.DEFAULT_LOCATION[0], utils.DEFAULT_LOCATION[1], store)
+        payload = json.dumps(args, ensure_ascii=False, separators=(",", ":"))
+        build_ms = (time.perf_counter() - start) * 1000
+        payload_bytes = len(payload.encode("utf-8"))
+        rows.append({
+            "markers": size,
+            "payload_bytes": payload_bytes,
+            "bytes_per_marker": payload_bytes / size,
+            "build_ms": build_ms,
+        })
+    return rows
+
+def map_rerun_bytes_report(markers, center=utils.DEFAULT_LOCATION, zoom=12, height=600):
+    """재실행 한 번에 브라우저로 보내는 지도 바이트 수
+
+    지도 컴포넌트의 첫 렌더링/변화 없는 재실행 인자 크기와, 처음 한 번만 받는
+    번들 정적 파일 크기를 잰다.
+    반환값: {"bundle_bytes", "rows": [{name, markers, first_bytes, rerun_bytes}, ...]}
+    """
+    if not isinstance(markers, utils.MarkerStore):
+        markers = utils.MarkerStore.from_markers(markers)
+    
+    def args_bytes(args):
+        return len(json.dumps(args, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    
+    rows = []
+    small = markers.take(np.arange(min(len(markers), 10)))
+    for name, subset, build_args in (("코스 지도", small, utils.static_map_args), ("전체 지도", markers, utils.streaming_map_args)):
+        first, sync = build_args("API_KEY", center[0], center[1], subset, zoom=zoom, height=height)
+        rerun, _ = build_args("API_KEY", center[0], center[1], subset, zoom=zoom, height=height, sync=sync)
+        rows.append({
+            "name": name,
+            "markers": len(subset),
+            "first_bytes": args_bytes(first),
+            "rerun_bytes": args_bytes(rerun),
+        })
+    
+    bundle = Path(utils._map_component_path())
+    bundle_bytes = sum(path.stat().st_size for path in bundle.iterdir() if path.is_file() and not path.name.endswith(".tmp"))
+    return {"bundle_bytes": bundle_bytes, "rows": rows}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="서울 관광앱 성능 측정 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    memory_parser = subparsers.add_parser("memory-report", help="동시 세션 수별 카탈로그 메모리 보고서")
+    memory_parser.add_argument("--sessions", type=int, nargs="+", default=[1, 50, 500])
+    memory_parser.add_argument("--language", default="한국어")
+    
+    distance_parser = subparsers.add_parser("distance-report", help="geodesic 대비 배열 거리 계산 정확도/속도 보고서")
+    distance_parser.add_argument("--pairs", type=int, default=10000)
+    
+    search_parser = subparsers.add_parser("search-bench", help="합성 장소 목록으로 검색 인덱스 질의 시간 측정")
+    search_parser.add_argument("--places", type=int, default=100_000)
+    search_parser.add_argument("--queries", type=int, default=500)
+    
+    payload_parser = subparsers.add_parser("map-payload-bench", help="마커 수별 지도 컴포넌트 인자 크기/생성 시간 측정")
+    payload_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    
+    rerun_parser = subparsers.add_parser("map-rerun-bytes", help="재실행당 지도 컴포넌트 전송 바이트")
+    rerun_parser.add_argument("--language", default="한국어")
+    
+    spatial_parser = subparsers.add_parser("spatial-bench", help="합성 좌표로 공간 인덱스 질의 시간 측정")
+    spatial_parser.add_argument("--points", type=int, default=1_000_000)
+    spatial_parser.add_argument("--queries", type=int, default=1000)
+    spatial_parser.add_argument("--k", type=int, default=10)
+    spatial_parser.add_argument("--radius", type=float, default=utils.NEARBY_RADIUS_M)
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "memory-report":
+        for row in catalog_memory_report(tuple(args.sessions), args.language):
+            rss = "-" if row["rss_bytes"] is None else f"{row['rss_bytes'] / 2**20:.1f} MiB"
+            print(f"{row['mode']:<18} sessions={row['sessions']:<5} heap={row['heap_bytes'] / 2**20:.1f} MiB rss={rss}")
+    elif args.command == "distance-report":
+        for sample, rows in distance_accuracy_report(args.pairs).items():
+            geodesic_seconds = rows.pop("geodesic")["seconds"]
+            print(f"[{sample}] geodesic {geodesic_seconds * 1000:.1f}ms")
+            for method, row in rows.items():
+                print(f"  {method:<10} max={row['max_abs_m']:.2f}m mean={row['mean_abs_m']:.2f}m "
+                      f"max_rel={row['max_rel']:.2e} time={row['seconds'] * 1000:.2f}ms")
+    elif args.command == "search-bench":
+        result = search_index_benchmark(args.places, args.queries)
+        print(f"{result['index']} built in {result['build_seconds']:.2f}s")
+        for name in ("substring", "typing", "choseong", "english"):
+            print(f"{name:<10} p50={result[name]['p50_ms']:.3f}ms p99={result[name]['p99_ms']:.3f}ms")
+    elif args.command == "map-payload-bench":
+        for row in map_payload_benchmark(tuple(args.sizes)):
+            print(f"markers={row['markers']:<7} "
+                  f"payload={row['payload_bytes'] / 1024:.0f} KiB ({row['bytes_per_marker']:.0f} B/marker) "
+                  f"build={row['build_ms']:.0f}ms")
+    elif args.command == "map-rerun-bytes":
+        report = map_rerun_bytes_report(utils.load_excel_files(args.language))
+        print(f"번들 정적 파일 {report['bundle_bytes'] / 1024:.1f} KiB (처음 한 번, 이후 브라우저 캐시)")
+        for row in report["rows"]:
+            print(f"{row['name']} markers={row['markers']:<6} "
+                  f"component first={row['first_bytes'] / 1024:.1f} KiB rerun={row['rerun_bytes']} B")
+    elif args.command == "spatial-bench":
+        result = spatial_index_benchmark(args.points, args.queries, args.k, args.radius)
+        print(f"{result['index']} built in {result['build_seconds']:.2f}s")
+        for name in ("nearest", "within_radius"):
+            print(f"{name:<14} p50={result[name]['p50_ms']:.3f}ms p99={result[name]['p99_ms']:.3f}ms")
+
+if __name__ == "__main__":
+    main()
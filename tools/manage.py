@@ -0,0 +1,37 @@
+"""서울 관광앱 데이터 관리 도구
+
+앱 실행에는 쓰이지 않으며, 저장소 루트에서 다음처럼 실행한다.
+
+    python tools/manage.py build-sidecars
+    python tools/manage.py migrate-session-data
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="서울 관광앱 데이터 관리 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    sidecar_parser = subparsers.add_parser("build-sidecars", help="Excel 파일을 컬럼형 사이드카로 변환")
+    sidecar_parser.add_argument("--data-folder", default=utils.DATA_FOLDER)
+    
+    migrate_parser = subparsers.add_parser("migrate-session-data", help="session_data.json을 SQLite 세션 저장소로 가져오기")
+    migrate_parser.add_argument("--json", default=utils.SESSION_DATA_FILE)
+    migrate_parser.add_argument("--db", default=utils.SESSION_DB_FILE)
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "build-sidecars":
+        for name, result in utils.build_sidecars(args.data_folder).items():
+            print(f"{name}: {result}")
+    elif args.command == "migrate-session-data":
+        counts = utils.SqliteSessionStore(args.db, legacy_json=None).import_json(args.json)
+        print(f"{args.json} -> {args.db}: 사용자 {counts['users']}명, 방문 기록 {counts['visits']}개")
+
+if __name__ == "__main__":
+    main()
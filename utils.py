@@ -1,11 +1,25 @@
 # 모든 유틸리티 함수를 하나의 파일로 통합
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
+import numpy as np
 import json
 import os
+import hashlib
+import re
+import unicodedata
+import atexit
+import copy
+import functools
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from geopy.distance import geodesic
 
 # Google Maps 기본 중심 위치 (서울시청)
 DEFAULT_LOCATION = [37.5665, 126.9780]
@@ -30,8 +44,89 @@ FILE_CATEGORIES = {
     "종로구 관광지": ["종로구", "관광데이터"]
 }
 
-# 세션 데이터 저장 파일
+# 전화번호 열 후보 (앞에 있는 열이 우선)
+TEL_COLUMNS = ['전화번호', 'TELNO', '연락처']
+
+# 세션 데이터 저장 파일 (json 백엔드, sqlite 백엔드가 처음 열릴 때 가져오는 이전 형식)
 SESSION_DATA_FILE = "data/session_data.json"
+# SQLite 세션 저장소 파일과 잠금 대기 시간(초)
+SESSION_DB_FILE = "data/session_data.db"
+SESSION_DB_TIMEOUT = 10
+# journal 백엔드: 이벤트를 한 줄씩 덧붙이는 저널 파일, fsync를 모아서 하는 간격(초),
+# 스냅숏(SESSION_DATA_FILE)으로 접어 넣는 저널 크기(바이트)
+SESSION_JOURNAL_FILE = "data/session_data.journal"
+JOURNAL_FSYNC_INTERVAL = 0.1
+JOURNAL_COMPACT_BYTES = 4 * 2**20
+# 사용자/방문 기록/경험치 저장소 백엔드 ("sqlite", "journal" 또는 "json")
+SESSION_STORE_BACKEND = "sqlite"
+# 최근 사용한 사용자 기록 캐시 크기, 방문 기록 페이지당 항목 수
+USER_CACHE_SIZE = 256
+HISTORY_PAGE_SIZE = 20
+
+# 관광 데이터 폴더
+DATA_FOLDER = "data"
+
+# 병렬 수집: 다시 파싱할 파일이 이 개수 이상이고 CPU가 여러 개면 프로세스 풀 사용
+PARALLEL_INGEST_MIN_FILES = 4
+# 병렬 수집 최대 워커 수 (None이면 CPU 코어 수)
+INGEST_MAX_WORKERS = None
+
+# Excel 원본 옆에 생성하는 컬럼형 사이드카 파일 확장자
+# (비압축 Arrow IPC/Feather 형식이라 메모리 매핑으로 여러 프로세스가 페이지를 공유)
+SIDECAR_SUFFIX = ".feather"
+
+# 렌더링 프로파일: (페이지, 단계)마다 백분위수를 계산하는 최근 측정 수,
+# 패널에 보이는 백분위수, 프로파일 패널을 볼 수 있는 사용자
+PROFILE_WINDOW = 512
+PROFILE_PERCENTILES = (50, 90, 99)
+ADMIN_USERS = ("admin",)
+
+
+# 양방향 지도 컴포넌트 프론트엔드 폴더
+MAP_COMPONENT_DIR = Path(__file__).resolve().parent / "components" / "seoul_map"
+# 내용 해시를 파일명에 넣은 배포 번들 폴더 (Streamlit이 실제로 제공하는 폴더)
+MAP_COMPONENT_BUILD_DIR = MAP_COMPONENT_DIR / "build"
+# 번들의 해시 파일명을 붙일 정적 파일 (index.html은 매번 새로 받으므로 제외)
+MAP_COMPONENT_ASSETS = ("main.js", "style.css")
+# 해시 파일명 자산에 붙이는 캐시 헤더 (내용이 바뀌면 파일명이 바뀌므로 1년 보관)
+MAP_ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 뷰포트 스트리밍: 기준 줌에서의 타일 크기(도), 줌에 따른 타일 레벨 범위,
+# 한 번에 요청할 최대 타일 수와 한 응답의 최대 마커 수
+VIEWPORT_BASE_ZOOM = 12
+VIEWPORT_TILE_DEG = 0.04
+VIEWPORT_MIN_LEVEL = 10
+VIEWPORT_MAX_LEVEL = 16
+VIEWPORT_MAX_TILES = 200
+VIEWPORT_MAX_MARKERS = 2000
+# 초기 뷰포트 계산에 쓰는 지도 폭 추정값(px)
+VIEWPORT_ASSUMED_WIDTH = 1000
+
+# 서버 클러스터 피라미드: 클러스터 격자 한 칸의 화면 크기(px, 2의 거듭제곱)와
+# 클러스터를 만드는 줌 범위 (CLUSTER_MAX_ZOOM보다 크게 확대하면 개별 마커 표시)
+CLUSTER_GRID_PX = 64
+CLUSTER_MIN_ZOOM = VIEWPORT_MIN_LEVEL
+CLUSTER_MAX_ZOOM = 15
+
+# 사용자 위치: 마지막 위치를 다시 쓰는 시간(초, 이보다 오래되면 브라우저에 다시 물음)과
+# 위치 이벤트를 보내는 지도 컴포넌트 키
+LOCATION_MAX_AGE = 300
+LOCATION_MAP_KEYS = ("seoul_map", "navigation_map")
+# "지도에서 보기"로 고른 장소로 이동할 때의 줌
+MAP_FOCUS_ZOOM = 16
+
+# 지구 평균 반지름 (m)
+EARTH_RADIUS_M = 6371008.8
+# WGS84 타원체 장반경(m)과 편평률 (타원체 보정 거리 계산용)
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+
+# 공간 격자 인덱스의 칸당 평균 점 개수
+GRID_POINTS_PER_CELL = 8
+
+# 주변 장소 패널: 검색 반경(m)과 최대 표시 개수
+NEARBY_RADIUS_M = 1000
+NEARBY_LIMIT = 5
 
 # 경험치 설정
 XP_PER_LEVEL = 200
@@ -55,6 +150,9 @@ LANGUAGE_CODES = {
     "중국어": "zh-CN"
 }
 
+# 카탈로그 수집 시 한 번에 추출하는 언어
+LANGUAGES = tuple(LANGUAGE_CODES)
+
 # 추천 코스 데이터
 RECOMMENDATION_COURSES = {
     "문화 코스": ["경복궁", "인사동", "창덕궁", "북촌한옥마을"],
@@ -132,6 +230,137 @@ def display_user_level_info():
         st.progress(xp_percentage / 100)
         st.caption(f"다음 레벨까지 {XP_PER_LEVEL - (user_xp % XP_PER_LEVEL)} XP 남음")
 
+# 렌더링 프로파일 관련 함수
+class PhaseProfiler:
+    """페이지 단계(데이터 로드, 마커 구성, 지도 생성, 검색, 세션 저장 등)별 소요 시간 기록
+
+    (페이지, 단계)마다 최근 window개의 측정값을 미리 할당한 링 버퍼에 담고,
+    백분위수는 조회할 때만 계산한다. 기록은 잠금 안에서 값 하나를 쓰는
+    것이 전부라(호출당 수 μs) 운영 중에도 켜 둘 수 있다.
+    현재 페이지는 스레드별로 두므로(세션마다 스크립트 실행 스레드가 다름)
+    페이지를 모르는 함수(save_session_data 등)의 단계도 실행 중인 페이지로 기록된다.
+    """
+    
+    def __init__(self, window=PROFILE_WINDOW):
+        self.window = window
+        self._samples = {}  # (페이지, 단계) -> [링 버퍼(초), 기록 횟수, 누적 시간(초)]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def record(self, page, phase, seconds):
+        """측정값 하나 기록"""
+        with self._lock:
+            entry = self._samples.get((page, phase))
+            if entry is None:
+                entry = self._samples[(page, phase)] = [np.zeros(self.window), 0, 0.0]
+            entry[0][entry[1] % self.window] = seconds
+            entry[1] += 1
+            entry[2] += seconds
+    
+    @contextmanager
+    def page(self, name):
+        """블록 안을 name 페이지로 두고 전체 소요 시간을 "total" 단계로 기록"""
+        previous = getattr(self._local, "page", None)
+        self._local.page = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, "total", time.perf_counter() - start)
+            self._local.page = previous
+    
+    @contextmanager
+    def phase(self, name):
+        """블록의 소요 시간을 현재 페이지의 name 단계로 기록 (페이지 밖이면 "-")"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(getattr(self._local, "page", None) or "-", name, time.perf_counter() - start)
+    
+    def snapshot(self, percentiles=PROFILE_PERCENTILES):
+        """(페이지, 단계)별 기록 횟수, 평균과 최근 window개의 백분위수/최댓값 (ms)"""
+        with self._lock:
+            entries = [(key, entry[0][:min(entry[1], self.window)].copy(), entry[1], entry[2])
+                       for key, entry in self._samples.items()]
+        
+        rows = []
+        for (page, phase), recent, count, total in sorted(entries, key=lambda entry: entry[0]):
+            row = {"page": page, "phase": phase, "count": count, "mean_ms": total / count * 1000}
+            for q, value in zip(percentiles, np.percentile(recent, percentiles)):
+                row[f"p{q}_ms"] = float(value) * 1000
+            row["max_ms"] = float(recent.max()) * 1000
+            rows.append(row)
+        return rows
+    
+    def to_jsonl(self):
+        """현재 통계를 JSON Lines로 (한 줄에 (페이지, 단계) 하나, 내보낸 시각 포함)"""
+        exported_at = datetime.now().isoformat(timespec="seconds")
+        return "".join(json.dumps({"time": exported_at, **row}, ensure_ascii=False) + "\n" for row in self.snapshot())
+    
+    def reset(self):
+        """모든 기록 삭제"""
+        with self._lock:
+            self._samples.clear()
+
+# 모듈 전역에 두므로 모든 세션의 측정이 한곳에 모인다
+_page_profiler = PhaseProfiler()
+
+def profile_page(name):
+    """페이지 함수 호출 전체를 name 페이지로 기록하는 데코레이터 (@profile_page("map"))"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _page_profiler.page(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def profile_phase(name):
+    """현재 페이지의 단계 하나를 재는 프로파일 구간 (with 문)"""
+    return _page_profiler.phase(name)
+
+def profiled(phase):
+    """함수 호출 전체를 현재 페이지의 phase 단계로 기록하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _page_profiler.phase(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def get_page_profile():
+    """페이지 단계별 렌더링 시간 통계"""
+    return _page_profiler.snapshot()
+
+def is_admin_user():
+    """로그인한 사용자가 관리자인지 여부"""
+    return bool(st.session_state.get("logged_in")) and st.session_state.get("username") in ADMIN_USERS
+
+def show_profile_panel():
+    """관리자에게만 사이드바에 페이지 단계별 렌더링 시간 패널 표시"""
+    if not is_admin_user():
+        return
+    
+    with st.sidebar.expander("⏱️ 렌더링 프로파일"):
+        rows = get_page_profile()
+        if not rows:
+            st.caption("아직 기록된 측정값이 없습니다.")
+            return
+        
+        st.caption(f"단계별 최근 {PROFILE_WINDOW}회 기준 (ms)")
+        st.dataframe(pd.DataFrame(rows).round(2), hide_index=True, use_container_width=True)
+        st.download_button(
+            "JSON Lines로 내보내기",
+            _page_profiler.to_jsonl(),
+            file_name=f"page_profile_{datetime.now():%Y%m%d_%H%M%S}.jsonl",
+            mime="application/jsonl"
+        )
+        if st.button("측정값 초기화", key="profile_reset"):
+            _page_profiler.reset()
+            st.rerun()
+
 # 인증 관련 함수
 def change_page(page):
     """페이지 전환 함수"""
@@ -145,32 +374,28 @@ def change_page(page):
         st.session_state.transport_mode = None
 
 def authenticate_user(username, password):
-    """사용자 인증 함수"""
-    if "users" not in st.session_state:
+    """사용자 인증 함수 (그 사용자 기록만 읽음)"""
+    try:
+        return get_user_repository().authenticate(username, password)
+    except Exception as e:
+        print(f"사용자 인증 오류: {e}")
         return False
-    
-    return username in st.session_state.users and st.session_state.users[username] == password
 
 def register_user(username, password):
     """사용자 등록 함수"""
-    if "users" not in st.session_state:
-        st.session_state.users = {"admin": "admin"}
-    
-    if username in st.session_state.users:
+    # 저장소에는 사용자 행 하나만 추가 (이미 있거나 다른 세션이 먼저 등록했으면 실패)
+    try:
+        with profile_phase("session_save"):
+            if not get_user_repository().add_user(username, password):
+                return False
+    except Exception as e:
+        print(f"사용자 등록 저장 오류: {e}")
         return False
     
-    st.session_state.users[username] = password
-    
     # 신규 사용자 데이터 초기화
-    if "user_xp" not in st.session_state:
-        st.session_state.user_xp = {}
-    st.session_state.user_xp[username] = 0
-    
-    if "user_visits" not in st.session_state:
-        st.session_state.user_visits = {}
-    st.session_state.user_visits[username] = []
-    
-    save_session_data()
+    st.session_state.users = {username: password}
+    st.session_state.user_xp = {username: 0}
+    st.session_state.user_visits = {username: []}
     return True
 
 def logout_user():
@@ -190,9 +415,9 @@ def init_session_state():
     if "current_page" not in st.session_state:
         st.session_state.current_page = "login"
         
-    # 사용자 데이터
+    # 사용자 데이터 (로그인한 사용자 것만, load_session_data가 채움)
     if "users" not in st.session_state:
-        st.session_state.users = {"admin": "admin"}  # 기본 관리자 계정
+        st.session_state.users = {}
     if "user_xp" not in st.session_state:
         st.session_state.user_xp = {}
     if "user_visits" not in st.session_state:
@@ -218,586 +443,2805 @@ def init_session_state():
         except:
             st.session_state.google_maps_api_key = ""
     
+    # 지난 실행에서 그리지 않은 지도의 동기화 상태 정리
+    forget_unrendered_maps()
+    
     # 저장된 세션 데이터 로드
     load_session_data()
 
-def load_session_data():
-    """저장된 세션 데이터 로드"""
+def load_session_data(force=False):
+    """로그인한 사용자의 저장된 기록(비밀번호, 경험치)만 세션에 로드
+
+    다른 사용자 기록은 읽지 않으므로 비용이 전체 사용자 수와 무관하다.
+    방문 기록은 세션에 통째로 올리지 않고 필요한 페이지만 읽는다 (get_user_visits).
+    세션마다 한 번 로드하고, 이후 재실행에서는 저장소 변경 번호
+    (UserRepository.version)가 마지막 로드 때와 같으면 아무것도 읽지 않는다.
+    저장하지 못한 세션 변경(user_data_unsaved)이 있으면 먼저 저장소에 병합하고,
+    병합도 못 하면 세션 상태를 덮어쓰지 않는다.
+    """
+    username = st.session_state.get("username") if st.session_state.get("logged_in") else ""
+    if not username:
+        if st.session_state.get("user_data_version") is not None:
+            st.session_state.users = {}
+            st.session_state.user_visits = {}
+            st.session_state.user_xp = {}
+            st.session_state.user_data_version = None
+        return True
+    
+    loaded = st.session_state.get("user_data_version")
+    if loaded is not None and loaded[0] != username:
+        # 다른 사용자로 바뀌었으면 이전 사용자 세션 기록은 버림
+        st.session_state.user_visits = {}
+        st.session_state.user_data_unsaved = False
+    if st.session_state.get("user_data_unsaved") and not save_session_data(username):
+        return False
+    
     try:
-        if os.path.exists(SESSION_DATA_FILE):
-            with open(SESSION_DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # 데이터 복원
-                st.session_state.users = data.get("users", {"admin": "admin"})
-                st.session_state.user_visits = data.get("user_visits", {})
-                st.session_state.user_xp = data.get("user_xp", {})
-                return True
+        repository = get_user_repository()
+        version = (username, repository.version(username))
+        if not force and loaded == version:
+            return True
+        record = repository.get(username)
     except Exception as e:
         print(f"세션 데이터 로드 오류: {e}")
-    return False
+        return False
+    if record is None:
+        return False
+    
+    # 데이터 복원 (이 세션에서 추가한 방문 기록 목록은 그대로 둠)
+    st.session_state.users = {username: record["password"]}
+    st.session_state.user_visits = {username: st.session_state.get("user_visits", {}).get(username, [])}
+    st.session_state.user_xp = {username: record["xp"]}
+    st.session_state.user_data_version = version
+    return True
+
+def get_user_stats(username):
+    """사용자의 방문 통계 {"visits", "places", "visit_xp"} (없는 사용자면 모두 0)"""
+    record = get_user_repository().get(username)
+    if record is None:
+        return {"visits": 0, "places": 0, "visit_xp": 0}
+    return {name: record[name] for name in ("visits", "places", "visit_xp")}
+
+def get_user_visits(username, page=0, order=None, page_size=HISTORY_PAGE_SIZE):
+    """사용자 방문 기록 한 페이지 (order: None=기록 순, "recent"=최근순, "xp"=경험치순)"""
+    return get_user_repository().visits(username, page * page_size, page_size, order)
+
+def get_user_visit_points(username):
+    """방문 지도용: 사용자의 모든 방문 기록 (장소 이름, 좌표, 날짜, 경험치만)"""
+    return get_user_repository().visit_points(username)
 
-def save_session_data():
-    """세션 데이터 저장"""
+@profiled("session_save")
+def save_session_data(username=None):
+    """세션의 사용자 데이터를 저장소에 병합 (username이 주어지면 그 사용자만)
+
+    세션이 가진 사용자/방문 기록을 이벤트로 바꿔 저장소의 최신 내용에 반영하므로
+    그사이 다른 세션/프로세스가 저장한 사용자나 방문 기록을 덮어쓰지 않는다.
+    없는 사용자와 새 방문(같은 날 같은 장소가 아닌)만 추가되고, 경험치는
+    추가된 방문의 xp_gained만큼 오른다.
+    저장하지 못하면 user_data_unsaved를 표시해 두고, 다음 재실행의
+    load_session_data가 세션 상태를 덮어쓰기 전에 다시 저장한다.
+    """
     try:
-        # 데이터 폴더 생성
-        os.makedirs(os.path.dirname(SESSION_DATA_FILE), exist_ok=True)
-        
-        data = {
-            "users": st.session_state.users,
-            "user_visits": st.session_state.user_visits,
-            "user_xp": st.session_state.user_xp
-        }
-        
-        with open(SESSION_DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
+        usernames = [username] if username else list(st.session_state.users)
+        get_user_repository().apply_events(
+            _session_events(st.session_state.users, st.session_state.user_visits, usernames)
+        )
     except Exception as e:
         print(f"세션 데이터 저장 오류: {e}")
+        st.session_state.user_data_unsaved = True
         return False
+    st.session_state.user_data_unsaved = False
+    return True
+
+# 세션 저장소 관련 함수
+def _stat_token(path):
+    """파일 상태 (inode, 수정 시각, 크기). 파일이 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class _ChangeCounter:
+    """저장소 상태 표식(파일 상태나 변경 카운터)을 기억해 두고, 이 프로세스가 쓰지 않은
+    변경을 알아챌 때마다 version을 올림
 
-def load_excel_files(language="한국어"):
-    """데이터 폴더에서 모든 Excel 파일 로드"""
-    data_folder = Path("data")
-    all_markers = []
+    쓰기 전에 observe(쓰기 전 표식), 쓴 뒤에 own(쓴 뒤 표식)을 부르면
+    이 프로세스의 쓰기는 version을 올리지 않는다. 스레드가 엇갈리면 변경이
+    없는데도 올릴 수는 있지만 (다시 읽을 뿐) 변경을 놓치지는 않는다.
+    """
     
-    if not data_folder.exists():
-        st.warning("데이터 폴더가 존재하지 않습니다.")
-        return []
-        
-    # 모든 Excel 파일 찾기
-    excel_files = list(data_folder.glob("*.xlsx"))
+    def __init__(self):
+        self.token = None
+        self.version = 0
+        self._lock = threading.Lock()
     
-    if not excel_files:
-        st.warning("데이터 폴더에 Excel 파일이 없습니다.")
-        return []
+    def observe(self, token):
+        """기억한 표식과 다르면 version을 올리고 True"""
+        with self._lock:
+            if token == self.token:
+                return False
+            self.token = token
+            self.version += 1
+            return True
     
-    for file_path in excel_files:
-        try:
-            # 파일 카테고리 결정
-            file_category = "기타"
-            file_name = file_path.name.lower()
-            
-            for category, keywords in FILE_CATEGORIES.items():
-                if any(keyword.lower() in file_name for keyword in keywords):
-                    file_category = category
-                    break
-            
-            # 파일 로드
-            df = pd.read_excel(file_path, engine='openpyxl')
-            
-            # 데이터 전처리 및 마커 변환
-            markers = process_dataframe(df, file_category, language)
-            all_markers.extend(markers)
-            
-            st.success(f"{file_path.name}: {len(markers)}개 마커 로드")
-        
-        except Exception as e:
-            st.error(f"{file_path.name} 처리 오류: {str(e)}")
+    def own(self, token):
+        with self._lock:
+            self.token = token
+
+class JsonSessionStore:
+    """모든 사용자 데이터를 session_data.json 하나에 통째로 쓰는 저장소
+
+    사용자 등록이나 방문 기록 하나에도 파일 전체를 다시 읽고 쓰므로
+    쓰기 비용이 전체 사용자 × 방문 수에 비례한다.
+    쓰기는 파일 잠금(session_data.json.lock) 안에서 최신 파일을 다시 읽어
+    변경분을 반영한 뒤 임시 파일 + 이름 바꾸기로 교체하므로, 여러 세션/프로세스가
+    동시에 써도 서로의 기록을 잃지 않고 읽는 쪽은 반쯤 쓴 파일을 보지 않는다.
+    """
+    
+    def __init__(self, path=SESSION_DATA_FILE):
+        self.path = Path(path)
+        self._changes = _ChangeCounter()
+    
+    def load(self):
+        """(users, user_visits, user_xp) 반환 (파일이 없으면 기본 관리자 계정만)"""
+        if not self.path.exists():
+            return {"admin": "admin"}, {}, {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("users", {"admin": "admin"}), data.get("user_visits", {}), data.get("user_xp", {})
+    
+    def save(self, users, user_visits, user_xp):
+        """모든 사용자 데이터를 주어진 내용으로 바꿈"""
+        with _file_lock(self.path):
+            self._changes.observe(_stat_token(self.path))
+            _write_json_atomic(self.path, {"users": users, "user_visits": user_visits, "user_xp": user_xp})
+            self._changes.own(_stat_token(self.path))
+    
+    def apply_events(self, events):
+        """이벤트들을 최신 파일 내용에 반영 (한 번의 잠금/쓰기). 반환값: 반영된 이벤트 수"""
+        with _file_lock(self.path):
+            self._changes.observe(_stat_token(self.path))
+            state = self.load()
+            applied = sum(_apply_session_event(state, event) for event in events)
+            if applied:
+                _write_json_atomic(self.path, {"users": state[0], "user_visits": state[1], "user_xp": state[2]})
+                self._changes.own(_stat_token(self.path))
+        return applied
+    
+    def version(self):
+        """다른 프로세스가 파일을 바꾼 것을 알아챌 때마다 커지는 번호 (파일 stat 한 번)"""
+        self._changes.observe(_stat_token(self.path))
+        return self._changes.version
+    
+    def add_user(self, username, password):
+        """사용자 추가 (이미 있으면 False)"""
+        return self.apply_events([{"op": "user", "username": username, "password": password}]) == 1
+    
+    def add_visit(self, username, visit):
+        """방문 기록 추가와 경험치 적립 (같은 날 같은 장소를 이미 방문했으면 False)"""
+        return self.apply_events([{"op": "visit", "username": username, "visit": visit}]) == 1
     
-    return all_markers
+    def get_user(self, username):
+        """사용자 하나의 기록 {"password", "xp", "visits", "places", "visit_xp"} (없으면 None)
 
-def process_dataframe(df, category, language="한국어"):
-    """데이터프레임을 Google Maps 마커 형식으로 변환"""
-    markers = []
+        이 형식은 파일 전체를 읽어야 하므로 비용이 전체 사용자 수에 비례한다.
+        """
+        return _user_record(self.load(), username)
     
-    # 필수 열 확인: X좌표, Y좌표
-    if 'X좌표' not in df.columns or 'Y좌표' not in df.columns:
-        # 중국어 데이터의 경우 열 이름이 다를 수 있음
-        if 'X坐标' in df.columns and 'Y坐标' in df.columns:
-            df['X좌표'] = df['X坐标']
-            df['Y좌표'] = df['Y坐标']
-        else:
-            st.warning(f"'{category}' 데이터에 좌표 열이 없습니다.")
-            return []
+    def get_visits(self, username, offset=0, limit=None, order=None):
+        """사용자 방문 기록의 offset부터 limit개 (order: None=기록 순, "recent"=최근순, "xp"=경험치순)"""
+        return _page_visits(self.load()[1].get(username, []), offset, limit, order)
     
-    # 언어별 열 이름 결정
-    name_col = '명칭(한국어)'
-    if language == "영어" and '명칭(영어)' in df.columns:
-        name_col = '명칭(영어)'
-    elif language == "중국어" and '명칭(중국어)' in df.columns:
-        name_col = '명칭(중국어)'
+    def get_visit_points(self, username):
+        """사용자의 모든 방문 기록에서 지도 표시용 필드만 (기록 순)"""
+        return [{column: visit.get(column) for column in _VISIT_POINT_COLUMNS}
+                for visit in self.load()[1].get(username, [])]
+
+def _apply_session_event(state, event):
+    """(users, user_visits, user_xp)에 사용자 등록/방문 기록 이벤트 하나를 반영
+
+    이미 있는 사용자나 같은 날 같은 장소 방문은 무시하므로 같은 이벤트를
+    두 번 반영해도 결과가 같다. 반환값: 반영했으면 True
+    """
+    users, user_visits, user_xp = state
+    username = event["username"]
+    if event["op"] == "user":
+        if username in users:
+            return False
+        users[username] = event["password"]
+        user_xp.setdefault(username, 0)
+        user_visits.setdefault(username, [])
+        return True
+    if event["op"] == "visit":
+        visit = event["visit"]
+        visits = user_visits.setdefault(username, [])
+        if any(v["place_name"] == visit["place_name"] and v["date"] == visit["date"] for v in visits):
+            return False
+        visits.append(visit)
+        user_xp[username] = user_xp.get(username, 0) + visit["xp_gained"]
+        return True
+    return False
+
+def _write_json_atomic(path, data):
+    """임시 파일에 쓰고 fsync한 뒤 이름을 바꿔 path를 통째로 교체 (중간에 죽어도 이전 파일 유지)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+@contextmanager
+def _file_lock(path):
+    """path + ".lock" 파일로 잡는 배타 잠금
+
+    프로세스 사이는 물론, 같은 프로세스의 다른 스레드끼리도(잠글 때마다 파일을
+    새로 열므로) 배타적이다.
+    """
+    lock_path = Path(str(path) + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        try:
+            import fcntl
+        except ImportError:
+            # Windows: 첫 바이트 영역 잠금
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _session_events(users, user_visits, usernames):
+    """usernames 사용자의 등록/방문 기록 이벤트 (저장소에 병합할 사용자별 변경분)"""
+    for username in usernames:
+        if username in users:
+            yield {"op": "user", "username": username, "password": users[username]}
+        for visit in user_visits.get(username, ()):
+            yield {"op": "visit", "username": username, "visit": visit}
+
+def _user_record(state, username):
+    """(users, user_visits, user_xp)에서 사용자 하나의 기록 (get_user 반환 형식, 없으면 None)"""
+    users, user_visits, user_xp = state
+    if username not in users:
+        return None
+    visits = user_visits.get(username, [])
+    return {
+        "password": users[username],
+        "xp": user_xp.get(username, 0),
+        "visits": len(visits),
+        "places": len({visit["place_name"] for visit in visits}),
+        "visit_xp": sum(visit.get("xp_gained", 0) for visit in visits),
+    }
+
+# 방문 지도에 필요한 방문 기록 필드 (get_visit_points)
+_VISIT_POINT_COLUMNS = ("place_name", "latitude", "longitude", "date", "xp_gained")
+
+def _page_visits(visits, offset=0, limit=None, order=None):
+    """방문 기록 목록의 한 페이지 (order는 get_visits와 같음)"""
+    if order == "recent":
+        visits = sorted(visits, key=lambda visit: visit["timestamp"], reverse=True)
+    elif order == "xp":
+        visits = sorted(visits, key=lambda visit: visit.get("xp_gained", 0), reverse=True)
+    end = None if limit is None else offset + limit
+    return [dict(visit) for visit in visits[offset:end]]
+
+class JournalSessionStore:
+    """스냅숏(session_data.json 형식)과 추가 전용 저널(JSON Lines)로 된 저장소
+
+    사용자 등록/방문 기록은 메모리 상태에 반영하고 저널에 한 줄만 덧붙이므로
+    쓰기 비용이 사용자 수와 무관하다. 줄은 바로 OS에 넘기고(flush), fsync는
+    백그라운드 스레드가 JOURNAL_FSYNC_INTERVAL마다 모아서 한다 (전원이 꺼지면
+    마지막 간격의 쓰기를 잃을 수 있음).
+    같은 스레드가 저널이 JOURNAL_COMPACT_BYTES를 넘으면 저널을 .compacting으로
+    돌려 놓고 스냅숏 + .compacting을 새 스냅숏으로 접는다 (쓰기는 새 저널로 계속).
+    로드는 스냅숏 + .compacting + 저널 순서로 이벤트를 반영한다. 이벤트 반영은
+    여러 번 해도 결과가 같으므로 압축 도중에 죽어도 다시 로드하면 된다.
+    여러 프로세스가 같은 파일을 쓸 수 있도록 저널 덧붙이기/교체는 저널 파일 잠금,
+    압축과 로드는 .compacting 파일 잠금 안에서 한다. 다른 프로세스가 저널을
+    돌려 놓았으면(파일이 바뀌었으면) 새 저널을 열어 이어 쓴다. 메모리 상태는
+    프로세스마다 따로이므로, 스냅숏/저널 파일이 이 프로세스가 쓰지 않은 이유로
+    바뀐 것을 알아채면(version, 쓰기, 압축 때) 다음 읽기에서 다시 로드한다.
+    """
     
-    # 중국어 종로구 데이터 특별 처리
-    if category == "종로구 관광지" and language == "중국어":
-        if '名称' in df.columns:
-            name_col = '名称'
+    def __init__(self, path=SESSION_DATA_FILE, journal=SESSION_JOURNAL_FILE,
+                 compact_bytes=JOURNAL_COMPACT_BYTES, fsync_interval=JOURNAL_FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.journal = Path(journal)
+        self.compacting = self.journal.with_name(self.journal.name + ".compacting")
+        self.compact_bytes = compact_bytes
+        self.fsync_interval = fsync_interval
+        self._state = None
+        self._file = None
+        self._dirty = False
+        self._snapshot_changes = _ChangeCounter()
+        self._journal_changes = _ChangeCounter()
+        # 잠금 순서: _compact_lock -> _lock (쓰기는 _lock만, 파일 교체/fsync는 _compact_lock도)
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._worker = None
+        self._stop = threading.Event()
     
-    # 주소 열 결정
-    address_col = None
-    address_candidates = ['주소(한국어)', '주소', '소재지', '도로명주소', '지번주소']
-    if language == "영어":
-        address_candidates = ['주소(영어)'] + address_candidates
-    elif language == "중국어":
-        address_candidates = ['주소(중국어)', '地址'] + address_candidates
+    @staticmethod
+    def _read_events(path):
+        """저널 파일의 이벤트 (쓰다 만 마지막 줄 등 깨진 줄은 건너뜀)"""
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
     
-    for col in address_candidates:
-        if col in df.columns:
-            address_col = col
-            break
+    @staticmethod
+    def _ends_with_newline(path):
+        """파일이 비었거나 줄바꿈으로 끝나는지 (아니면 쓰다 만 줄이 남아 있음)"""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
     
-    # 유효한 좌표 데이터만 사용
-    df = df.dropna(subset=['X좌표', 'Y좌표'])
-    valid_coords = (df['X좌표'] >= 124) & (df['X좌표'] <= 132) & (df['Y좌표'] >= 33) & (df['Y좌표'] <= 43)
-    df = df[valid_coords]
+    def _ensure_loaded(self):
+        if self._state is not None:
+            return
+        with self._compact_lock, _file_lock(self.compacting), self._lock, _file_lock(self.journal):
+            if self._state is None:
+                state = JsonSessionStore(self.path).load()
+                for path in (self.compacting, self.journal):
+                    for event in self._read_events(path):
+                        _apply_session_event(state, event)
+                self._state = state
+                self._snapshot_changes.own(_stat_token(self.path))
+                self._journal_changes.own(_stat_token(self.journal))
     
-    # 마커 색상 결정
-    color = CATEGORY_COLORS.get(category, "gray")
+    def load(self):
+        """(users, user_visits, user_xp) 반환 (호출한 쪽이 고쳐도 되는 복사본)"""
+        self._ensure_loaded()
+        with self._lock:
+            return copy.deepcopy(self._state)
     
-    # 각 행을 마커로 변환
-    for _, row in df.iterrows():
+    def _journal_replaced(self):
+        """열어 둔 저널 파일이 다른 프로세스의 압축으로 돌려 놓였는지 (저널 파일 잠금 안에서 호출)"""
         try:
-            # 기본 정보
-            name = row[name_col] if name_col in row and pd.notna(row[name_col]) else "이름 없음"
-            lat = float(row['Y좌표'])
-            lng = float(row['X좌표'])
-            
-            # 주소 정보
-            address = ""
-            if address_col and address_col in row and pd.notna(row[address_col]):
-                address = row[address_col]
-            
-            # 추가 정보 (있는 경우)
-            info = ""
-            if address:
-                info += f"주소: {address}<br>"
-            
-            # 전화번호 (있는 경우)
-            for tel_col in ['전화번호', 'TELNO', '연락처']:
-                if tel_col in row and pd.notna(row[tel_col]):
-                    info += f"전화: {row[tel_col]}<br>"
-                    break
-            
-            # 마커 생성
-            marker = {
-                'lat': lat,
-                'lng': lng,
-                'title': name,
-                'color': color,
-                'category': category,
-                'info': info
-            }
-            markers.append(marker)
+            current = os.stat(self.journal)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self._file.fileno())
+        return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+    
+    def apply_events(self, events):
+        """이벤트들을 메모리 상태에 반영하고 반영된 것만 저널에 한 줄씩 덧붙임
+
+        중복 사용자/방문 검사는 저널 파일 잠금을 잡고 다른 프로세스의 기록까지
+        반영한 상태에서 한다 (바뀌었으면 다시 로드한 뒤 처음부터).
+        반환값: 반영된 이벤트 수
+        """
+        events = list(events)
+        while True:
+            self._ensure_loaded()
+            with self._lock, _file_lock(self.journal):
+                if self._state is None:
+                    # 그사이 다른 스레드가 다시 로드하도록 표시함
+                    continue
+                external = self._journal_changes.observe(_stat_token(self.journal))
+                external = self._snapshot_changes.observe(_stat_token(self.path)) or external
+                if external:
+                    # 다른 프로세스의 기록이 있으므로 파일에서 다시 로드한 뒤 검사
+                    self._state = None
+                    continue
+                lines = [json.dumps(event, ensure_ascii=False) + "\n"
+                         for event in events if _apply_session_event(self._state, event)]
+                if not lines:
+                    return 0
+                if self._file is not None and self._journal_replaced():
+                    # 돌려 놓인 파일에 쓴 내용은 이미 OS에 넘어가 있어 압축하는 쪽이 읽는다
+                    self._file.close()
+                    self._file = None
+                if self._file is None:
+                    self.journal.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.journal, "a", encoding="utf-8")
+                    # 쓰다 만 마지막 줄에 이어 쓰지 않도록 줄을 끊음
+                    if not self._ends_with_newline(self.journal):
+                        self._file.write("\n")
+                self._file.write("".join(lines))
+                self._file.flush()
+                self._journal_changes.own(_stat_token(self.journal))
+                self._dirty = True
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="session-journal", daemon=True)
+                    self._worker.start()
+                    atexit.register(self.close)
+            return len(lines)
+    
+    def add_user(self, username, password):
+        """사용자 추가 (이미 있으면 False)"""
+        return self.apply_events([{"op": "user", "username": username, "password": password}]) == 1
+    
+    def add_visit(self, username, visit):
+        """방문 기록 추가와 경험치 적립 (같은 날 같은 장소를 이미 방문했으면 False)"""
+        return self.apply_events([{"op": "visit", "username": username, "visit": visit}]) == 1
+    
+    def get_user(self, username):
+        """사용자 하나의 기록 {"password", "xp", "visits", "places", "visit_xp"} (없으면 None)"""
+        self._ensure_loaded()
+        with self._lock:
+            return _user_record(self._state, username)
+    
+    def get_visits(self, username, offset=0, limit=None, order=None):
+        """사용자 방문 기록의 offset부터 limit개 (order: None=기록 순, "recent"=최근순, "xp"=경험치순)"""
+        self._ensure_loaded()
+        with self._lock:
+            return _page_visits(self._state[1].get(username, []), offset, limit, order)
+    
+    def get_visit_points(self, username):
+        """사용자의 모든 방문 기록에서 지도 표시용 필드만 (기록 순)"""
+        self._ensure_loaded()
+        with self._lock:
+            return [{column: visit.get(column) for column in _VISIT_POINT_COLUMNS}
+                    for visit in self._state[1].get(username, [])]
+    
+    def save(self, users, user_visits, user_xp):
+        """모든 사용자 데이터를 주어진 내용으로 바꿈 (스냅숏을 새로 쓰고 저널 비움)"""
+        with self._compact_lock, _file_lock(self.compacting), self._lock, _file_lock(self.journal):
+            self._close_journal()
+            self._snapshot_changes.observe(_stat_token(self.path))
+            self._journal_changes.observe(_stat_token(self.journal))
+            state = copy.deepcopy((users, user_visits, user_xp))
+            _write_json_atomic(self.path, {"users": state[0], "user_visits": state[1], "user_xp": state[2]})
+            for path in (self.compacting, self.journal):
+                if path.exists():
+                    path.unlink()
+            self._state = state
+            self._snapshot_changes.own(_stat_token(self.path))
+            self._journal_changes.own(None)
+    
+    def _close_journal(self):
+        # _compact_lock과 _lock을 잡은 상태에서 호출
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._dirty = False
+    
+    def sync(self):
+        """저널에 쓴 줄을 디스크에 기록 (fsync)"""
+        with self._compact_lock:
+            with self._lock:
+                if self._file is None or not self._dirty:
+                    return
+                self._dirty = False
+                fd = self._file.fileno()
+            # fsync 동안 쓰기를 막지 않음 (파일은 _compact_lock을 잡아야 닫을 수 있음)
+            os.fsync(fd)
+    
+    def compact(self):
+        """저널을 스냅숏으로 접어 넣음"""
+        with self._compact_lock, _file_lock(self.compacting):
+            with self._lock, _file_lock(self.journal):
+                self._close_journal()
+                external = self._journal_changes.observe(_stat_token(self.journal))
+                if self.journal.exists():
+                    if self.compacting.exists():
+                        # 이전 압축이 끝나지 못했으면 남은 것 뒤에 이어 붙여 함께 접음
+                        separator = b"" if self._ends_with_newline(self.compacting) else b"\n"
+                        with open(self.compacting, "ab") as target, open(self.journal, "rb") as source:
+                            target.write(separator + source.read())
+                            target.flush()
+                            os.fsync(target.fileno())
+                        self.journal.unlink()
+                    else:
+                        os.replace(self.journal, self.compacting)
+                self._journal_changes.own(None)
+                if external:
+                    self._state = None
+            if not self.compacting.exists():
+                return
             
-        except Exception as e:
-            print(f"마커 생성 오류: {e}")
-            continue
+            # 이 아래는 쓰기를 막지 않음 (새 이벤트는 새 저널로)
+            external = self._snapshot_changes.observe(_stat_token(self.path))
+            state = JsonSessionStore(self.path).load()
+            for event in self._read_events(self.compacting):
+                _apply_session_event(state, event)
+            _write_json_atomic(self.path, {"users": state[0], "user_visits": state[1], "user_xp": state[2]})
+            self._snapshot_changes.own(_stat_token(self.path))
+            self.compacting.unlink()
+            if external:
+                with self._lock:
+                    self._state = None
+    
+    def version(self):
+        """다른 프로세스가 스냅숏/저널을 바꾼 것을 알아챌 때마다 커지는 번호 (파일 stat 두 번)"""
+        with self._lock:
+            if self._state is not None:
+                external = self._snapshot_changes.observe(_stat_token(self.path))
+                external = self._journal_changes.observe(_stat_token(self.journal)) or external
+                if external:
+                    self._state = None
+        return self._snapshot_changes.version + self._journal_changes.version
     
-    return markers
+    def _run(self):
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.sync()
+                if self.journal.exists() and self.journal.stat().st_size >= self.compact_bytes:
+                    self.compact()
+            except Exception as e:
+                print(f"세션 저널 기록 오류: {e}")
+    
+    def close(self):
+        """백그라운드 스레드를 멈추고 저널을 디스크에 기록"""
+        self._stop.set()
+        with self._compact_lock, self._lock:
+            self._close_journal()
 
-# 경험치 및 레벨 관련 함수
-def calculate_level(xp):
-    """레벨 계산 함수"""
-    return int(xp / XP_PER_LEVEL) + 1
+# SQLite 스키마: 사용자/방문 기록/경험치 테이블, 사용자별 날짜·장소 조회(중복 방문 검사) 인덱스,
+# 초기화/가져오기 기록과 변경 카운터(쓰기 트랜잭션마다 1씩 증가)용 meta 테이블
+_SESSION_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS visits (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    place_name TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    timestamp TEXT,
+    date TEXT NOT NULL,
+    xp_gained INTEGER NOT NULL DEFAULT 0,
+    rating INTEGER
+);
+CREATE INDEX IF NOT EXISTS visits_username_date ON visits (username, date);
+CREATE INDEX IF NOT EXISTS visits_username_place ON visits (username, place_name);
+CREATE TABLE IF NOT EXISTS user_xp (
+    username TEXT PRIMARY KEY,
+    xp INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+"""
+_VISIT_COLUMNS = ("place_name", "latitude", "longitude", "timestamp", "date", "xp_gained", "rating")
 
-def calculate_xp_percentage(xp):
-    """경험치 비율 계산 (다음 레벨까지)"""
-    current_level = calculate_level(xp)
-    xp_for_current_level = (current_level - 1) * XP_PER_LEVEL
-    xp_for_next_level = current_level * XP_PER_LEVEL
+class SqliteSessionStore:
+    """SQLite(WAL 모드) 사용자 데이터 저장소
+
+    사용자 등록은 행 하나, 방문 기록은 행 하나 삽입과 경험치 갱신이라
+    쓰기 비용이 전체 사용자 수와 무관하다. WAL 모드라 읽기가 쓰기를 기다리지 않는다.
+    연결은 저장소마다 하나만 열어 모든 스레드가 잠금(_lock)을 잡고 나눠 쓴다
+    (Streamlit은 재실행마다 새 스레드에서 스크립트를 실행하므로 스레드별 연결은
+    재실행마다 새로 열리고 닫히지 않는다). 연결은 프로세스 종료 때 닫는다.
+    처음 열 때 데이터베이스가 비어 있으면 legacy_json(이전 session_data.json)을
+    가져오고, 그 파일도 없으면 기본 관리자 계정을 만든다.
+    """
     
-    xp_in_current_level = xp - xp_for_current_level
-    xp_needed_for_next = xp_for_next_level - xp_for_current_level
+    def __init__(self, path=SESSION_DB_FILE, legacy_json=SESSION_DATA_FILE):
+        self.path = Path(path)
+        self.legacy_json = Path(legacy_json) if legacy_json else None
+        self._conn = None
+        # 연결 하나를 스레드들이 나눠 쓰므로 조회/트랜잭션 전체를 이 잠금 안에서 실행
+        self._lock = threading.RLock()
+        self._changes = _ChangeCounter()
     
-    return int((xp_in_current_level / xp_needed_for_next) * 100)
+    def _connect(self):
+        # _lock을 잡은 상태에서 호출
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: 자동 커밋, 쓰기 트랜잭션은 _write에서 직접 시작
+            conn = sqlite3.connect(str(self.path), timeout=SESSION_DB_TIMEOUT, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._prepare(conn)
+            self._conn = conn
+            atexit.register(self.close)
+        return self._conn
+    
+    @contextmanager
+    def _read(self):
+        """조회용 연결 (잠금을 잡은 동안만 사용)"""
+        with self._lock:
+            yield self._connect()
+    
+    def close(self):
+        """연결 닫기 (다시 쓰면 새로 연다)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def _prepare(self, conn):
+        """스키마 생성과 최초 1회 초기화 (이전 JSON 가져오기 또는 기본 관리자 계정)"""
+        conn.executescript(_SESSION_DB_SCHEMA)
+        with self._write(conn):
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone():
+                return
+            if self.legacy_json and self.legacy_json.exists():
+                self._replace(conn, *JsonSessionStore(self.legacy_json).load())
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_from', ?)", (str(self.legacy_json),))
+            elif not conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+                conn.execute("INSERT INTO users VALUES ('admin', 'admin')")
+            conn.execute("INSERT INTO meta VALUES ('initialized', ?)", (datetime.now().isoformat(timespec="seconds"),))
+    
+    @contextmanager
+    def _write(self, conn=None):
+        """쓰기 트랜잭션 (시작할 때 쓰기 잠금을 잡아 검사와 쓰기 사이에 끼어들지 못하게 함)
 
-def add_visit(username, place_name, lat, lng):
-    """방문 기록 추가"""
-    if username not in st.session_state.user_visits:
-        st.session_state.user_visits[username] = []
+        트랜잭션마다 meta의 변경 카운터를 1 올린다 (version 참고).
+        """
+        with self._lock:
+            conn = conn or self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                counter = self._counter(conn)
+                self._changes.observe(counter)
+                yield conn
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self._changes.own(counter + 1)
     
-    # XP 획득
-    if username not in st.session_state.user_xp:
-        st.session_state.user_xp[username] = 0
+    @staticmethod
+    def _counter(conn):
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
     
-    xp_gained = PLACE_XP.get(place_name, 10)  # 기본 10XP, 장소별로 다른 XP
-    st.session_state.user_xp[username] += xp_gained
+    def version(self):
+        """다른 프로세스가 쓴 것을 알아챌 때마다 커지는 번호 (meta 행 하나 조회)"""
+        with self._read() as conn:
+            self._changes.observe(self._counter(conn))
+        return self._changes.version
     
-    # 방문 데이터 생성
-    visit_data = {
-        "place_name": place_name,
-        "latitude": lat,
-        "longitude": lng,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "date": datetime.now().strftime("%Y-%m-%d"),
-        "xp_gained": xp_gained,
-        "rating": None
-    }
+    def load(self):
+        """(users, user_visits, user_xp) 반환"""
+        with self._read() as conn:
+            users = dict(conn.execute("SELECT username, password FROM users"))
+            user_visits = {}
+            for row in conn.execute(f"SELECT username, {', '.join(_VISIT_COLUMNS)} FROM visits ORDER BY id"):
+                user_visits.setdefault(row[0], []).append(dict(zip(_VISIT_COLUMNS, row[1:])))
+            user_xp = dict(conn.execute("SELECT username, xp FROM user_xp"))
+        return users, user_visits, user_xp
     
-    # 중복 방문 검사 (같은 날, 같은 장소)
-    is_duplicate = False
-    for visit in st.session_state.user_visits[username]:
-        if (visit["place_name"] == place_name and 
-            visit["date"] == visit_data["date"]):
-            is_duplicate = True
-            break
+    def save(self, users, user_visits, user_xp):
+        """모든 사용자 데이터를 주어진 내용으로 바꿈 (한 트랜잭션)"""
+        with self._write() as conn:
+            self._replace(conn, users, user_visits, user_xp)
     
-    if not is_duplicate:
-        st.session_state.user_visits[username].append(visit_data)
-        save_session_data()  # 방문 기록 저장
-        return True, xp_gained
-    return False, 0
-
-def get_location_position():
-    """사용자의 현재 위치를 반환"""
-    try:
-        from streamlit_js_eval import get_geolocation
-        
-        location = get_geolocation()
-        if location and "coords" in location:
-            return [location["coords"]["latitude"], location["coords"]["longitude"]]
-    except Exception as e:
-        st.warning(f"위치 정보를 가져올 수 없습니다: {e}")
-        
-    return DEFAULT_LOCATION  # 기본 위치 (서울시청)
+    def _replace(self, conn, users, user_visits, user_xp):
+        conn.execute("DELETE FROM users")
+        conn.execute("DELETE FROM visits")
+        conn.execute("DELETE FROM user_xp")
+        conn.executemany("INSERT INTO users VALUES (?, ?)", users.items())
+        conn.executemany(
+            f"INSERT INTO visits (username, {', '.join(_VISIT_COLUMNS)}) VALUES ({', '.join('?' * (len(_VISIT_COLUMNS) + 1))})",
+            [(username, *(visit.get(column) for column in _VISIT_COLUMNS))
+             for username, visits in user_visits.items() for visit in visits]
+        )
+        conn.executemany("INSERT INTO user_xp VALUES (?, ?)", user_xp.items())
+    
+    def apply_events(self, events):
+        """사용자 등록/방문 기록 이벤트들을 한 트랜잭션으로 반영. 반환값: 반영된 이벤트 수"""
+        applied = 0
+        with self._write() as conn:
+            for event in events:
+                if event["op"] == "user":
+                    applied += self._add_user(conn, event["username"], event["password"])
+                elif event["op"] == "visit":
+                    applied += self._add_visit(conn, event["username"], event["visit"])
+        return applied
+    
+    def add_user(self, username, password):
+        """사용자 추가 (이미 있으면 False)"""
+        with self._write() as conn:
+            return self._add_user(conn, username, password)
+    
+    def add_visit(self, username, visit):
+        """방문 기록 추가와 경험치 적립 (같은 날 같은 장소를 이미 방문했으면 False)"""
+        with self._write() as conn:
+            return self._add_visit(conn, username, visit)
+    
+    def get_user(self, username):
+        """사용자 하나의 기록 {"password", "xp", "visits", "places", "visit_xp"} (없으면 None)"""
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT password, COALESCE(xp, 0) FROM users LEFT JOIN user_xp USING (username) WHERE username = ?",
+                (username,)
+            ).fetchone()
+            if row is None:
+                return None
+            visits, places, visit_xp = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT place_name), COALESCE(SUM(xp_gained), 0) FROM visits WHERE username = ?",
+                (username,)
+            ).fetchone()
+        return {"password": row[0], "xp": row[1], "visits": visits, "places": places, "visit_xp": visit_xp}
+    
+    def get_visits(self, username, offset=0, limit=None, order=None):
+        """사용자 방문 기록의 offset부터 limit개 (order: None=기록 순, "recent"=최근순, "xp"=경험치순)"""
+        order_by = {None: "id", "recent": "timestamp DESC, id", "xp": "xp_gained DESC, id"}[order]
+        with self._read() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(_VISIT_COLUMNS)} FROM visits WHERE username = ? ORDER BY {order_by} LIMIT ? OFFSET ?",
+                (username, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [dict(zip(_VISIT_COLUMNS, row)) for row in rows]
+    
+    def get_visit_points(self, username):
+        """사용자의 모든 방문 기록에서 지도 표시용 필드만 (기록 순)"""
+        with self._read() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(_VISIT_POINT_COLUMNS)} FROM visits WHERE username = ? ORDER BY id", (username,)
+            ).fetchall()
+        return [dict(zip(_VISIT_POINT_COLUMNS, row)) for row in rows]
+    
+    def _add_user(self, conn, username, password):
+        if conn.execute("INSERT OR IGNORE INTO users VALUES (?, ?)", (username, password)).rowcount == 0:
+            return False
+        conn.execute("INSERT OR IGNORE INTO user_xp VALUES (?, 0)", (username,))
+        return True
+    
+    def _add_visit(self, conn, username, visit):
+        if conn.execute(
+            "SELECT 1 FROM visits WHERE username = ? AND date = ? AND place_name = ? LIMIT 1",
+            (username, visit["date"], visit["place_name"])
+        ).fetchone():
+            return False
+        conn.execute(
+            f"INSERT INTO visits (username, {', '.join(_VISIT_COLUMNS)}) VALUES ({', '.join('?' * (len(_VISIT_COLUMNS) + 1))})",
+            (username, *(visit.get(column) for column in _VISIT_COLUMNS))
+        )
+        conn.execute(
+            "INSERT INTO user_xp VALUES (?, ?) ON CONFLICT (username) DO UPDATE SET xp = xp + excluded.xp",
+            (username, visit["xp_gained"])
+        )
+        return True
+    
+    def import_json(self, path=SESSION_DATA_FILE):
+        """session_data.json 내용으로 데이터베이스를 바꿈 (이전 형식에서 옮길 때)
 
-# Google Maps 관련 함수
-def create_google_maps_html(api_key, center_lat, center_lng, markers=None, zoom=13, language="ko"):
-    """Google Maps HTML 생성"""
-    if markers is None:
-        markers = []
-    
-    # 카테고리별 마커 그룹화
-    categories = {}
-    for marker in markers:
-        category = marker.get('category', '기타')
-        if category not in categories:
-            categories[category] = []
-        categories[category].append(marker)
-    
-    # 범례 HTML
-    legend_items = []
-    for category, color in CATEGORY_COLORS.items():
-        # 해당 카테고리의 마커가 있는 경우만 표시
-        if any(m.get('category') == category for m in markers):
-            count = sum(1 for m in markers if m.get('category') == category)
-            legend_items.append(f'<div class="legend-item"><img src="http://maps.google.com/mapfiles/ms/icons/{color}-dot.png" alt="{category}"> {category} ({count})</div>')
-    
-    legend_html = "".join(legend_items)
-    
-    # 마커 JavaScript 코드 생성
-    markers_js = ""
-    for i, marker in enumerate(markers):
-        color = marker.get('color', 'red')
-        title = marker.get('title', '').replace("'", "\\'").replace('"', '\\"')
-        info = marker.get('info', '').replace("'", "\\'").replace('"', '\\"')
-        category = marker.get('category', '').replace("'", "\\'").replace('"', '\\"')
-        
-        # 마커 아이콘 URL
-        icon_url = f"http://maps.google.com/mapfiles/ms/icons/{color}-dot.png"
-        
-        # 정보창 HTML 내용
-        info_content = f"""
-            <div style="padding: 10px; max-width: 300px;">
-                <h3 style="margin-top: 0; color: #1976D2;">{title}</h3>
-                <p><strong>분류:</strong> {category}</p>
-                <div>{info}</div>
-            </div>
+        반환값: 가져온 사용자 수와 방문 기록 수
         """
-        
-        # 마커 생성 코드
-        markers_js += f"""
-            var marker{i} = new google.maps.Marker({{
-                position: {{ lat: {marker['lat']}, lng: {marker['lng']} }},
-                map: map,
-                title: '{title}',
-                icon: '{icon_url}',
-                animation: google.maps.Animation.DROP
-            }});
-            
-            markers.push(marker{i});
-            markerCategories.push('{category}');
-            
-            var infowindow{i} = new google.maps.InfoWindow({{
-                content: '{info_content}'
-            }});
-            
-            marker{i}.addListener('click', function() {{
-                closeAllInfoWindows();
-                infowindow{i}.open(map, marker{i});
-                
-                // 마커 바운스 애니메이션
-                if (currentMarker) currentMarker.setAnimation(null);
-                marker{i}.setAnimation(google.maps.Animation.BOUNCE);
-                currentMarker = marker{i};
-                
-                // 애니메이션 종료
-                setTimeout(function() {{
-                    marker{i}.setAnimation(null);
-                }}, 1500);
-                
-                // 부모 창에 마커 클릭 이벤트 전달
-                window.parent.postMessage({{
-                    'type': 'marker_click',
-                    'id': {i},
-                    'title': '{title}',
-                    'lat': {marker['lat']},
-                    'lng': {marker['lng']},
-                    'category': '{category}'
-                }}, '*');
-            }});
-            
-            infoWindows.push(infowindow{i});
+        users, user_visits, user_xp = JsonSessionStore(path).load()
+        with self._write() as conn:
+            self._replace(conn, users, user_visits, user_xp)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_from', ?)", (str(path),))
+        return {"users": len(users), "visits": sum(len(visits) for visits in user_visits.values())}
+
+# 백엔드 이름 -> 저장소 클래스 (SESSION_STORE_BACKEND로 선택)
+SESSION_STORE_BACKENDS = {
+    "sqlite": SqliteSessionStore,
+    "journal": JournalSessionStore,
+    "json": JsonSessionStore,
+}
+_session_stores = {}
+_session_stores_lock = threading.Lock()
+
+def get_session_store(backend=None):
+    """프로세스 전역 세션 저장소 (backend가 None이면 SESSION_STORE_BACKEND)"""
+    backend = backend or SESSION_STORE_BACKEND
+    with _session_stores_lock:
+        store = _session_stores.get(backend)
+        if store is None:
+            if backend not in SESSION_STORE_BACKENDS:
+                raise ValueError(f"알 수 없는 세션 저장소 백엔드: {backend}")
+            store = _session_stores[backend] = SESSION_STORE_BACKENDS[backend]()
+    return store
+
+class UserRepository:
+    """사용자 기록을 필요할 때 하나씩 읽는 세션 저장소 앞단
+
+    로그인/재실행에는 그 사용자의 기록(비밀번호, 경험치, 방문 통계)만 읽고,
+    최근에 쓴 사용자 기록 size개를 LRU로 캐시한다. 이 저장소를 거친 쓰기는
+    해당 사용자 캐시를 지우고, 저장소 변경 번호(store.version)가 바뀌면
+    (다른 프로세스가 썼으면) 캐시 전체를 지운다. 방문 기록 목록은 캐시하지 않고
+    페이지 단위로 읽는다.
+    """
+    
+    def __init__(self, store, size=USER_CACHE_SIZE):
+        self.store = store
+        self.size = size
+        self._records = OrderedDict()
+        self._store_version = None
+        self._writes = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+    
+    def _check(self):
+        version = self.store.version()
+        with self._lock:
+            if version != self._store_version:
+                self._records.clear()
+                self._store_version = version
+    
+    def version(self, username=None):
+        """(저장소 변경 번호, 이 프로세스에서 username 기록을 쓴 횟수)
+
+        username 기록이 바뀌었을 수 있으면 달라진다 (세션이 다시 읽을지 판단하는 데 사용).
         """
+        self._check()
+        with self._lock:
+            return self._store_version, self._writes.get(username, 0)
     
-    # 필터링 함수
-    filter_js = """
-        function filterMarkers(category) {
-            for (var i = 0; i < markers.length; i++) {
-                if (category === 'all' || markerCategories[i] === category) {
-                    markers[i].setVisible(true);
-                } else {
-                    markers[i].setVisible(false);
-                }
-            }
-            
-            // 필터 버튼 활성화 상태 업데이트
-            document.querySelectorAll('.filter-button').forEach(function(btn) {
-                btn.classList.remove('active');
-            });
-            document.getElementById('filter-' + category).classList.add('active');
-        }
-    """
+    def get(self, username):
+        """사용자 기록 {"password", "xp", "visits", "places", "visit_xp"} (없으면 None)"""
+        self._check()
+        with self._lock:
+            record = self._records.get(username)
+            if record is not None:
+                self._records.move_to_end(username)
+                self.stats["hits"] += 1
+                return dict(record)
+            self.stats["misses"] += 1
+        record = self.store.get_user(username)
+        if record is not None:
+            with self._lock:
+                self._records[username] = record
+                self._records.move_to_end(username)
+                while len(self._records) > self.size:
+                    self._records.popitem(last=False)
+            record = dict(record)
+        return record
     
-    # 마커 클러스터링 코드
-    clustering_js = """
-        // 마커 클러스터링
-        var markerCluster = new MarkerClusterer(map, markers, {
-            imagePath: 'https://developers.google.com/maps/documentation/javascript/examples/markerclusterer/m',
-            maxZoom: 15,
-            gridSize: 50
-        });
-    """
-    
-    # 전체 HTML 코드 생성
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>서울 관광 지도</title>
-        <meta charset="utf-8">
-        <style>
-            #map {{
-                height: 100%;
-                width: 100%;
-                margin: 0;
-                padding: 0;
-            }}
-            html, body {{
-                height: 100%;
-                margin: 0;
-                padding: 0;
-                font-family: 'Noto Sans KR', Arial, sans-serif;
-            }}
-            .map-controls {{
-                position: absolute;
-                top: 10px;
-                left: 10px;
-                z-index: 5;
-                background-color: white;
-                padding: 10px;
-                border-radius: 5px;
-                box-shadow: 0 2px 6px rgba(0,0,0,.3);
-                max-width: 90%;
-                overflow-x: auto;
-                white-space: nowrap;
-            }}
-            .filter-button {{
-                margin: 5px;
-                padding: 5px 10px;
-                background-color: #f8f9fa;
-                border: 1px solid #dadce0;
-                border-radius: 4px;
-                cursor: pointer;
-            }}
-            .filter-button:hover {{
-                background-color: #e8eaed;
-            }}
-            .filter-button.active {{
-                background-color: #1976D2;
-                color: white;
-            }}
-            #legend {{
-                font-family: 'Noto Sans KR', Arial, sans-serif;
-                background-color: white;
-                border: 1px solid #ccc;
-                border-radius: 5px;
-                bottom: 25px;
-                box-shadow: 0 2px 6px rgba(0,0,0,.3);
-                font-size: 12px;
-                padding: 10px;
-                position: absolute;
-                right: 10px;
-                z-index: 5;
-            }}
-            .legend-item {{
-                margin-bottom: 5px;
-                display: flex;
-                align-items: center;
-            }}
-            .legend-item img {{
-                width: 20px;
-                height: 20px;
-                margin-right: 5px;
-            }}
-            .custom-control {{
-                background-color: #fff;
-                border: 0;
-                border-radius: 2px;
-                box-shadow: 0 1px 4px -1px rgba(0, 0, 0, 0.3);
-                margin: 10px;
-                padding: 0 0.5em;
-                font: 400 18px Roboto, Arial, sans-serif;
-                overflow: hidden;
-                height: 40px;
-                cursor: pointer;
-            }}
-        </style>
-        <script src="https://developers.google.com/maps/documentation/javascript/examples/markerclusterer/markerclusterer.js"></script>
-    </head>
-    <body>
-        <div id="map"></div>
-        
-        <!-- 카테고리 필터 -->
-        <div class="map-controls" id="category-filter">
-            <div style="margin-bottom: 8px; font-weight: bold;">카테고리 필터</div>
-            <button id="filter-all" class="filter-button active" onclick="filterMarkers('all')">전체 보기</button>
-            {' '.join([f'<button id="filter-{cat}" class="filter-button" onclick="filterMarkers(\'{cat}\')">{cat}</button>' for cat in categories.keys()])}
-        </div>
-        
-        <!-- 지도 범례 -->
-        <div id="legend">
-            <div style="font-weight: bold; margin-bottom: 8px;">지도 범례</div>
-            {legend_html}
-        </div>
-        
-        <script>
-            // 지도 변수
-            var map;
-            var markers = [];
-            var markerCategories = [];
-            var infoWindows = [];
-            var currentMarker = null;
-            
-            // 모든 정보창 닫기
-            function closeAllInfoWindows() {{
-                for (var i = 0; i < infoWindows.length; i++) {{
-                    infoWindows[i].close();
-                }}
-            }}
-            
-            function initMap() {{
-                // 지도 생성
-                map = new google.maps.Map(document.getElementById('map'), {{
-                    center: {{ lat: {center_lat}, lng: {center_lng} }},
-                    zoom: {zoom},
-                    fullscreenControl: true,
-                    mapTypeControl: true,
-                    streetViewControl: true,
-                    zoomControl: true,
-                    mapTypeId: 'roadmap'
-                }});
-                
-                // 현재 위치 버튼 추가
-                const locationButton = document.createElement("button");
-                locationButton.textContent = "📍 내 위치";
-                locationButton.classList.add("custom-control");
-                locationButton.addEventListener("click", () => {{
-                    if (navigator.geolocation) {{
-                        navigator.geolocation.getCurrentPosition(
-                            (position) => {{
-                                const pos = {{
-                                    lat: position.coords.latitude,
-                                    lng: position.coords.longitude,
-                                }};
-                                
-                                // 부모 창에 현재 위치 전달
-                                window.parent.postMessage({{
-                                    'type': 'current_location',
-                                    'lat': pos.lat,
-                                    'lng': pos.lng
-                                }}, '*');
-                                
-                                map.setCenter(pos);
-                                map.setZoom(15);
-                                
-                                // 현재 위치 마커 추가
-                                new google.maps.Marker({{
-                                    position: pos,
-                                    map: map,
-                                    title: '내 위치',
-                                    icon: {{
-                                        path: google.maps.SymbolPath.CIRCLE,
-                                        fillColor: '#4285F4',
-                                        fillOpacity: 1,
-                                        strokeColor: '#FFFFFF',
-                                        strokeWeight: 2,
-                                        scale: 8
-                                    }}
-                                }});
-                            }},
-                            () => {{
-                                alert("위치 정보를 가져오는데 실패했습니다.");
-                            }}
-                        );
-                    }} else {{
-                        alert("이 브라우저에서는 위치 정보 기능을 지원하지 않습니다.");
-                    }}
-                }});
-                
-                map.controls[google.maps.ControlPosition.TOP_RIGHT].push(locationButton);
-                
-                // 범례를 지도에 추가
-                map.controls[google.maps.ControlPosition.RIGHT_BOTTOM].push(
-                    document.getElementById('legend')
-                );
-                
-                // 마커 추가
-                {markers_js}
-                
-                // 마커 클러스터링
-                {clustering_js}
-                
-                // 필터링 함수
-                {filter_js}
-                
-                // 지도 클릭 이벤트
-                map.addListener('click', function(event) {{
-                    // 열린 정보창 닫기
-                    closeAllInfoWindows();
-                    
-                    // 바운스 애니메이션 중지
-                    if (currentMarker) currentMarker.setAnimation(null);
-                    
-                    // 클릭 이벤트 데이터 전달
-                    window.parent.postMessage({{
-                        'type': 'map_click',
-                        'lat': event.latLng.lat(),
-                        'lng': event.latLng.lng()
-                    }}, '*');
-                }});
-            }}
-        </script>
-        <script src="https://maps.googleapis.com/maps/api/js?key={api_key}&callback=initMap&language={language}" async defer></script>
-    </body>
-    </html>
-    """
-    
-    return html
-
-def show_google_map(api_key, center_lat, center_lng, markers=None, zoom=13, height=600, language="한국어"):
-    """Google Maps 컴포넌트 표시"""
-    # 언어 코드 변환
-    lang_code = LANGUAGE_CODES.get(language, "ko")
-    
-    # HTML 생성
-    map_html = create_google_maps_html(
-        api_key=api_key,
-        center_lat=center_lat,
-        center_lng=center_lng,
-        markers=markers,
-        zoom=zoom,
-        language=lang_code
-    )
+    def authenticate(self, username, password):
+        record = self.get(username)
+        return record is not None and record["password"] == password
+    
+    def visits(self, username, offset=0, limit=None, order=None):
+        """사용자 방문 기록 한 페이지 (캐시하지 않음)"""
+        return self.store.get_visits(username, offset, limit, order)
     
-    # HTML 컴포넌트로 표시
-    st.components.v1.html(map_html, height=height, scrolling=False)
+    def visit_points(self, username):
+        """사용자의 모든 방문 기록 중 지도 표시용 필드 (캐시하지 않음)"""
+        return self.store.get_visit_points(username)
+    
+    def invalidate(self, username=None):
+        """사용자(None이면 전부) 캐시 지우기"""
+        with self._lock:
+            if username is None:
+                self._records.clear()
+            else:
+                self._records.pop(username, None)
+    
+    def _written(self, usernames):
+        with self._lock:
+            for username in usernames:
+                self._records.pop(username, None)
+                self._writes[username] = self._writes.get(username, 0) + 1
+    
+    def add_user(self, username, password):
+        try:
+            return self.store.add_user(username, password)
+        finally:
+            self._written([username])
+    
+    def add_visit(self, username, visit):
+        try:
+            return self.store.add_visit(username, visit)
+        finally:
+            self._written([username])
+    
+    def apply_events(self, events):
+        events = list(events)
+        try:
+            return self.store.apply_events(events)
+        finally:
+            self._written({event["username"] for event in events})
+
+_user_repositories = {}
+
+def get_user_repository(backend=None):
+    """프로세스 전역 사용자 저장소 (get_session_store 앞단, 백엔드마다 하나)"""
+    backend = backend or SESSION_STORE_BACKEND
+    store = get_session_store(backend)
+    with _session_stores_lock:
+        repository = _user_repositories.get(backend)
+        if repository is None:
+            repository = _user_repositories[backend] = UserRepository(store)
+    return repository
+
+# 카탈로그 캐시: (파일 경로, 수정 시각, 크기) -> 다국어 MarkerStore
+# 모듈 전역에 두므로 Streamlit 재실행과 세션 간에 공유된다
+_catalog_cache = {}
+_catalog_cache_stats = {"hits": 0, "misses": 0}
+_catalog_cache_lock = threading.Lock()
+
+class ReadWriteLock:
+    """읽기는 여러 스레드가 동시에, 쓰기는 하나의 스레드만 허용하는 잠금"""
+    
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+    
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._condition:
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+# 프로세스 전역 공유 카탈로그: 파일별 캐시 키 목록과 합쳐진 다국어 MarkerStore
+# 세션은 복사본 대신 이 MarkerStore(의 언어별 뷰)에 대한 참조만 보관한다
+_shared_catalog = {"keys": None, "store": None}
+_shared_catalog_lock = ReadWriteLock()
+
+def get_shared_catalog(language=None):
+    """현재 프로세스에 로드된 공유 카탈로그 반환 (없으면 None, 파일 I/O 없음)"""
+    with _shared_catalog_lock.read():
+        catalog = _shared_catalog["store"]
+    if catalog is None or language is None:
+        return catalog
+    return catalog.with_language(language)
+
+def _publish_shared_catalog(keys, stores):
+    """파일별 저장소를 합쳐 공유 카탈로그로 등록
+
+    파일 구성이 그대로면 이미 등록된 MarkerStore를 그대로 돌려주므로
+    모든 세션이 같은 객체를 참조한다.
+    """
+    keys = tuple(keys)
+    with _shared_catalog_lock.read():
+        if _shared_catalog["keys"] == keys:
+            return _shared_catalog["store"]
+    
+    with _shared_catalog_lock.write():
+        # 다른 스레드가 먼저 등록했는지 다시 확인
+        if _shared_catalog["keys"] != keys:
+            catalog = MarkerStore.concat(stores)
+            # 주변 장소/검색 질의가 첫 요청을 기다리지 않도록 로드 시점에 인덱스 생성
+            catalog.spatial_index()
+            catalog.search_index()
+            catalog.cluster_pyramid()
+            catalog.cluster_pyramid(by_category=True)
+            _shared_catalog["store"] = catalog
+            _shared_catalog["keys"] = keys
+        return _shared_catalog["store"]
+
+def detect_file_category(file_name):
+    """파일명으로 데이터 카테고리 결정"""
+    file_name = file_name.lower()
+    for category, keywords in FILE_CATEGORIES.items():
+        if any(keyword.lower() in file_name for keyword in keywords):
+            return category
+    return "기타"
+
+def _file_fingerprint(file_path):
+    """캐시 키로 사용할 파일 지문 (절대 경로, 수정 시각, 크기)"""
+    stat = os.stat(file_path)
+    return (str(Path(file_path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+def sidecar_path(file_path):
+    """Excel 파일에 대응하는 사이드카 파일 경로"""
+    return Path(file_path).with_suffix(SIDECAR_SUFFIX)
+
+def _frame_for_sidecar(df):
+    """Arrow로 저장할 수 있도록 혼합 타입 열을 문자열로 정규화"""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+def write_sidecar(file_path, df=None):
+    """Excel 파일을 컬럼형 사이드카로 변환하여 원본 옆에 저장"""
+    import pyarrow.feather as feather
+    
+    if df is None:
+        df = pd.read_excel(file_path, engine='openpyxl')
+    
+    target = sidecar_path(file_path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    # 메모리 매핑이 가능하도록 비압축으로 저장 후 원자적으로 교체
+    feather.write_feather(_frame_for_sidecar(df), str(tmp_path), compression="uncompressed")
+    os.replace(tmp_path, target)
+    return target
+
+def read_source_frame(file_path):
+    """원본 데이터프레임 읽기
+
+    Excel보다 새로운 사이드카가 있으면 메모리 매핑으로 읽고,
+    없거나 오래된 경우 Excel을 파싱한 뒤 사이드카를 새로 만든다.
+    """
+    target = sidecar_path(file_path)
+    try:
+        if target.exists() and target.stat().st_mtime_ns >= os.stat(file_path).st_mtime_ns:
+            import pyarrow.feather as feather
+            return feather.read_table(str(target), memory_map=True).to_pandas()
+    except Exception as e:
+        print(f"사이드카 읽기 오류 ({target.name}): {e}")
+    
+    df = pd.read_excel(file_path, engine='openpyxl')
+    
+    try:
+        write_sidecar(file_path, df)
+    except Exception as e:
+        # 읽기 전용 폴더이거나 pyarrow가 없으면 Excel만 사용
+        print(f"사이드카 생성 오류 ({target.name}): {e}")
+    
+    return df
+
+def build_sidecars(data_folder=DATA_FOLDER):
+    """데이터 폴더의 모든 Excel 파일을 사이드카로 일괄 변환 (1회성 변환 단계)"""
+    results = {}
+    for file_path in sorted(Path(data_folder).glob("*.xlsx")):
+        try:
+            results[file_path.name] = str(write_sidecar(file_path))
+        except Exception as e:
+            results[file_path.name] = f"오류: {e}"
+    return results
+
+def get_catalog_cache_stats():
+    """카탈로그 캐시 적중/실패 횟수 및 항목 수 반환"""
+    with _catalog_cache_lock:
+        return {**_catalog_cache_stats, "entries": len(_catalog_cache)}
+
+def clear_catalog_cache():
+    """카탈로그 캐시, 공유 카탈로그 및 통계 초기화"""
+    with _catalog_cache_lock:
+        _catalog_cache.clear()
+        _catalog_cache_stats["hits"] = 0
+        _catalog_cache_stats["misses"] = 0
+    with _shared_catalog_lock.write():
+        _shared_catalog["keys"] = None
+        _shared_catalog["store"] = None
+
+def _catalog_cache_key(file_path):
+    """파일 지문으로 캐시 키 생성 (모든 언어를 한 항목에 보관하므로 언어는 제외)"""
+    return _file_fingerprint(file_path)
+
+def _catalog_cache_get(key):
+    """캐시 조회 (적중/실패 횟수 기록)"""
+    with _catalog_cache_lock:
+        markers = _catalog_cache.get(key)
+        if markers is not None:
+            _catalog_cache_stats["hits"] += 1
+        else:
+            _catalog_cache_stats["misses"] += 1
+        return markers
+
+def _catalog_cache_put(key, markers):
+    """캐시 저장 (같은 파일의 이전 버전 항목만 무효화)"""
+    with _catalog_cache_lock:
+        stale_keys = [k for k in _catalog_cache if k[0] == key[0] and k != key]
+        for stale_key in stale_keys:
+            del _catalog_cache[stale_key]
+        _catalog_cache[key] = markers
+
+def parse_workbook_markers(file_path):
+    """Excel 파일 하나를 파싱하여 다국어 MarkerStore 생성
+
+    캐시를 사용하지 않으며, 병렬 수집 시 워커 프로세스에서 실행된다.
+    """
+    file_category = detect_file_category(Path(file_path).name)
+    df = read_source_frame(file_path)
+    return dataframe_to_store(df, file_category)
+
+def load_workbook_markers(file_path, language="한국어"):
+    """Excel 파일 하나를 MarkerStore로 변환 (캐시 사용)
+
+    반환값: (주어진 언어의 MarkerStore, 캐시 적중 여부)
+    """
+    key = _catalog_cache_key(file_path)
+    markers = _catalog_cache_get(key)
+    if markers is not None:
+        return markers.with_language(language), True
+    
+    markers = parse_workbook_markers(file_path)
+    _catalog_cache_put(key, markers)
+    return markers.with_language(language), False
+
+def _ingest_pool_context():
+    """워커 프로세스 시작 방식 결정
+
+    스레드가 많은 Streamlit 서버 프로세스를 그대로 fork하지 않도록
+    forkserver(utils 미리 로드) 또는 spawn을 사용한다.
+    """
+    import multiprocessing
+    
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["utils"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+def _parse_workbooks_parallel(file_paths):
+    """여러 Excel 파일을 프로세스 풀에서 파싱
+
+    반환값: 파일 순서대로 MarkerStore 또는 예외 객체
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    max_workers = min(len(file_paths), INGEST_MAX_WORKERS or os.cpu_count() or 1)
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=_ingest_pool_context()) as executor:
+        futures = [executor.submit(parse_workbook_markers, str(file_path)) for file_path in file_paths]
+        # 제출 순서대로 결과를 모아 병합 순서를 고정
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+    return results
+
+def _parse_workbooks_serial(file_paths):
+    """여러 Excel 파일을 순서대로 파싱 (반환 형식은 병렬 버전과 동일)"""
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append(parse_workbook_markers(file_path))
+        except Exception as e:
+            results.append(e)
+    return results
+
+@profiled("data_load")
+def load_excel_files(language="한국어", parallel=None):
+    """데이터 폴더에서 모든 Excel 파일 로드
+
+    parallel이 None이면 다시 파싱할 파일 수와 CPU 코어 수를 보고
+    프로세스 풀 사용 여부를 자동으로 정한다.
+    모든 언어를 한 번에 추출하므로 language는 반환할 뷰의 언어만 정한다.
+    반환값은 모든 파일의 마커를 합친 읽기 전용 MarkerStore이며,
+    파일이 바뀌지 않았으면 프로세스 전역 공유 카탈로그(의 언어별 뷰)와 같은 객체다.
+    """
+    data_folder = Path(DATA_FOLDER)
+    stores = []
+    
+    if not data_folder.exists():
+        st.warning("데이터 폴더가 존재하지 않습니다.")
+        return MarkerStore.empty()
+        
+    # 모든 Excel 파일 찾기 (병합 순서를 고정하기 위해 정렬)
+    excel_files = sorted(data_folder.glob("*.xlsx"))
+    
+    if not excel_files:
+        st.warning("데이터 폴더에 Excel 파일이 없습니다.")
+        return MarkerStore.empty()
+    
+    # 캐시 조회: 변경되지 않은 파일은 다시 파싱하지 않음
+    results = {}
+    file_keys = {}
+    pending = []
+    for file_path in excel_files:
+        try:
+            key = _catalog_cache_key(file_path)
+        except Exception as e:
+            results[file_path] = e
+            continue
+        file_keys[file_path] = key
+        markers = _catalog_cache_get(key)
+        if markers is not None:
+            results[file_path] = (markers, True)
+        else:
+            pending.append((file_path, key))
+    
+    if parallel is None:
+        parallel = len(pending) >= PARALLEL_INGEST_MIN_FILES and (os.cpu_count() or 1) > 1
+    
+    pending_paths = [file_path for file_path, _ in pending]
+    parsed = []
+    if parallel and len(pending) > 1:
+        try:
+            parsed = _parse_workbooks_parallel(pending_paths)
+        except Exception as e:
+            # 프로세스 풀을 만들 수 없는 환경이면 순차 처리
+            print(f"병렬 수집 오류, 순차 처리로 전환: {e}")
+    if len(parsed) != len(pending):
+        parsed = _parse_workbooks_serial(pending_paths)
+    
+    for (file_path, key), result in zip(pending, parsed):
+        if isinstance(result, Exception):
+            results[file_path] = result
+        else:
+            _catalog_cache_put(key, result)
+            results[file_path] = (result, False)
+    
+    # 파일 순서대로 병합 및 결과 표시 (메인 프로세스에서만 st 호출)
+    loaded_keys = []
+    failed = False
+    for file_path in excel_files:
+        result = results[file_path]
+        if isinstance(result, Exception):
+            st.error(f"{file_path.name} 처리 오류: {str(result)}")
+            failed = True
+            continue
+        
+        markers, cached = result
+        stores.append(markers)
+        loaded_keys.append(file_keys[file_path])
+        st.success(f"{file_path.name}: {len(markers)}개 마커 로드" + (" (캐시)" if cached else ""))
+    
+    # 일부 파일이 실패한 결과는 공유하지 않음
+    if failed:
+        return MarkerStore.concat(stores).with_language(language)
+    return _publish_shared_catalog(loaded_keys, stores).with_language(language)
+
+def resolve_marker_columns(columns, category, language="한국어"):
+    """언어별 이름/주소 열과 전화번호 열을 한 번에 결정
+
+    반환값: (이름 열, 주소 열 또는 None, 존재하는 전화번호 열 목록)
+    """
+    columns = set(columns)
+    
+    # 언어별 열 이름 결정
+    name_col = '명칭(한국어)'
+    if language == "영어" and '명칭(영어)' in columns:
+        name_col = '명칭(영어)'
+    elif language == "중국어" and '명칭(중국어)' in columns:
+        name_col = '명칭(중국어)'
+    
+    # 중국어 종로구 데이터 특별 처리
+    if category == "종로구 관광지" and language == "중국어":
+        if '名称' in columns:
+            name_col = '名称'
+    
+    # 주소 열 결정
+    address_col = None
+    address_candidates = ['주소(한국어)', '주소', '소재지', '도로명주소', '지번주소']
+    if language == "영어":
+        address_candidates = ['주소(영어)'] + address_candidates
+    elif language == "중국어":
+        address_candidates = ['주소(중국어)', '地址'] + address_candidates
+    
+    for col in address_candidates:
+        if col in columns:
+            address_col = col
+            break
+    
+    tel_cols = [col for col in TEL_COLUMNS if col in columns]
+    
+    return name_col, address_col, tel_cols
+
+def _valid_coordinate_rows(df, category):
+    """좌표 열을 확인하고 유효한 좌표의 행만 반환 (좌표 열이 없으면 None)"""
+    # 필수 열 확인: X좌표, Y좌표
+    if 'X좌표' not in df.columns or 'Y좌표' not in df.columns:
+        # 중국어 데이터의 경우 열 이름이 다를 수 있음
+        if 'X坐标' in df.columns and 'Y坐标' in df.columns:
+            df['X좌표'] = df['X坐标']
+            df['Y좌표'] = df['Y坐标']
+        else:
+            st.warning(f"'{category}' 데이터에 좌표 열이 없습니다.")
+            return None
+    
+    # 유효한 좌표 데이터만 사용
+    df = df.dropna(subset=['X좌표', 'Y좌표'])
+    valid_coords = (df['X좌표'] >= 124) & (df['X좌표'] <= 132) & (df['Y좌표'] >= 33) & (df['Y좌표'] <= 43)
+    return df[valid_coords]
+
+def _language_columns(df, category, language="한국어"):
+    """유효한 행에 대해 언어별 이름/정보창/주소 열 생성
+
+    열 이름은 한 번만 결정하고, 이름/주소/전화번호/정보창 문자열은
+    행 단위 반복 없이 열 단위 연산으로 만든다.
+    반환값: (이름 배열, 정보창 배열, 주소 배열(없으면 빈 문자열))
+    """
+    name_col, address_col, tel_cols = resolve_marker_columns(df.columns, category, language)
+    
+    # 이름 (없으면 "이름 없음")
+    if name_col in df.columns:
+        names = df[name_col].astype(object)
+        names = names.where(names.notna(), "이름 없음").to_numpy()
+    else:
+        names = np.full(len(df), "이름 없음", dtype=object)
+    
+    # 주소 정보
+    info = np.full(len(df), "", dtype=object)
+    address_values = np.full(len(df), "", dtype=object)
+    if address_col and len(df):
+        addresses = df[address_col].astype(object)
+        has_address = (addresses.notna() & addresses.astype(bool)).to_numpy()
+        address_values = np.where(has_address, addresses.astype(str).to_numpy(), address_values)
+        address_text = ("주소: " + addresses.astype(str) + "<br>").to_numpy()
+        info = np.where(has_address, address_text, info)
+    
+    # 전화번호 (앞선 후보 열이 비어 있는 행만 다음 열로 채움)
+    if tel_cols and len(df):
+        phones = df[tel_cols[0]].astype(object)
+        for tel_col in tel_cols[1:]:
+            phones = phones.where(phones.notna(), df[tel_col].astype(object))
+        phone_text = ("전화: " + phones.astype(str) + "<br>").to_numpy()
+        info = info + np.where(phones.notna().to_numpy(), phone_text, "")
+    
+    return names, info, address_values
+
+def process_dataframe(df, category, language="한국어"):
+    """데이터프레임을 Google Maps 마커 형식으로 변환"""
+    df = _valid_coordinate_rows(df, category)
+    if df is None:
+        return []
+    
+    names, info, _ = _language_columns(df, category, language)
+    
+    # 마커 색상 결정
+    color = CATEGORY_COLORS.get(category, "gray")
+    
+    # 마커 생성
+    return [
+        {
+            'lat': lat,
+            'lng': lng,
+            'title': name,
+            'color': color,
+            'category': category,
+            'info': marker_info
+        }
+        for lat, lng, name, marker_info in zip(
+            df['Y좌표'].astype(float).tolist(), df['X좌표'].astype(float).tolist(), names.tolist(), info.tolist()
+        )
+    ]
+
+def dataframe_to_store(df, category, languages=LANGUAGES):
+    """데이터프레임을 다국어 MarkerStore로 변환
+
+    좌표 필터링은 한 번만 하고 언어별 이름/정보창 열을 함께 추출하므로,
+    이후 언어 전환은 파일 I/O 없이 열 선택만으로 끝난다.
+    """
+    df = _valid_coordinate_rows(df, category)
+    if df is None:
+        return MarkerStore.empty()
+    
+    titles = {}
+    infos = {}
+    addresses = {}
+    for language in languages:
+        titles[language], infos[language], addresses[language] = _language_columns(df, category, language)
+    
+    return MarkerStore.from_columns(
+        df['Y좌표'].to_numpy(dtype=float), df['X좌표'].to_numpy(dtype=float),
+        titles, infos, category, CATEGORY_COLORS.get(category, "gray"), addresses
+    )
+
+# 마커 저장소 관련 클래스
+# 마커 dict가 가지는 키 (MarkerView가 노출하는 키 순서)
+MARKER_FIELDS = ('lat', 'lng', 'title', 'color', 'category', 'info')
+
+def _intern_strings(values):
+    """문자열 배열을 intern하여 같은 문자열은 하나의 객체만 참조하도록 함"""
+    return np.array([sys.intern(v) if type(v) is str else v for v in values], dtype=object)
+
+def _digest(*parts):
+    """문자열/바이트 조각들의 짧은 해시 (캐시 키와 버전 토큰용)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def _readonly(array):
+    """세션 간 공유를 위해 배열을 읽기 전용으로 표시"""
+    array.flags.writeable = False
+    return array
+
+class MarkerView(Mapping):
+    """MarkerStore의 한 행을 읽기 전용 dict처럼 보여주는 뷰
+
+    marker['title'], marker.get('category') 등 기존 마커 dict 사용 코드를
+    그대로 지원한다.
+    """
+    __slots__ = ("_store", "_index")
+    
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+    
+    def __getitem__(self, key):
+        return self._store.field(key, self._index)
+    
+    def __iter__(self):
+        return iter(MARKER_FIELDS)
+    
+    def __len__(self):
+        return len(MARKER_FIELDS)
+    
+    def __repr__(self):
+        return f"MarkerView({dict(self)!r})"
+
+class MarkerStore(Sequence):
+    """마커 목록을 열 단위 배열로 보관하는 읽기 전용 저장소
+
+    위도/경도는 float64 배열, 카테고리와 색상은 작은 정수 코드와 코드표,
+    이름/정보창/주소는 언어별로 intern된 문자열 배열로 보관한다. 배열은 읽기
+    전용이라 여러 세션이 복사 없이 같은 저장소를 참조할 수 있다.
+    인덱싱/반복 시에는 현재 언어의 MarkerView(읽기 전용 dict 뷰)를 돌려준다.
+    """
+    
+    def __init__(self, lat, lng, titles, infos, category_codes, categories, color_codes, colors, language=None, addresses=None):
+        self.lat = _readonly(np.asarray(lat, dtype=np.float64))
+        self.lng = _readonly(np.asarray(lng, dtype=np.float64))
+        # 언어 -> 문자열 배열
+        self.titles_by_language = {lang: _readonly(np.asarray(values, dtype=object)) for lang, values in titles.items()}
+        self.infos_by_language = {lang: _readonly(np.asarray(values, dtype=object)) for lang, values in infos.items()}
+        # 주소는 검색 인덱스용 (없으면 빈 문자열)
+        if addresses is None:
+            addresses = {lang: np.full(len(self.lat), "", dtype=object) for lang in self.titles_by_language}
+        self.addresses_by_language = {lang: _readonly(np.asarray(values, dtype=object)) for lang, values in addresses.items()}
+        self.category_codes = _readonly(np.asarray(category_codes, dtype=np.int16))
+        self.categories = tuple(categories)
+        self.color_codes = _readonly(np.asarray(color_codes, dtype=np.int16))
+        self.colors = tuple(colors)
+        self.language = language if language in self.titles_by_language else next(iter(self.titles_by_language), None)
+        # 언어별 뷰 (with_language 결과를 재사용)
+        self._language_views = {}
+        # 언어와 무관한 파생 인덱스 (얕은 복사로 모든 언어 뷰가 공유)
+        self._indexes = {}
+    
+    @property
+    def titles(self):
+        """현재 언어의 이름 배열"""
+        return self.titles_by_language[self.language]
+    
+    @property
+    def infos(self):
+        """현재 언어의 정보창 배열"""
+        return self.infos_by_language[self.language]
+    
+    @property
+    def addresses(self):
+        """현재 언어의 주소 배열"""
+        return self.addresses_by_language[self.language]
+    
+    @property
+    def languages(self):
+        """저장소에 들어 있는 언어 목록"""
+        return tuple(self.titles_by_language)
+    
+    @classmethod
+    def empty(cls):
+        """빈 저장소"""
+        return cls([], [], {None: []}, {None: []}, [], (), [], ())
+    
+    @classmethod
+    def from_columns(cls, lats, lngs, titles, infos, category, color, addresses=None):
+        """한 카테고리의 열 데이터로 저장소 생성 (titles/infos/addresses는 언어 -> 배열)"""
+        count = len(lats)
+        return cls(
+            lats, lngs,
+            {lang: _intern_strings(values) for lang, values in titles.items()},
+            {lang: _intern_strings(values) for lang, values in infos.items()},
+            np.zeros(count, dtype=np.int16), (category,),
+            np.zeros(count, dtype=np.int16), (color,),
+            addresses=None if addresses is None else {lang: _intern_strings(values) for lang, values in addresses.items()}
+        )
+    
+    @classmethod
+    def from_markers(cls, markers, language="한국어"):
+        """마커 dict 목록으로 저장소 생성 (주어진 언어의 이름으로 취급)"""
+        categories = {}
+        colors = {}
+        lats, lngs, titles, infos, category_codes, color_codes = [], [], [], [], [], []
+        for marker in markers:
+            category = marker.get('category', '기타')
+            color = marker.get('color', CATEGORY_COLORS.get(category, "gray"))
+            lats.append(marker['lat'])
+            lngs.append(marker['lng'])
+            titles.append(marker.get('title', ''))
+            infos.append(marker.get('info', ''))
+            category_codes.append(categories.setdefault(category, len(categories)))
+            color_codes.append(colors.setdefault(color, len(colors)))
+        return cls(
+            lats, lngs, {language: _intern_strings(titles)}, {language: _intern_strings(infos)},
+            category_codes, categories.keys(), color_codes, colors.keys(), language
+        )
+    
+    @classmethod
+    def concat(cls, stores):
+        """여러 저장소를 하나로 합침
+
+        카테고리/색상 코드표는 병합하여 재매핑하고, 어떤 저장소에 없는
+        언어는 그 저장소의 현재 언어 값으로 채운다.
+        """
+        stores = [store for store in stores if len(store)]
+        if not stores:
+            return cls.empty()
+        if len(stores) == 1:
+            return stores[0]
+        
+        languages = []
+        for store in stores:
+            languages.extend(lang for lang in store.languages if lang not in languages)
+        
+        categories = {}
+        colors = {}
+        category_codes = []
+        color_codes = []
+        for store in stores:
+            category_map = np.array([categories.setdefault(c, len(categories)) for c in store.categories], dtype=np.int16)
+            color_map = np.array([colors.setdefault(c, len(colors)) for c in store.colors], dtype=np.int16)
+            category_codes.append(category_map[store.category_codes])
+            color_codes.append(color_map[store.color_codes])
+        
+        combined = cls(
+            np.concatenate([store.lat for store in stores]),
+            np.concatenate([store.lng for store in stores]),
+            {lang: np.concatenate([store.titles_by_language.get(lang, store.titles) for store in stores]) for lang in languages},
+            {lang: np.concatenate([store.infos_by_language.get(lang, store.infos) for store in stores]) for lang in languages},
+            np.concatenate(category_codes), categories.keys(),
+            np.concatenate(color_codes), colors.keys(),
+            stores[0].language,
+            {lang: np.concatenate([store.addresses_by_language.get(lang, store.addresses) for store in stores]) for lang in languages}
+        )
+        # 합친 저장소의 버전과 카테고리 집계는 원본에서 유도 (문자열 재해시/재집계 없음)
+        combined._indexes["version"] = _digest("concat", *(store.version for store in stores))
+        combined._indexes["category_stats"] = _merge_category_stats([store.category_stats() for store in stores])
+        return combined
+    
+    def with_language(self, language):
+        """같은 배열을 공유하면서 다른 언어를 보여주는 저장소 (파일 I/O 없음)
+
+        저장소에 없는 언어면 자기 자신을 돌려준다.
+        """
+        if language == self.language or language not in self.titles_by_language:
+            return self
+        views = self._language_views
+        views.setdefault(self.language, self)
+        view = views.get(language)
+        if view is None:
+            view = copy.copy(self)
+            view.language = language
+            # 모든 언어 뷰가 같은 캐시를 공유
+            view._language_views = views
+            views[language] = view
+        return view
+    
+    def take(self, indices):
+        """주어진 인덱스의 마커만 담은 새 저장소 (문자열 객체는 공유)"""
+        indices = np.asarray(indices, dtype=np.intp)
+        subset = MarkerStore(
+            self.lat[indices], self.lng[indices],
+            {lang: values[indices] for lang, values in self.titles_by_language.items()},
+            {lang: values[indices] for lang, values in self.infos_by_language.items()},
+            self.category_codes[indices], self.categories,
+            self.color_codes[indices], self.colors,
+            self.language,
+            {lang: values[indices] for lang, values in self.addresses_by_language.items()}
+        )
+        subset._indexes["version"] = _digest("take", self.version, indices.tobytes())
+        return subset
+    
+    @property
+    def version(self):
+        """마커 집합의 내용 버전 (내용과 현재 언어가 같으면 같은 값)
+
+        처음 요청할 때 배열 내용을 한 번 해시하고 모든 언어 뷰가 공유한다.
+        concat/take로 만든 저장소는 원본 버전에서 바로 유도한다.
+        """
+        content = self._indexes.get("version")
+        if content is None:
+            parts = [self.lat.tobytes(), self.lng.tobytes(), self.category_codes.tobytes(), self.color_codes.tobytes(),
+                     json.dumps([self.categories, self.colors], ensure_ascii=False)]
+            for field in (self.titles_by_language, self.infos_by_language, self.addresses_by_language):
+                for lang, values in field.items():
+                    parts.append(str(lang))
+                    parts.append("\x1f".join(map(str, values)))
+            content = self._indexes["version"] = _digest(*parts)
+        return f"{content}:{self.language}"
+    
+    def category_stats(self):
+        """카테고리별 개수/경계 상자/중심점 (처음 호출 시 한 번 집계)
+
+        반환값: {카테고리: {"count", "bbox": (남, 서, 북, 동), "centroid": (위도, 경도)}}
+        카테고리는 마커에 처음 나타나는 순서다.
+        """
+        stats = self._indexes.get("category_stats")
+        if stats is None:
+            stats = self._indexes["category_stats"] = _aggregate_categories(self)
+        return stats
+    
+    def search_index(self):
+        """이름/주소 검색 인덱스 (처음 호출 시 한 번만 생성)"""
+        index = self._indexes.get("search")
+        if index is None:
+            index = self._indexes["search"] = PlaceSearchIndex(self)
+        return index
+    
+    def spatial_index(self):
+        """위도/경도 격자 인덱스 (처음 호출 시 한 번만 생성)"""
+        index = self._indexes.get("spatial")
+        if index is None:
+            index = self._indexes["spatial"] = SpatialGridIndex(self.lat, self.lng)
+        return index
+    
+    def cluster_pyramid(self, by_category=False):
+        """줌 레벨별 마커 클러스터 피라미드 (처음 호출 시 한 번만 생성)
+
+        by_category가 True면 카테고리별로 따로 묶은 피라미드 (카테고리 필터용)
+        """
+        name = "category_clusters" if by_category else "clusters"
+        pyramid = self._indexes.get(name)
+        if pyramid is None:
+            pyramid = self._indexes[name] = ClusterPyramid(self.lat, self.lng, self.category_codes, len(self.categories),
+                                                           by_category=by_category)
+        return pyramid
+    
+    def field(self, key, index):
+        """index번째 마커의 key 값 (현재 언어 기준)"""
+        if key == 'lat':
+            return float(self.lat[index])
+        if key == 'lng':
+            return float(self.lng[index])
+        if key == 'title':
+            return self.titles[index]
+        if key == 'color':
+            return self.colors[self.color_codes[index]]
+        if key == 'category':
+            return self.categories[self.category_codes[index]]
+        if key == 'info':
+            return self.infos[index]
+        raise KeyError(key)
+    
+    def _arrays(self):
+        """저장소가 보관하는 모든 배열"""
+        return [self.lat, self.lng, self.category_codes, self.color_codes,
+                *self.titles_by_language.values(), *self.infos_by_language.values(),
+                *self.addresses_by_language.values()]
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_language_views"] = {}
+        return state
+    
+    def __setstate__(self, state):
+        # 워커 프로세스에서 전달받은 배열도 다시 읽기 전용으로 표시
+        self.__dict__.update(state)
+        for array in self._arrays():
+            _readonly(array)
+    
+    def __len__(self):
+        return len(self.lat)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MarkerStore index out of range")
+        return MarkerView(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield MarkerView(self, index)
+    
+    def nbytes(self):
+        """배열이 차지하는 바이트 수 (문자열 객체 자체는 제외)"""
+        return sum(array.nbytes for array in self._arrays())
+    
+    def __repr__(self):
+        return f"MarkerStore({len(self)} markers, language={self.language!r}, categories={list(self.categories)})"
+
+def _aggregate_categories(store):
+    """카테고리 코드로 한 번 정렬하여 개수/경계 상자/중심점을 함께 집계"""
+    codes = store.category_codes
+    if not len(codes):
+        return {}
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    counts = np.diff(np.r_[starts, len(codes)])
+    lat = store.lat[order]
+    lng = store.lng[order]
+    south, north = np.minimum.reduceat(lat, starts), np.maximum.reduceat(lat, starts)
+    west, east = np.minimum.reduceat(lng, starts), np.maximum.reduceat(lng, starts)
+    lat_mean = np.add.reduceat(lat, starts) / counts
+    lng_mean = np.add.reduceat(lng, starts) / counts
+    
+    # 안정 정렬이라 각 구간의 첫 원소가 그 카테고리의 첫 등장 위치
+    stats = {}
+    for i in np.argsort(order[starts]):
+        stats[store.categories[sorted_codes[starts[i]]]] = {
+            "count": int(counts[i]),
+            "bbox": (float(south[i]), float(west[i]), float(north[i]), float(east[i])),
+            "centroid": (float(lat_mean[i]), float(lng_mean[i])),
+        }
+    return stats
+
+def _merge_category_stats(parts):
+    """여러 저장소의 카테고리 집계를 순서대로 합침"""
+    merged = {}
+    for stats in parts:
+        for category, entry in stats.items():
+            current = merged.get(category)
+            if current is None:
+                merged[category] = entry
+                continue
+            count = current["count"] + entry["count"]
+            merged[category] = {
+                "count": count,
+                "bbox": (min(current["bbox"][0], entry["bbox"][0]), min(current["bbox"][1], entry["bbox"][1]),
+                         max(current["bbox"][2], entry["bbox"][2]), max(current["bbox"][3], entry["bbox"][3])),
+                "centroid": tuple((a * current["count"] + b * entry["count"]) / count
+                                  for a, b in zip(current["centroid"], entry["centroid"])),
+            }
+    return merged
+
+# 거리 계산 및 공간 인덱스 관련 함수
+def _central_angles(lat1, lng1, lat2, lng2):
+    """두 지점(라디안) 사이의 중심각 (haversine 공식, 배열 브로드캐스트)"""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_distances(lat, lng, lats, lngs, ellipsoidal=False):
+    """한 지점(또는 같은 길이의 지점 배열)에서 여러 지점까지의 거리(m) 배열
+
+    기본은 평균 반지름 구면의 haversine 거리로, 순위 비교와 공간 인덱스에
+    쓴다. ellipsoidal=True면 WGS84 타원체에 대한 Lambert 보정을 더해
+    geopy.geodesic과 수 미터 이내로 맞춘다.
+    """
+    lat1 = np.radians(np.asarray(lat, dtype=np.float64))
+    lng1 = np.radians(np.asarray(lng, dtype=np.float64))
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lng2 = np.radians(np.asarray(lngs, dtype=np.float64))
+    if not ellipsoidal:
+        return EARTH_RADIUS_M * _central_angles(lat1, lng1, lat2, lng2)
+    
+    # Lambert 공식: reduced latitude로 중심각을 구한 뒤 편평률 항으로 보정
+    beta1 = np.arctan((1 - WGS84_F) * np.tan(lat1))
+    beta2 = np.arctan((1 - WGS84_F) * np.tan(lat2))
+    sigma = _central_angles(beta1, lng1, beta2, lng2)
+    p = (beta1 + beta2) / 2
+    q = (beta2 - beta1) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (sigma - np.sin(sigma)) * (np.sin(p) * np.cos(q)) ** 2 / np.cos(sigma / 2) ** 2
+        y = (sigma + np.sin(sigma)) * (np.cos(p) * np.sin(q)) ** 2 / np.sin(sigma / 2) ** 2
+        distances = WGS84_A * (sigma - WGS84_F / 2 * (x + y))
+    return np.where(sigma > 0, distances, 0.0)
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """두 지점 사이의 거리(m) (타원체 보정 포함, geodesic 대체)"""
+    return float(haversine_distances(lat1, lng1, lat2, lng2, ellipsoidal=True))
+
+class SpatialGridIndex:
+    """위도/경도 배열에 대한 균일 격자 공간 인덱스
+
+    점들을 등간격(m) 격자 칸 번호 순으로 정렬해 두고 칸별 시작 위치를
+    기록한다. 질의 시에는 원을 덮는 칸들의 점만 후보로 꺼내 실제 거리를
+    계산하므로 전체 점 수와 무관하게 주변 점 수에 비례하는 시간이 든다.
+    반환되는 인덱스는 생성 시 넘긴 배열(마커 저장소)의 위치다.
+    """
+    
+    def __init__(self, lat, lng, points_per_cell=GRID_POINTS_PER_CELL):
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        self.size = len(lat)
+        if self.size:
+            self.lat_min, self.lat_max = float(lat.min()), float(lat.max())
+            self.lng_min, self.lng_max = float(lng.min()), float(lng.max())
+        else:
+            self.lat_min = self.lat_max = self.lng_min = self.lng_max = 0.0
+        
+        # 경도 1도의 길이는 가장 고위도 기준으로 잡아 격자 거리가 실제 거리보다 길지 않게 한다
+        self.m_per_deg_lat = np.pi / 180 * EARTH_RADIUS_M
+        self.m_per_deg_lng = self.m_per_deg_lat * np.cos(np.radians(max(abs(self.lat_min), abs(self.lat_max))))
+        width = (self.lng_max - self.lng_min) * self.m_per_deg_lng
+        height = (self.lat_max - self.lat_min) * self.m_per_deg_lat
+        
+        # 칸당 평균 points_per_cell개가 들어가도록 칸 크기(m) 결정
+        self.cell_size = max(np.sqrt(max(width * height, 1.0) * points_per_cell / max(self.size, 1)), 1.0)
+        self.nx = int(width // self.cell_size) + 1
+        self.ny = int(height // self.cell_size) + 1
+        
+        cell_ids = self._cell_y(lat) * self.nx + self._cell_x(lng)
+        self.order = np.argsort(cell_ids, kind="stable")
+        self.cell_starts = np.searchsorted(cell_ids[self.order], np.arange(self.nx * self.ny + 1))
+        # 칸 순서로 정렬한 좌표 (후보를 연속 구간으로 읽기 위함)
+        self.sorted_lat = lat[self.order]
+        self.sorted_lng = lng[self.order]
+    
+    def _cell_x(self, lng):
+        return np.clip(((lng - self.lng_min) * self.m_per_deg_lng // self.cell_size).astype(np.int64), 0, self.nx - 1)
+    
+    def _cell_y(self, lat):
+        return np.clip(((lat - self.lat_min) * self.m_per_deg_lat // self.cell_size).astype(np.int64), 0, self.ny - 1)
+    
+    def _block_positions(self, x0, x1, y0, y1):
+        """칸 묶음 [x0, x1] x [y0, y1]에 속한 점들의 정렬 배열 위치"""
+        # 한 행에서 x0..x1 칸은 칸 번호가 연속이므로 정렬 배열의 한 구간이다
+        starts = self.cell_starts[np.arange(y0, y1 + 1) * self.nx + x0]
+        ends = self.cell_starts[np.arange(y0, y1 + 1) * self.nx + x1 + 1]
+        lengths = ends - starts
+        offsets = np.cumsum(lengths) - lengths
+        return np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+    
+    def _candidates(self, lat, lng, meters):
+        """(lat, lng) 반경 meters를 덮는 칸들의 점 위치와 보장 반경
+
+        보장 반경은 이 칸 묶음 밖의 점이 가질 수 있는 최소 거리로,
+        격자 전체를 덮으면 무한대다.
+        """
+        m_per_deg_lng = min(self.m_per_deg_lng, self.m_per_deg_lat * np.cos(np.radians(lat)))
+        x = (lng - self.lng_min) * m_per_deg_lng
+        y = (lat - self.lat_min) * self.m_per_deg_lat
+        x0 = max(int((x - meters) // self.cell_size), 0)
+        x1 = min(int((x + meters) // self.cell_size), self.nx - 1)
+        y0 = max(int((y - meters) // self.cell_size), 0)
+        y1 = min(int((y + meters) // self.cell_size), self.ny - 1)
+        if x0 > x1 or y0 > y1:
+            return np.empty(0, dtype=np.intp), 0.0
+        
+        positions = self._block_positions(x0, x1, y0, y1)
+        edges = [
+            np.inf if x0 == 0 else x - x0 * self.cell_size,
+            np.inf if x1 == self.nx - 1 else (x1 + 1) * self.cell_size - x,
+            np.inf if y0 == 0 else y - y0 * self.cell_size,
+            np.inf if y1 == self.ny - 1 else (y1 + 1) * self.cell_size - y,
+        ]
+        return positions, min(edges)
+    
+    def within_radius(self, lat, lng, meters):
+        """(lat, lng)에서 meters 이내의 점 (인덱스 배열, 거리 배열), 가까운 순"""
+        if not self.size:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        positions, _ = self._candidates(lat, lng, meters)
+        distances = haversine_distances(lat, lng, self.sorted_lat[positions], self.sorted_lng[positions])
+        inside = distances <= meters
+        positions, distances = positions[inside], distances[inside]
+        by_distance = np.argsort(distances, kind="stable")
+        return self.order[positions[by_distance]], distances[by_distance]
+    
+    def within_bbox(self, south, west, north, east):
+        """경계 상자 [south, north) x [west, east) 안의 점 인덱스 (저장소 순서)"""
+        if not self.size or south > self.lat_max or north < self.lat_min or west > self.lng_max or east < self.lng_min:
+            return np.empty(0, dtype=np.intp)
+        x0, x1 = self._cell_x(np.array([west, east]))
+        y0, y1 = self._cell_y(np.array([south, north]))
+        positions = self._block_positions(int(x0), int(x1), int(y0), int(y1))
+        lat = self.sorted_lat[positions]
+        lng = self.sorted_lng[positions]
+        inside = (lat >= south) & (lat < north) & (lng >= west) & (lng < east)
+        return np.sort(self.order[positions[inside]])
+    
+    def nearest(self, lat, lng, k=1):
+        """(lat, lng)에서 가장 가까운 k개 점 (인덱스 배열, 거리 배열), 가까운 순"""
+        k = min(int(k), self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        
+        meters = self.cell_size
+        while True:
+            positions, covered = self._candidates(lat, lng, meters)
+            if len(positions) < k:
+                meters *= 2
+                continue
+            distances = haversine_distances(lat, lng, self.sorted_lat[positions], self.sorted_lng[positions])
+            nearest = np.argpartition(distances, k - 1)[:k]
+            kth = distances[nearest].max()
+            # k번째 거리 안쪽이 모두 후보 칸에 들어 있으면 정답 (투영 오차 여유 0.1%)
+            if kth <= covered * 0.999:
+                nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+                return self.order[positions[nearest]], distances[nearest]
+            meters = max(kth * 1.001, meters * 2)
+    
+    def __repr__(self):
+        return f"SpatialGridIndex({self.size} points, {self.nx}x{self.ny} cells of {self.cell_size:.0f}m)"
+
+@profiled("nearby")
+def find_nearby_places(markers, lat, lng, radius_m=NEARBY_RADIUS_M, limit=NEARBY_LIMIT):
+    """(lat, lng) 반경 radius_m 안의 가까운 장소 목록 [(마커, 거리 m), ...]"""
+    if not markers:
+        return []
+    if not isinstance(markers, MarkerStore):
+        markers = MarkerStore.from_markers(markers)
+    indices, _ = markers.spatial_index().nearest(lat, lng, limit)
+    # 표시용 거리는 타원체 보정 값 사용 (후보가 limit개뿐이라 비용은 무시할 만함)
+    distances = haversine_distances(lat, lng, markers.lat[indices], markers.lng[indices], ellipsoidal=True)
+    return [(markers[int(index)], float(distance)) for index, distance in zip(indices, distances) if distance <= radius_m]
+
+# 마커 클러스터 관련 함수
+def mercator_xy(lat, lng):
+    """위도/경도를 웹 메르카토르 정규 좌표 (x, y)로 변환 (0~1, y는 북쪽이 0)"""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -85.05112878, 85.05112878)
+    x = (np.asarray(lng, dtype=np.float64) + 180.0) / 360.0
+    y = 0.5 - np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) / (2 * np.pi)
+    return x, y
+
+class ClusterPyramid:
+    """줌 레벨별 격자 클러스터 피라미드
+
+    가장 큰 줌(max_zoom)에서 화면 grid_px 크기의 메르카토르 격자 칸마다
+    마커를 묶고, 한 단계 작은 줌의 칸은 아래 단계 2x2 칸을 합쳐 만든다.
+    칸 크기가 2의 거듭제곱으로 맞춰져 있어 상위 칸 번호는 하위 칸 번호를
+    1비트 민 값이다. 레벨마다 클러스터의 개수, 중심(가중 평균), 경계 상자,
+    카테고리별 개수, 대표 마커(가장 앞의 마커 위치)를 배열로 보관한다.
+    by_category가 True면 카테고리가 다른 마커는 같은 칸이라도 따로 묶어
+    카테고리별 클러스터 레이어를 만들고, 레벨마다 "category" 코드 열을 둔다.
+    """
+    
+    def __init__(self, lat, lng, category_codes, category_count, min_zoom=CLUSTER_MIN_ZOOM, max_zoom=CLUSTER_MAX_ZOOM, grid_px=CLUSTER_GRID_PX, by_category=False):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.grid_px = grid_px
+        self.by_category = by_category
+        self.size = len(lat)
+        self.levels = {}
+        
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        codes = np.asarray(category_codes, dtype=np.int64)
+        x, y = mercator_xy(lat, lng)
+        cells = 2.0 ** max_zoom * 256 / grid_px
+        cx = np.minimum((x * cells).astype(np.int64), int(cells) - 1)
+        cy = np.minimum((y * cells).astype(np.int64), int(cells) - 1)
+        # 카테고리별로 묶을 때는 카테고리 코드도 칸 키에 포함
+        group_codes = codes if by_category else np.zeros(len(codes), dtype=np.int64)
+        
+        # 가장 큰 줌: 마커 단위 집계
+        order, starts = self._groups(group_codes, cx, cy)
+        group = np.zeros(len(order), dtype=np.int64)
+        group[starts[1:]] = 1
+        group = np.cumsum(group)
+        level = {
+            "cx": cx[order][starts], "cy": cy[order][starts],
+            "category": group_codes[order][starts],
+            "count": np.diff(np.r_[starts, len(order)]),
+            "lat_sum": self._reduce(np.add, lat[order], starts),
+            "lng_sum": self._reduce(np.add, lng[order], starts),
+            "south": self._reduce(np.minimum, lat[order], starts),
+            "west": self._reduce(np.minimum, lng[order], starts),
+            "north": self._reduce(np.maximum, lat[order], starts),
+            "east": self._reduce(np.maximum, lng[order], starts),
+            "first": self._reduce(np.minimum, order, starts),
+            "category_counts": np.bincount(group * category_count + codes[order],
+                                           minlength=len(starts) * category_count).reshape(len(starts), category_count),
+        }
+        self.levels[max_zoom] = self._finish(level)
+        
+        # 작은 줌: 바로 아래 단계 클러스터를 2x2 칸씩 합침
+        for zoom in range(max_zoom - 1, min_zoom - 1, -1):
+            child = level
+            order, starts = self._groups(child["category"], child["cx"] >> 1, child["cy"] >> 1)
+            level = {"cx": child["cx"][order][starts] >> 1, "cy": child["cy"][order][starts] >> 1,
+                     "category": child["category"][order][starts]}
+            for name, ufunc in (("count", np.add), ("lat_sum", np.add), ("lng_sum", np.add),
+                                ("south", np.minimum), ("west", np.minimum), ("north", np.maximum),
+                                ("east", np.maximum), ("first", np.minimum), ("category_counts", np.add)):
+                level[name] = self._reduce(ufunc, child[name][order], starts)
+            self.levels[zoom] = self._finish(level)
+    
+    @staticmethod
+    def _reduce(ufunc, values, starts):
+        """정렬된 values를 칸 구간별로 ufunc 집계 (빈 배열이면 빈 배열)"""
+        if not len(values):
+            return values[:0]
+        return ufunc.reduceat(values, starts, axis=0)
+    
+    @staticmethod
+    def _groups(codes, cx, cy):
+        """(카테고리, 칸 번호)로 정렬한 순서와 칸별 시작 위치"""
+        keys = (codes << 48) | (cx << 24) | cy
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else np.empty(0, dtype=np.intp)
+        return order, starts
+    
+    @staticmethod
+    def _finish(level):
+        """합계 열로 중심 좌표를 계산하고 배열을 읽기 전용으로 표시"""
+        count = np.maximum(level["count"], 1)
+        level["lat"] = level["lat_sum"] / count
+        level["lng"] = level["lng_sum"] / count
+        for array in level.values():
+            _readonly(array)
+        return level
+    
+    def level(self, zoom):
+        """줌에 해당하는 레벨 배열 (범위 밖이면 가장 가까운 레벨)"""
+        return self.levels[int(min(max(zoom, self.min_zoom), self.max_zoom))]
+    
+    def within_bbox(self, zoom, south, west, north, east, category=None):
+        """중심이 경계 상자 [south, north) x [west, east) 안에 있는 클러스터 위치
+
+        category(코드)를 주면 그 카테고리의 클러스터만 (by_category 피라미드용)
+        """
+        level = self.level(zoom)
+        lat, lng = level["lat"], level["lng"]
+        inside = (lat >= south) & (lat < north) & (lng >= west) & (lng < east)
+        if category is not None:
+            inside &= level["category"] == category
+        return np.flatnonzero(inside)
+    
+    def nbytes(self):
+        """피라미드 배열이 차지하는 바이트 수"""
+        return sum(array.nbytes for level in self.levels.values() for array in level.values())
+    
+    def __repr__(self):
+        counts = ", ".join(f"z{zoom}={len(level['count'])}" for zoom, level in sorted(self.levels.items()))
+        kind = ", by category" if self.by_category else ""
+        return f"ClusterPyramid({self.size} markers{kind}; {counts})"
+
+# 장소 검색 관련 함수
+# 한글 음절 블록 시작 코드와 초성/중성/종성 개수
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_JUNGSEONG_COUNT = 21
+_JONGSEONG_COUNT = 28
+# 초성 순서대로 나열한 호환 자모 (초성 검색어와 초성 문자열에 사용)
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+# 검색용 문자열의 필드 시작 표시 (접두어 일치 판별용)
+_SEARCH_FIELD_START = "\x02"
+# 이름이 없는 마커에 들어가는 자리표시 문자열 (색인하지 않음)
+_NO_TITLE = "이름 없음"
+
+def normalize_search_text(text):
+    """검색 비교용 문자열 정규화 (NFC, 소문자, 공백 제거)"""
+    return "".join(unicodedata.normalize("NFC", str(text)).lower().split())
+
+def to_choseong(text):
+    """한글 음절을 초성 호환 자모로 바꾼 문자열 (예: 경복궁 -> ㄱㅂㄱ)"""
+    return "".join(
+        _CHOSEONG[(ord(char) - _HANGUL_BASE) // (_JUNGSEONG_COUNT * _JONGSEONG_COUNT)]
+        if _HANGUL_BASE <= ord(char) <= _HANGUL_LAST else char
+        for char in text
+    )
+
+def _char_range(char, partial):
+    """검색어 한 글자가 일치할 수 있는 코드 범위 (시작, 끝)
+
+    partial이면 입력 중인 글자로 보고 자모 단위 접두어를 허용한다.
+    초성만 입력한 경우(ㄱ) 그 초성의 모든 음절, 받침 없는 음절(구)은
+    받침이 붙은 음절(궁)까지 일치시킨다.
+    """
+    code = ord(char)
+    if partial and char in _CHOSEONG:
+        start = _HANGUL_BASE + _CHOSEONG.index(char) * _JUNGSEONG_COUNT * _JONGSEONG_COUNT
+        return start, start + _JUNGSEONG_COUNT * _JONGSEONG_COUNT - 1
+    if partial and _HANGUL_BASE <= code <= _HANGUL_LAST and (code - _HANGUL_BASE) % _JONGSEONG_COUNT == 0:
+        return code, code + _JONGSEONG_COUNT - 1
+    return code, code
+
+class NgramIndex:
+    """문자열 목록에 대한 문자 2-gram 역색인
+
+    (앞 글자, 뒷 글자) 코드를 하나의 정수 키로 묶어 정렬해 두고
+    키마다 문서 번호 목록을 연속 배열(CSR)로 보관한다. 같은 앞 글자의
+    키는 연속 구간이므로 "ㄱ으로 시작하는 음절" 같은 범위 질의도 한 번의
+    이진 탐색으로 끝난다. 문자열 끝 글자는 단일 글자 키로 색인한다.
+    """
+    
+    _SHIFT = 21  # 유니코드 코드 포인트는 21비트 이내
+    
+    def __init__(self, texts, doc_ids):
+        """texts[i]를 문서 doc_ids[i]의 필드 문자열로 색인 (한 문서에 여러 필드 가능)"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        # 필드 사이에 0을 넣어 한 배열로 이어 붙임 (0을 넘는 2-gram은 만들지 않음)
+        codes = np.frombuffer("\0".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        docs = np.repeat(doc_ids, lengths + 1)[:len(codes)]
+        following = np.append(codes[1:], 0)
+        
+        valid = codes != 0
+        keys = (codes[valid] << self._SHIFT) | following[valid]
+        docs = docs[valid]
+        
+        # (키, 문서) 쌍 중복 제거 후 키별 구간 계산
+        order = np.lexsort((docs, keys))
+        keys, docs = keys[order], docs[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (docs[1:] != docs[:-1])
+        keys, docs = keys[keep], docs[keep]
+        
+        self.keys, starts = np.unique(keys, return_index=True)
+        self.offsets = np.append(starts, len(keys))
+        self.postings = docs.astype(np.int32)
+    
+    def lookup(self, low, high):
+        """키 범위 [low, high]에 속하는 문서 번호 (정렬, 중복 없음)"""
+        first = np.searchsorted(self.keys, low, side="left")
+        last = np.searchsorted(self.keys, high, side="right")
+        if last - first == 1:
+            return self.postings[self.offsets[first]:self.offsets[last]]
+        return np.unique(self.postings[self.offsets[first]:self.offsets[last]])
+    
+    def candidates(self, ranges):
+        """글자별 코드 범위 목록에 해당하는 후보 문서 (2-gram 교집합)
+
+        마지막 글자만 범위일 수 있다. 검색어가 두 글자 이하면 결과가
+        정확하고, 더 길면 연속 여부를 호출한 쪽에서 확인해야 한다.
+        """
+        if len(ranges) == 1:
+            low, high = ranges[0]
+            return self.lookup(low << self._SHIFT, (high << self._SHIFT) | ((1 << self._SHIFT) - 1))
+        
+        result = None
+        # 뒤쪽 2-gram이 보통 더 드물어서 먼저 교집합을 줄인다
+        for (first, _), (low, high) in reversed(list(zip(ranges, ranges[1:]))):
+            docs = self.lookup((first << self._SHIFT) | low, (first << self._SHIFT) | high)
+            result = docs if result is None else np.intersect1d(result, docs, assume_unique=True)
+            if not len(result):
+                break
+        return result
+    
+    def nbytes(self):
+        return self.keys.nbytes + self.offsets.nbytes + self.postings.nbytes
+
+class PlaceSearchIndex:
+    """마커 저장소의 이름/주소(모든 언어)에 대한 검색 인덱스
+
+    - 부분 문자열 검색: 정규화한 이름/주소의 2-gram 역색인
+    - 입력 중 검색: 마지막 글자가 초성(ㄱ)이나 받침 없는 음절(구)이면 자모 접두어로 일치
+    - 초성 검색: 검색어가 모두 초성이면 이름의 초성 문자열(경복궁 -> ㄱㅂㄱ)에서 검색
+    결과는 이름 접두어 일치, 이름 포함, 주소 포함 순으로, 같은 순위는 짧은 이름이 먼저다.
+    """
+    
+    def __init__(self, store):
+        self.size = len(store)
+        title_texts, title_docs, choseong_texts = [], [], []
+        address_texts, address_docs = [], []
+        titles_by_doc = [[] for _ in range(self.size)]
+        addresses_by_doc = [[] for _ in range(self.size)]
+        
+        for language in store.languages:
+            for doc, title in enumerate(store.titles_by_language[language]):
+                if not title or title == _NO_TITLE:
+                    continue
+                text = _SEARCH_FIELD_START + normalize_search_text(title)
+                if text not in titles_by_doc[doc]:
+                    titles_by_doc[doc].append(text)
+            for doc, address in enumerate(store.addresses_by_language.get(language, ())):
+                text = normalize_search_text(address) if address else ""
+                if text and text not in addresses_by_doc[doc]:
+                    addresses_by_doc[doc].append(text)
+        
+        for doc in range(self.size):
+            for text in titles_by_doc[doc]:
+                title_texts.append(text)
+                title_docs.append(doc)
+                choseong_texts.append(to_choseong(text))
+            for text in addresses_by_doc[doc]:
+                address_texts.append(text)
+                address_docs.append(doc)
+        
+        self.titles = NgramIndex(title_texts, title_docs)
+        self.choseong = NgramIndex(choseong_texts, title_docs)
+        self.addresses = NgramIndex(address_texts, address_docs)
+        # 결과 확인용 문서별 문자열 (필드는 \x1f로 구분)
+        self.title_text = np.array(["\x1f".join(texts) for texts in titles_by_doc], dtype=object)
+        self.choseong_text = np.array([to_choseong(text) for text in self.title_text], dtype=object)
+        self.address_text = np.array(["\x1f".join(texts) for texts in addresses_by_doc], dtype=object)
+        # 순위 정렬용 이름 길이 (언어 중 가장 짧은 이름 기준)
+        self.title_length = np.array([min((len(text) for text in texts), default=np.iinfo(np.int32).max)
+                                      for texts in titles_by_doc], dtype=np.int32)
+    
+    def _match(self, index, texts, query, partial):
+        """한 필드 인덱스에서 query와 일치하는 문서 번호"""
+        ranges = [_char_range(char, partial and i == len(query) - 1) for i, char in enumerate(query)]
+        docs = index.candidates(ranges)
+        if len(query) <= 2 or not len(docs):
+            return docs
+        
+        # 2-gram이 모두 있어도 연속이 아닐 수 있으므로 후보만 정규식으로 확인
+        pattern = "".join(re.escape(chr(low)) if low == high else f"[{chr(low)}-{chr(high)}]" for low, high in ranges)
+        matcher = re.compile(pattern).search
+        return docs[np.fromiter((matcher(text) is not None for text in texts[docs]), dtype=bool, count=len(docs))]
+    
+    def search(self, query, limit=None):
+        """검색어와 일치하는 마커 인덱스 배열 (순위순)"""
+        query = normalize_search_text(query)
+        if not query or not self.size:
+            return np.empty(0, dtype=np.int32)
+        
+        if all(char in _CHOSEONG for char in query):
+            # 초성 검색 (이름만 대상)
+            prefix = self._match(self.choseong, self.choseong_text, _SEARCH_FIELD_START + query, False)
+            contains = self._match(self.choseong, self.choseong_text, query, False)
+            address = np.empty(0, dtype=np.int32)
+        else:
+            prefix = self._match(self.titles, self.title_text, _SEARCH_FIELD_START + query, True)
+            contains = self._match(self.titles, self.title_text, query, True)
+            address = self._match(self.addresses, self.address_text, query, True)
+        
+        tiers = [prefix, np.setdiff1d(contains, prefix, assume_unique=True)]
+        tiers.append(np.setdiff1d(address, contains, assume_unique=True))
+        ranked = []
+        remaining = limit
+        for docs in tiers:
+            if remaining is not None and remaining <= 0:
+                break
+            # 이름 길이, 같으면 저장소 순서로 정렬 (필요한 개수만 부분 정렬)
+            order_keys = self.title_length[docs].astype(np.int64) * max(self.size, 1) + docs
+            if remaining is not None and len(docs) > remaining:
+                top = np.argpartition(order_keys, remaining - 1)[:remaining]
+                docs, order_keys = docs[top], order_keys[top]
+            ranked.append(docs[np.argsort(order_keys)])
+            if remaining is not None:
+                remaining -= len(docs)
+        return np.concatenate(ranked).astype(np.int32) if ranked else np.empty(0, dtype=np.int32)
+    
+    def count(self, query):
+        """검색어와 일치하는 마커 수"""
+        return len(self.search(query))
+    
+    def nbytes(self):
+        return self.titles.nbytes() + self.choseong.nbytes() + self.addresses.nbytes()
+    
+    def __repr__(self):
+        return f"PlaceSearchIndex({self.size} places, {self.nbytes() / 2**20:.1f} MiB)"
+
+@profiled("search")
+def search_places(markers, query, limit=5):
+    """장소 검색 (이름/주소, 모든 언어, 초성/입력 중 자모 일치)
+
+    반환값: (전체 결과 수, 상위 limit개 마커 목록)
+    """
+    if not markers or not normalize_search_text(query):
+        return 0, []
+    if not isinstance(markers, MarkerStore):
+        markers = MarkerStore.from_markers(markers)
+    indices = markers.search_index().search(query)
+    return len(indices), [markers[int(index)] for index in indices[:limit]]
+
+# 경험치 및 레벨 관련 함수
+def calculate_level(xp):
+    """레벨 계산 함수"""
+    return int(xp / XP_PER_LEVEL) + 1
+
+def calculate_xp_percentage(xp):
+    """경험치 비율 계산 (다음 레벨까지)"""
+    current_level = calculate_level(xp)
+    xp_for_current_level = (current_level - 1) * XP_PER_LEVEL
+    xp_for_next_level = current_level * XP_PER_LEVEL
+    
+    xp_in_current_level = xp - xp_for_current_level
+    xp_needed_for_next = xp_for_next_level - xp_for_current_level
+    
+    return int((xp_in_current_level / xp_needed_for_next) * 100)
+
+def add_visit(username, place_name, lat, lng):
+    """방문 기록 추가 (같은 날 같은 장소는 한 번만, 경험치는 기록될 때만 적립)"""
+    xp_gained = PLACE_XP.get(place_name, 10)  # 기본 10XP, 장소별로 다른 XP
+    
+    # 방문 데이터 생성
+    visit_data = {
+        "place_name": place_name,
+        "latitude": lat,
+        "longitude": lng,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "xp_gained": xp_gained,
+        "rating": None
+    }
+    
+    # 중복 방문 검사(같은 날, 같은 장소)와 저장은 저장소가 한 번에 처리 (방문 기록 행 하나 추가)
+    try:
+        with profile_phase("session_save"):
+            recorded = get_user_repository().add_visit(username, visit_data)
+    except Exception as e:
+        print(f"방문 기록 저장 오류: {e}")
+        return False, 0
+    if not recorded:
+        return False, 0
+    
+    st.session_state.user_visits.setdefault(username, []).append(visit_data)
+    st.session_state.user_xp[username] = st.session_state.user_xp.get(username, 0) + xp_gained
+    return True, xp_gained
+
+def update_location_position(event):
+    """지도 컴포넌트 값에 실려 온 위치를 세션의 마지막 위치로 저장
+
+    위치는 {lat, lng, accuracy(m), timestamp(초)}이며, 저장된 것보다
+    새로운 위치일 때만 바꾼다. 반환값: 바뀌었으면 True
+    """
+    fix = event.get("location") if isinstance(event, dict) else None
+    if not isinstance(fix, dict):
+        return False
+    try:
+        fix = {name: float(fix[name]) for name in ("lat", "lng", "accuracy", "timestamp")}
+    except (KeyError, TypeError, ValueError):
+        return False
+    
+    current = st.session_state.get("user_position")
+    if current and current["timestamp"] >= fix["timestamp"]:
+        return False
+    st.session_state.user_position = fix
+    return True
+
+def location_sync_state():
+    """위치를 추적하는 지도에 보내는 위치 상태 (마지막 위치 시각, 다시 쓰는 시간)"""
+    fix = st.session_state.get("user_position")
+    return {"timestamp": fix["timestamp"] if fix else None, "max_age": LOCATION_MAX_AGE}
+
+def get_location_position(map_keys=LOCATION_MAP_KEYS):
+    """사용자의 마지막 위치를 바로 반환 (브라우저 응답을 기다리지 않음)
+
+    위치는 지도 컴포넌트가 백그라운드에서 받아 컴포넌트 값으로 보내므로,
+    map_keys 지도가 보낸 값에 새 위치가 있으면 먼저 반영한다.
+    아직 받은 위치가 없으면 기본 위치(서울시청)를 반환한다.
+    """
+    for key in map_keys:
+        update_location_position(st.session_state.get(key))
+    
+    fix = st.session_state.get("user_position")
+    if fix:
+        return [fix["lat"], fix["lng"]]
+    return DEFAULT_LOCATION  # 기본 위치 (서울시청)
+
+# Google Maps 관련 함수
+def marker_payload_dict(markers):
+    """지도에 넘길 마커 데이터를 열 단위 dict로 변환
+
+    카테고리/색상은 코드표와 정수 코드로 보내고 좌표는 소수점 6자리
+    (약 10cm)로 줄인다.
+    """
+    if not isinstance(markers, MarkerStore):
+        markers = MarkerStore.from_markers(markers)
+    return {
+        "lat": np.round(markers.lat, 6).tolist(),
+        "lng": np.round(markers.lng, 6).tolist(),
+        "title": markers.titles.tolist(),
+        "info": markers.infos.tolist(),
+        "category": markers.category_codes.tolist(),
+        "categories": list(markers.categories),
+        "color": markers.color_codes.tolist(),
+        "colors": list(markers.colors),
+    }
+
+@profiled("map")
+def show_google_map(api_key, center_lat, center_lng, markers=None, zoom=13, height=600, language="한국어", key="google_map", track_location=False, view_request=None):
+    """Google Maps 컴포넌트 표시 (코스/방문 기록처럼 작은 마커 목록용)
+
+    지도 컴포넌트 번들을 쓰고, 마커는 뷰포트 요청 없이 모두 보낸다.
+    key가 같으면 iframe을 유지한 채 바뀐 마커/중심만 변경 연산으로 보낸다.
+    track_location이면 컴포넌트가 사용자 위치를 받아 보낸다 (get_location_position).
+    중심이 사용자 위치를 따라 바뀌는 지도는 view_request(예: 목적지)를 넘기면
+    그 값이 바뀔 때만 지도를 옮긴다.
+    """
+    args, st.session_state[f"{key}__sync"] = static_map_args(
+        api_key, center_lat, center_lng, markers, zoom, height, language,
+        location=location_sync_state() if track_location else None,
+        sync=map_sync_state(key), event=st.session_state.get(key), view_request=view_request
+    )
+    return get_seoul_map_component()(key=key, default=None, **args)
+
+# 지도 컴포넌트 관련 함수
+# 해시 파일명 자산 (예: main.3f9a0c1d2e4b.js)
+_HASHED_ASSET_PATTERN = re.compile(r"\.[0-9a-f]{12}\.(js|css)$")
+
+def build_map_component_bundle(source=MAP_COMPONENT_DIR, target=MAP_COMPONENT_BUILD_DIR):
+    """지도 컴포넌트 정적 파일을 내용 해시 파일명으로 복사한 번들 생성
+
+    main.js/style.css는 "이름.해시12자리.확장자"로 복사하고 index.html의
+    참조를 바꿔 쓴다. 내용이 그대로면 파일을 다시 쓰지 않으며, 이전
+    해시 파일은 지운다. 반환값: 번들 폴더 경로
+    """
+    source, target = Path(source), Path(target)
+    target.mkdir(parents=True, exist_ok=True)
+    index_html = (source / "index.html").read_text(encoding="utf-8")
+    keep = {"index.html"}
+    for name in MAP_COMPONENT_ASSETS:
+        content = (source / name).read_bytes()
+        stem, suffix = os.path.splitext(name)
+        hashed_name = f"{stem}.{_digest(content)[:12]}{suffix}"
+        hashed_path = target / hashed_name
+        if not hashed_path.exists():
+            temp_path = hashed_path.with_suffix(hashed_path.suffix + ".tmp")
+            temp_path.write_bytes(content)
+            os.replace(temp_path, hashed_path)
+        index_html = index_html.replace(f'"{name}"', f'"{hashed_name}"')
+        keep.add(hashed_name)
+    
+    index_path = target / "index.html"
+    if not index_path.exists() or index_path.read_text(encoding="utf-8") != index_html:
+        temp_path = target / "index.html.tmp"
+        temp_path.write_text(index_html, encoding="utf-8")
+        os.replace(temp_path, index_path)
+    for path in target.iterdir():
+        if path.name not in keep and _HASHED_ASSET_PATTERN.search(path.name):
+            path.unlink()
+    return target
+
+def _map_component_path():
+    """Streamlit에 등록할 컴포넌트 폴더 (번들을 쓸 수 없으면 원본 폴더)"""
+    try:
+        return build_map_component_bundle()
+    except OSError as e:
+        print(f"지도 컴포넌트 번들 생성 실패, 원본 폴더 사용: {e}", file=sys.stderr)
+        return MAP_COMPONENT_DIR
+
+def _install_asset_cache_headers(component_name):
+    """component_name 컴포넌트의 해시 파일명 자산에 장기 캐시 헤더를 붙이도록 컴포넌트 요청 처리기 확장
+
+    Streamlit은 컴포넌트의 JS/CSS에 max-age 없는 "public"만 붙이므로,
+    등록한 컴포넌트 폴더 바로 아래의 해시 파일명 자산만 MAP_ASSET_CACHE_CONTROL로
+    바꾼다 (다른 컴포넌트의 요청은 그대로).
+    """
+    try:
+        from streamlit.web.server.component_request_handler import ComponentRequestHandler
+    except ImportError:
+        return
+    names = getattr(ComponentRequestHandler, "_hashed_asset_components", None)
+    if names is None:
+        names = ComponentRequestHandler._hashed_asset_components = set()
+        set_extra_headers = ComponentRequestHandler.set_extra_headers
+        
+        def set_hashed_asset_headers(self, path):
+            set_extra_headers(self, path)
+            # 요청 경로: "<컴포넌트 이름>/<파일명>"
+            name, _, filename = path.partition("/")
+            if name in names and "/" not in filename and _HASHED_ASSET_PATTERN.search(filename):
+                self.set_header("Cache-Control", MAP_ASSET_CACHE_CONTROL)
+        
+        ComponentRequestHandler.set_extra_headers = set_hashed_asset_headers
+    names.add(component_name)
+
+# 양방향 지도 컴포넌트 (번들 폴더의 정적 파일을 Streamlit이 직접 제공, 처음 쓸 때 등록)
+_seoul_map_component = None
+_seoul_map_component_lock = threading.Lock()
+
+def get_seoul_map_component():
+    """지도 컴포넌트 (프로세스에서 처음 부를 때 한 번만 번들 생성, 캐시 헤더 설치, 컴포넌트 등록)"""
+    global _seoul_map_component
+    with _seoul_map_component_lock:
+        if _seoul_map_component is None:
+            component = components.declare_component("seoul_map", path=str(_map_component_path()))
+            _install_asset_cache_headers(component.name)
+            _seoul_map_component = component
+    return _seoul_map_component
+
+def viewport_tile_level(zoom):
+    """지도 줌에 대응하는 타일 레벨"""
+    return int(min(max(round(zoom), VIEWPORT_MIN_LEVEL), VIEWPORT_MAX_LEVEL))
+
+def tile_size_deg(level):
+    """타일 레벨의 타일 한 변 크기(도)"""
+    return VIEWPORT_TILE_DEG * 2.0 ** (VIEWPORT_BASE_ZOOM - level)
+
+def tiles_in_bounds(south, west, north, east, level, buffer=1, limit=VIEWPORT_MAX_TILES):
+    """경계 상자를 덮는 타일 ID 목록 ("레벨:x:y"), 중심에 가까운 순으로 최대 limit개
+
+    타일 (x, y)는 [y*크기, (y+1)*크기) x [x*크기, (x+1)*크기) 영역이며,
+    컴포넌트의 JavaScript도 같은 식으로 타일을 계산한다.
+    """
+    size = tile_size_deg(level)
+    x0, x1 = int(np.floor(west / size)) - buffer, int(np.floor(east / size)) + buffer
+    y0, y1 = int(np.floor(south / size)) - buffer, int(np.floor(north / size)) + buffer
+    xs, ys = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1))
+    xs, ys = xs.ravel(), ys.ravel()
+    center_x, center_y = (west + east) / 2 / size, (south + north) / 2 / size
+    order = np.argsort((xs + 0.5 - center_x) ** 2 + (ys + 0.5 - center_y) ** 2, kind="stable")[:limit]
+    return [f"{level}:{x}:{y}" for x, y in zip(xs[order].tolist(), ys[order].tolist())]
+
+def viewport_bounds(center_lat, center_lng, zoom, width_px, height_px):
+    """중심/줌/화면 크기(px)로 계산한 대략적인 지도 경계 (남, 서, 북, 동)"""
+    deg_per_px = 360.0 / (256 * 2.0 ** zoom)
+    half_width = width_px / 2 * deg_per_px
+    half_height = height_px / 2 * deg_per_px * np.cos(np.radians(center_lat))
+    return center_lat - half_height, center_lng - half_width, center_lat + half_height, center_lng + half_width
+
+def _tile_members(lat, lng, cells, size):
+    """좌표 배열 중 요청한 타일들(cells)에 속한 위치와 각 위치의 타일 키"""
+    tile_keys = (np.floor(lng / size).astype(np.int64) << 32) + np.floor(lat / size).astype(np.int64)
+    inside = np.flatnonzero(np.isin(tile_keys, (cells[:, 0] << 32) + cells[:, 1]))
+    return inside, tile_keys[inside]
+
+def marker_tiles_payload(markers, tiles, category=None, max_markers=VIEWPORT_MAX_MARKERS):
+    """요청한 타일들에 속한 마커/클러스터를 열 단위 dict로 반환
+
+    category(카테고리 이름)를 주면 그 카테고리만, 없으면 전체를 대상으로 한다.
+    CLUSTER_MAX_ZOOM 이하 레벨의 타일은 미리 만든 클러스터 피라미드(카테고리
+    필터가 있으면 카테고리별 피라미드)에서 그 줌의 클러스터 중심/개수만
+    보내고, 마커가 하나뿐인 클러스터는 개별 마커로 보낸다. 그보다 큰 레벨은
+    공간 격자 인덱스로 타일 영역의 마커를 찾고, 전체가 max_markers를 넘으면
+    타일마다 고르게 추려 보낸다.
+    "layers"는 [레벨 키, 마커 id 목록] 쌍으로, 레벨 키는 클러스터 레벨이면
+    레벨 번호, 개별 마커 레벨이면 "M"이다. id는 저장소 안의 마커 위치라
+    컴포넌트가 이미 받은 마커를 건너뛸 수 있다.
+    """
+    code = None
+    if category is not None:
+        code = markers.categories.index(category) if category in markers.categories else -1
+    
+    valid_tiles = []
+    cells_by_level = {}
+    for tile in list(tiles)[:VIEWPORT_MAX_TILES]:
+        try:
+            level, x, y = (int(part) for part in str(tile).split(":"))
+        except ValueError:
+            continue
+        valid_tiles.append(tile)
+        cells_by_level.setdefault(level, []).append((x, y))
+    tiles = valid_tiles
+    
+    per_tile = max(max_markers // max(len(tiles), 1), 1)
+    chosen = []
+    layers = []
+    clusters = {"id": [], "level": [], "lat": [], "lng": [], "count": [], "bbox": []}
+    for level, cells in cells_by_level.items():
+        size = tile_size_deg(level)
+        cells = np.array(cells, dtype=np.int64)
+        south, west = cells[:, 1].min() * size, cells[:, 0].min() * size
+        north, east = (cells[:, 1].max() + 1) * size, (cells[:, 0].max() + 1) * size
+        
+        if level <= CLUSTER_MAX_ZOOM:
+            pyramid = markers.cluster_pyramid(by_category=code is not None)
+            entries = pyramid.level(level)
+            candidates = pyramid.within_bbox(level, south, west, north, east, code)
+            inside, _ = _tile_members(entries["lat"][candidates], entries["lng"][candidates], cells, size)
+            candidates = candidates[inside]
+            single = entries["count"][candidates] == 1
+            members = entries["first"][candidates[single]]
+            chosen.append(members)
+            layers.append([level, members.tolist()])
+            
+            grouped = candidates[~single]
+            prefix = f"{category}|" if category is not None else ""
+            clusters["id"].extend(f"{prefix}{level}:{cx}:{cy}" for cx, cy in zip(entries["cx"][grouped].tolist(), entries["cy"][grouped].tolist()))
+            clusters["level"].extend([level] * len(grouped))
+            clusters["lat"].extend(np.round(entries["lat"][grouped], 6).tolist())
+            clusters["lng"].extend(np.round(entries["lng"][grouped], 6).tolist())
+            clusters["count"].extend(entries["count"][grouped].tolist())
+            clusters["bbox"].extend(np.stack([entries[name][grouped] for name in ("south", "west", "north", "east")], axis=1).tolist())
+            continue
+        
+        candidates = markers.spatial_index().within_bbox(south, west, north, east)
+        if code is not None:
+            candidates = candidates[markers.category_codes[candidates] == code]
+        # 후보 마커의 타일 번호를 계산하여 요청한 타일에 속한 것만 남김
+        inside, tile_keys = _tile_members(markers.lat[candidates], markers.lng[candidates], cells, size)
+        candidates = candidates[inside]
+        
+        # 타일별 최대 per_tile개 (넘치면 고르게 추림)
+        order = np.argsort(tile_keys, kind="stable")
+        candidates, tile_keys = candidates[order], tile_keys[order]
+        starts = np.flatnonzero(np.r_[True, tile_keys[1:] != tile_keys[:-1]]) if len(tile_keys) else np.empty(0, dtype=np.intp)
+        ends = np.r_[starts[1:], len(tile_keys)]
+        members = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end - start > per_tile:
+                members.append(candidates[np.linspace(start, end - 1, per_tile).astype(np.intp)])
+            else:
+                members.append(candidates[start:end])
+        members = np.concatenate(members) if members else np.empty(0, dtype=np.intp)
+        chosen.append(members)
+        layers.append(["M", members.tolist()])
+    
+    ids = np.unique(np.concatenate(chosen)) if chosen else np.empty(0, dtype=np.intp)
+    payload = marker_payload_dict(markers.take(ids))
+    payload["id"] = ids.tolist()
+    payload["filter"] = "all" if category is None else category
+    payload["layers"] = layers
+    payload["clusters"] = clusters
+    payload["tiles"] = tiles
+    return payload
+
+def map_component_categories(markers):
+    """컴포넌트의 필터 버튼/범례용 카테고리 정보 (캐시된 집계 사용)"""
+    stats = markers.category_stats()
+    return {
+        "filters": [{"name": name, "count": entry["count"], "bbox": entry["bbox"]} for name, entry in stats.items()],
+        "legend": [{"name": name, "color": color, "count": stats[name]["count"]}
+                   for name, color in CATEGORY_COLORS.items() if name in stats],
+    }
+
+def map_component_config(api_key, center_lat, center_lng, zoom, height, language, stream):
+    """지도 컴포넌트 설정 인자 (처음 지도를 만들 때만 쓰임)"""
+    return {
+        "api_key": api_key,
+        "language": LANGUAGE_CODES.get(language, "ko"),
+        "center": [center_lat, center_lng],
+        "zoom": zoom,
+        "height": height,
+        "stream": stream,
+        "tiling": {
+            "tile_deg": VIEWPORT_TILE_DEG,
+            "base_zoom": VIEWPORT_BASE_ZOOM,
+            "min_level": VIEWPORT_MIN_LEVEL,
+            "max_level": VIEWPORT_MAX_LEVEL,
+            "max_tiles": VIEWPORT_MAX_TILES,
+            "cluster_max_zoom": CLUSTER_MAX_ZOOM,
+        },
+    }
+
+def map_component_state(markers, center_lat, center_lng, zoom, extra_markers=None, category=None, location=None, view_request=None):
+    """변경 연산으로 동기화하는 지도 상태 (마커 제외)
+
+    location은 location_sync_state()의 값으로, None이면 위치를 추적하지 않는다.
+    view_request는 지도 이동 요청을 구분하는 값으로, 이 값이 바뀔 때만 view
+    연산을 보낸다 (None이면 중심/줌 자체). 중심이 사용자 위치를 따라 바뀌는
+    지도에서 새 위치를 받을 때마다 지도를 다시 옮기지 않도록 할 때 쓴다.
+    """
+    view = {"center": [float(center_lat), float(center_lng)], "zoom": zoom}
+    return {
+        "version": markers.version,
+        "controls": map_component_categories(markers),
+        "extra": marker_payload_dict(extra_markers or []),
+        "view": view,
+        "view_request": view if view_request is None else view_request,
+        "filter": category,
+        "location": location,
+    }
+
+def _sync_map_state(sync, state, event):
+    """마지막으로 보낸 지도 상태(sync)와 이번 상태(state)를 비교한 변경 연산
+
+    처음 그리거나 마커 집합 버전이 바뀌었거나 컴포넌트가 재동기화를
+    요청하면(iframe을 새로 로드해 상태를 잃은 경우 등) reset 연산부터
+    시작해 모든 상태를 다시 보낸다.
+    반환값: (연산 목록, reset 여부, 새 sync)
+    """
+    sync = dict(sync) if sync else {"seq": 0, "handled": None}
+    resync = (isinstance(event, dict) and event.get("type") == "resync"
+              and event.get("request") != sync["handled"])
+    if resync:
+        sync["handled"] = event.get("request")
+    
+    reset = resync or sync.get("version") != state["version"]
+    ops = [{"op": "reset", "value": state["version"]}] if reset else []
+    for name in ("controls", "extra", "view", "filter", "location"):
+        # view는 중심/줌 값이 아니라 이동 요청이 바뀔 때만 보냄
+        compare = "view_request" if name == "view" else name
+        if reset or sync.get(compare) != state[compare]:
+            ops.append({"op": name, "value": state[name]})
+            sync[compare] = state[compare]
+    sync["version"] = state["version"]
+    return ops, reset, sync
+
+def map_sync_state(key):
+    """이번 실행에서 그릴 지도(key)의 마지막 동기화 상태 (없으면 None → reset부터 보냄)
+
+    이번 실행에서 그린 지도로 기록해 두어 forget_unrendered_maps가 지우지 않게 한다.
+    """
+    rendered = st.session_state.get("map_keys_rendered")
+    if rendered is None:
+        rendered = st.session_state.map_keys_rendered = set()
+    rendered.add(key)
+    return st.session_state.get(f"{key}__sync")
+
+def forget_unrendered_maps():
+    """지난 실행에서 그리지 않은 지도의 동기화 상태("<key>__sync")를 지움 (매 실행 시작 때 호출)
+
+    그리지 않은 지도는 iframe이 없어지므로, 버튼을 눌렀을 때만 그리는 코스 지도처럼
+    나중에 다시 그리면 새 iframe이 예전 순번의 변경 연산 대신 reset부터 받아야 한다.
+    """
+    rendered = st.session_state.get("map_keys_rendered") or set()
+    for name in [name for name in st.session_state if name.endswith("__sync")]:
+        if name[:-len("__sync")] not in rendered:
+            del st.session_state[name]
+    st.session_state.map_keys_rendered = set()
+
+def _sync_args(sync, ops):
+    """연산이 있으면 순번을 하나 올린 동기화 인자
+
+    컴포넌트는 base가 자신이 마지막으로 적용한 순번과 같을 때만 연산을
+    적용하고(reset은 항상 적용), 어긋나면 재동기화를 요청한다.
+    연산이 없으면 순번은 그대로이고 빈 연산 목록을 보낸다.
+    """
+    base = sync["seq"]
+    if ops:
+        sync["seq"] += 1
+    return {"seq": sync["seq"], "base": base, "ops": ops}
+
+def _marker_keys(markers):
+    """작은 마커 목록의 마커별 내용 키 (같은 마커는 같은 키)"""
+    return [_digest(json.dumps(dict(marker), ensure_ascii=False, sort_keys=True, default=str))[:12] for marker in markers]
+
+def static_map_args(api_key, center_lat, center_lng, markers=None, zoom=13, height=600, language="한국어", location=None, sync=None, event=None, view_request=None):
+    """모든 마커를 보내는 지도 컴포넌트 인자 (뷰포트 요청 없음)
+
+    마커는 내용 키로 구분하여 지난번에 보낸 목록과 비교해 추가/삭제분만 보낸다.
+    반환값: (args, 새 sync)
+    """
+    if not isinstance(markers, MarkerStore):
+        markers = MarkerStore.from_markers(markers or [], language=language)
+    # 목록이 바뀌어도 reset하지 않도록 고정 버전 사용 (처음/재동기화 때만 reset)
+    state = map_component_state(markers, center_lat, center_lng, zoom, location=location, view_request=view_request)
+    state["version"] = "static"
+    ops, reset, sync = _sync_map_state(sync, state, event)
+    
+    keys = _marker_keys(markers)
+    positions = {}
+    for position, marker_key in enumerate(keys):
+        positions.setdefault(marker_key, position)
+    previous = set() if reset else set(sync.get("markers", ()))
+    removed = sorted(previous - positions.keys())
+    added = [marker_key for marker_key in positions if marker_key not in previous]
+    if removed:
+        ops.append({"op": "remove", "value": removed})
+    if added:
+        payload = marker_payload_dict(markers.take(np.array([positions[marker_key] for marker_key in added], dtype=np.intp)))
+        payload["id"] = added
+        payload["layers"] = [["M", added]]
+        ops.append({"op": "markers", "value": payload})
+    sync["markers"] = list(positions)
+    
+    args = map_component_config(api_key, center_lat, center_lng, zoom, height, language, stream=False)
+    args["sync"] = _sync_args(sync, ops)
+    return args, sync
+
+def streaming_map_args(api_key, center_lat, center_lng, markers=None, extra_markers=None, zoom=12, height=600, language="한국어", category=None, location=None, sync=None, event=None, view_request=None):
+    """뷰포트 스트리밍 지도 컴포넌트 인자
+
+    event는 컴포넌트가 마지막으로 보낸 값으로, 아직 응답하지 않은 타일
+    요청이면 해당 타일의 마커를 markers 연산으로 한 번만 보낸다.
+    반환값: (args, 새 sync)
+    """
+    if not isinstance(markers, MarkerStore):
+        markers = MarkerStore.from_markers(markers or [], language=language)
+    state = map_component_state(markers, center_lat, center_lng, zoom, extra_markers, category, location, view_request)
+    ops, reset, sync = _sync_map_state(sync, state, event)
+    
+    # 새 마커 집합이면 초기 뷰포트 타일을 함께 보냄
+    if reset:
+        south, west, north, east = viewport_bounds(center_lat, center_lng, zoom, VIEWPORT_ASSUMED_WIDTH, height)
+        tiles = tiles_in_bounds(south, west, north, east, viewport_tile_level(zoom))
+        ops.append({"op": "markers", "value": marker_tiles_payload(markers, tiles, category)})
+    
+    # 컴포넌트가 요청한 타일에 대한 응답
+    if (isinstance(event, dict) and event.get("type") == "viewport" and event.get("version") == state["version"]
+            and event.get("request") != sync["handled"]):
+        sync["handled"] = event.get("request")
+        requested = event.get("filter")
+        ops.append({"op": "markers", "request": event.get("request"),
+                    "value": marker_tiles_payload(markers, event.get("tiles", []), None if requested in (None, "all") else requested)})
+    
+    args = map_component_config(api_key, center_lat, center_lng, zoom, height, language, stream=True)
+    args["sync"] = _sync_args(sync, ops)
+    return args, sync
+
+@profiled("map")
+def show_streaming_map(api_key, center_lat, center_lng, markers=None, extra_markers=None, zoom=12, height=600, language="한국어", category=None, key="seoul_map"):
+    """뷰포트 스트리밍 지도 컴포넌트 표시
+
+    처음에는 보이는 영역(+타일 한 칸 여유)의 마커(줌이 CLUSTER_MAX_ZOOM
+    이하면 서버에서 만든 클러스터)만 보내고, 지도를 움직이면
+    컴포넌트가 아직 받지 않은 타일을 요청한다. 요청은 컴포넌트 값으로
+    돌아와 재실행을 일으키며, 이번 실행에서 해당 타일의 마커를 응답으로 보낸다.
+    extra_markers(현재 위치 등)는 타일과 관계없이 항상 표시한다.
+    사용자 위치는 컴포넌트가 백그라운드에서 받아 보낸다 (get_location_position).
+    지도는 처음 한 번만 만들고, 이후 재실행에서는 마지막으로 보낸 상태
+    (세션의 "<key>__sync")와 달라진 부분만 변경 연산으로 보낸다.
+    center/zoom은 처음 그릴 때의 위치라서, 위치가 새로 잡혀 중심이 바뀌어도
+    지도를 옮기지 않는다. "지도에서 보기"로 고른 장소(세션의 clicked_location)가
+    있으면 그 위치로 한 번 이동하고 지운다.
+    반환값: 컴포넌트가 보낸 마지막 이벤트 (dict 또는 None)
+    """
+    sync = map_sync_state(key)
+    # 이동 요청 번호: 장소를 고를 때마다 하나씩 올려 view 연산을 보냄
+    view_request = sync.get("view_request", 0) if sync else 0
+    focus = st.session_state.get("clicked_location")
+    if focus:
+        center_lat, center_lng, zoom = focus["lat"], focus["lng"], MAP_FOCUS_ZOOM
+        view_request += 1
+        st.session_state.clicked_location = None
+    
+    args, st.session_state[f"{key}__sync"] = streaming_map_args(
+        api_key, center_lat, center_lng, markers, extra_markers, zoom, height, language, category,
+        location=location_sync_state(), sync=sync, event=st.session_state.get(key), view_request=view_request
+    )
+    return get_seoul_map_component()(key=key, default=None, **args)